@@ -0,0 +1,5 @@
+import sys
+
+from aerox.cli.cli import main
+
+sys.exit(main())
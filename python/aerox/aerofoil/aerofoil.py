@@ -1,8 +1,7 @@
 import copy
-import matplotlib.pyplot as plt
+import hashlib
 import numpy as np
 import sys
-import xfoil
 
 
 class Aerofoil:
@@ -15,6 +14,8 @@ class Aerofoil:
         self.bottom = [] #  bottom half of aerofoil from trailing edge to leading edge
         self.leading_edge = None
         self.trailing_edge = None
+        self.name = None #  optional identifier, e.g. NACA designation
+        self.resources = None #  resource usage of the external process that generated the aerofoil, if any
 
     def load_from_gnu(self, file):
         """
@@ -36,6 +37,18 @@ class Aerofoil:
                 continue
             points.append((float(s[0]), float(s[1])))
 
+        self.load_from_surfaces(top, bottom)
+
+    def load_from_surfaces(self, top, bottom):
+        """
+        Load aerofoil from coordinates of its upper and lower surfaces.
+        :param top: sequence of (x, y) pairs on upper surface from leading edge to trailing edge.
+        :param bottom: sequence of (x, y) pairs on lower surface from leading edge to trailing edge. The first point is
+                       the leading edge, shared with top.
+        :return: None
+        """
+        top = [(float(x), float(y)) for x, y in top]
+        bottom = [(float(x), float(y)) for x, y in bottom]
         bottom.reverse()
         self.coordinates = top + bottom[1: -1]
         self.top = top[1:]
@@ -43,6 +56,15 @@ class Aerofoil:
         self.leading_edge = top[0]
         self.trailing_edge = (top[-1][0], 0.5*(bottom[-1][1] + top[-1][1]))
 
+    def digest(self, decimals = 8):
+        """
+        Hash of the aerofoil geometry, identical for aerofoils whose coordinates agree to the given number of decimals.
+        :param decimals: number of decimal places coordinates are rounded to before hashing.
+        :return: hex digest as str.
+        """
+        c = np.round(np.array(self.top + self.bottom + [self.leading_edge], dtype = float), decimals) + 0.0
+        return hashlib.sha1(c.tobytes()).hexdigest()
+
     def plot(self):
         """
         Plot aerofoil geometry using matplotlib.
@@ -56,6 +78,7 @@ class Aerofoil:
         >>> plt.show()
         :return: None
         """
+        import matplotlib.pyplot as plt  # imported on use so that headless processes never load matplotlib
         c = np.array(self.coordinates)
         plt.plot(c[:, 0], c[:, 1])
 
@@ -78,6 +101,7 @@ class Aerofoil:
         """
         :return: xfoil.xfoil.Airfoil object
         """
+        import xfoil  # imported on use, xfoil is only needed when running xfoil
         top_reversed = copy.deepcopy(self.top)
         top_reversed.reverse()
 
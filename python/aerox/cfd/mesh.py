@@ -1,6 +1,7 @@
 import copy
 import numpy as np
 
+from aerox.cfd import validation
 from aerox.drivers.gmsh.geometry import Circle
 from aerox.drivers.gmsh.geometry import Line
 from aerox.drivers.gmsh.geometry import Loop
@@ -8,6 +9,7 @@ from aerox.drivers.gmsh.geometry import PhysicalCurve
 from aerox.drivers.gmsh.geometry import PhysicalSurface
 from aerox.drivers.gmsh.geometry import Point
 from aerox.drivers.gmsh.geometry import Surface
+from aerox.tracing.tracing import span
 
 
 def default_config():
@@ -33,13 +35,18 @@ def default_config():
                                      the trailing edge. Set to None to automatically calculate this value.
     - grid/regular/boundary_layer/initial_thickness: thickness of the cell immediately adjacent to aerofoil. Cells will
                                                      increase in thickness.
+
+    Validation
+    - validation: config of geometric checks run before gmsh statements are generated, see
+                  aerox.cfd.validation.default_config(), or None to skip validation.
     :return: default config as dict.
     """
     return {'grid': {'regular': {'width': 0.05,
                                  'wake': {'width': 0.1, 'progression': None},
                                  'layers': 50,
                                  'thickness': 5,
-                                 'boundary_layer': { 'initial_thickness': 4.2e-5 }}}}
+                                 'boundary_layer': { 'initial_thickness': 4.2e-5 }}},
+            'validation': validation.default_config()}
 
 
 def aerofoil_geometry(aerofoil, config):
@@ -49,15 +56,33 @@ def aerofoil_geometry(aerofoil, config):
     :param config: meshing config, see default_config() for details.
     :return: list of gmsh statements defining mesh geometry.
     """
-    top = _half_aerofoil([aerofoil.leading_edge] + aerofoil.top,
-                          config)
+    with span('mesh.aerofoil_geometry',
+              aerofoil = aerofoil.name,
+              points = len(aerofoil.coordinates),
+              width = config['grid']['regular']['width'],
+              layers = config['grid']['regular']['layers']) as s:
+        geometry = _aerofoil_geometry(aerofoil, config)
+        s.set('statements', len(geometry))
+    return geometry
+
+
+def _aerofoil_geometry(aerofoil, config):
+    """
+    See aerofoil_geometry().
+    """
+    with span('mesh.half_aerofoil', side = 'top'):
+        top = _half_aerofoil([aerofoil.leading_edge] + aerofoil.top,
+                              config)
 
-    bottom = _half_aerofoil(aerofoil.bottom + [aerofoil.leading_edge],
-                            config)
+    with span('mesh.half_aerofoil', side = 'bottom'):
+        bottom = _half_aerofoil(aerofoil.bottom + [aerofoil.leading_edge],
+                                config)
 
-    leading_edge = _leading_edge(top, bottom, config)
+    with span('mesh.leading_edge'):
+        leading_edge = _leading_edge(top, bottom, config)
 
-    trailing_edge = _trailing_edge(top, bottom, config)
+    with span('mesh.trailing_edge'):
+        trailing_edge = _trailing_edge(top, bottom, config)
 
     # physical objects
     aerofoil_curve = PhysicalCurve('aerofoil',
@@ -80,11 +105,20 @@ def aerofoil_geometry(aerofoil, config):
                                                                     + leading_edge['surfaces']['all']
                                                                     + trailing_edge['surfaces']['all']])
 
-    return _serialise(top) \
-           + _serialise(bottom) \
-           + _serialise(leading_edge) \
-           + _serialise(trailing_edge) \
-           + [str(aerofoil_curve), str(far_field_curve), str(physical_surface)]
+    if config.get('validation') is not None:
+        with span('mesh.validate'):
+            validation.validate({'top': top,
+                                 'bottom': bottom,
+                                 'leading_edge': leading_edge,
+                                 'trailing_edge': trailing_edge},
+                                config['validation'])
+
+    with span('mesh.serialise'):
+        return _serialise(top) \
+               + _serialise(bottom) \
+               + _serialise(leading_edge) \
+               + _serialise(trailing_edge) \
+               + [str(aerofoil_curve), str(far_field_curve), str(physical_surface)]
 
 """
 The implementation relies on a block data structure to represent parts of the geometry.
@@ -0,0 +1,297 @@
+"""
+Mesh morphing: deform an existing mesh to a new aerofoil shape instead of remeshing.
+
+Wall nodes of a baseline mesh are located on the baseline aerofoil surface by projection onto its coordinate polyline,
+then moved to the same segment and fraction of the new aerofoil's polyline. Their displacements are interpolated into
+the volume by inverse distance weighting, with the far field held fixed. The morphed mesh is accepted only if no
+element is inverted or collapsed; otherwise run() falls back to meshing the new aerofoil from scratch.
+
+Morphing needs the new aerofoil to have the same number of coordinates as the baseline, as produced by a fixed
+parameterisation such as aerox.optimisation.cst.
+
+Example:
+>>> with open('baseline/mesh.su2', 'r') as fd:
+>>>     baseline = {'aerofoil': baseline_aerofoil, 'mesh': morph.read_su2(fd)}
+>>> outcome = morph.run(candidate, baseline, morph.default_config())
+"""
+
+import os
+
+import numpy as np
+
+from aerox.tracing.tracing import span
+
+
+#  VTK element types used by SU2, mapped to number of nodes
+ELEMENT_NODES = {3: 2, 5: 3, 9: 4}
+
+
+def default_config():
+    """
+    - marker: name of wall marker, see aerox.cfd.mesh.
+    - far_field_marker: name of far field marker. Its nodes are held fixed.
+    - power: exponent of inverse distance weighting. Larger values keep deformation closer to the wall.
+    - far_field_sources: number of far field nodes used as fixed interpolation sources.
+    - chunk_size: number of nodes interpolated at once.
+    - min_area_ratio: elements whose area shrinks below this fraction of their baseline area fail the quality check.
+    - working_directory: directory mesh.su2 is written to.
+    - mesh: meshing config used when falling back to remeshing, see aerox.cfd.mesh.default_config(), or None for
+            defaults.
+    - gmsh: gmsh config used when falling back to remeshing, see aerox.drivers.gmsh.driver.default_config(), or None
+            for defaults. Its working_directory is replaced by working_directory.
+    :return: default config as dict.
+    """
+    return {'marker': 'aerofoil',
+            'far_field_marker': 'far_field',
+            'power': 3.0,
+            'far_field_sources': 256,
+            'chunk_size': 4096,
+            'min_area_ratio': 0.05,
+            'working_directory': '.',
+            'mesh': None,
+            'gmsh': None}
+
+
+def read_su2(file):
+    """
+    Read 2D mesh in SU2 native format.
+    :param file: file-like object.
+    :return: mesh as dict containing:
+             - nodes: (n, 2) array of node coordinates
+             - types: (m,) array of VTK element types
+             - elements: (m, 4) array of element node indices, padded with -1 for triangles
+             - markers: dict mapping marker name to (k, 2) array of node indices of its line elements
+    """
+    lines = iter(file)
+
+    def value(line):
+        return line.split('=')[1].strip()
+
+    nodes = None
+    types = None
+    elements = None
+    markers = {}
+    for line in lines:
+        line = line.split('%')[0].strip()
+        if line.startswith('NDIME'):
+            if int(value(line)) != 2:
+                raise ValueError('Expected 2D mesh, got NDIME= {}'.format(value(line)))
+        elif line.startswith('NELEM'):
+            n = int(value(line))
+            rows = [next(lines).split() for _ in range(n)]
+            types = np.array([int(row[0]) for row in rows], dtype = int)
+            elements = np.full((n, 4), -1, dtype = int)
+            for i, row in enumerate(rows):
+                k = ELEMENT_NODES[types[i]]
+                elements[i, :k] = [int(v) for v in row[1:k + 1]]
+        elif line.startswith('NPOIN'):
+            n = int(value(line).split()[0])
+            nodes = np.loadtxt([next(lines) for _ in range(n)], usecols = (0, 1), ndmin = 2)
+        elif line.startswith('MARKER_TAG'):
+            tag = value(line)
+            n = int(value(next(lines)))
+            rows = np.loadtxt([next(lines) for _ in range(n)], dtype = int, ndmin = 2)
+            markers[tag] = rows[:, 1:3]
+    if nodes is None or elements is None:
+        raise ValueError('Expected NELEM and NPOIN sections in SU2 mesh')
+    return {'nodes': nodes, 'types': types, 'elements': elements, 'markers': markers}
+
+
+def write_su2(mesh, file):
+    """
+    Write mesh in SU2 native format.
+    :param mesh: mesh as dict, see read_su2().
+    :param file: file-like object.
+    :return: None
+    """
+    file.write('NDIME= 2\n')
+    file.write('NELEM= {}\n'.format(len(mesh['types'])))
+    for i in range(len(mesh['types'])):
+        k = ELEMENT_NODES[mesh['types'][i]]
+        file.write('{} {} {}\n'.format(mesh['types'][i], ' '.join(str(v) for v in mesh['elements'][i, :k]), i))
+    file.write('NPOIN= {}\n'.format(len(mesh['nodes'])))
+    for i in range(len(mesh['nodes'])):
+        file.write('{:.17g} {:.17g} {}\n'.format(mesh['nodes'][i, 0], mesh['nodes'][i, 1], i))
+    file.write('NMARK= {}\n'.format(len(mesh['markers'])))
+    for tag, lines in mesh['markers'].items():
+        file.write('MARKER_TAG= {}\n'.format(tag))
+        file.write('MARKER_ELEMS= {}\n'.format(len(lines)))
+        for line in lines:
+            file.write('3 {} {}\n'.format(line[0], line[1]))
+
+
+def morph(mesh, baseline, aerofoil, config):
+    """
+    Deform mesh of baseline aerofoil to aerofoil.
+    :param mesh: mesh of baseline aerofoil as dict, see read_su2().
+    :param baseline: aerox.aerofoil.aerofoil.Aerofoil object the mesh was generated for.
+    :param aerofoil: aerox.aerofoil.aerofoil.Aerofoil object to deform the mesh to.
+    :param config: config as dict, see default_config() for details.
+    :return: tuple of (morphed mesh as dict, list of quality issues, see quality()). The morphed mesh shares
+             elements and markers with mesh.
+    """
+    if len(baseline.coordinates) != len(aerofoil.coordinates):
+        raise ValueError('Expected aerofoil with {} coordinates like the baseline, got {}'.format(
+            len(baseline.coordinates), len(aerofoil.coordinates)))
+    if config['marker'] not in mesh['markers']:
+        raise ValueError('Marker {} not in mesh, got {}'.format(config['marker'], list(mesh['markers'].keys())))
+
+    with span('morph.deform', nodes = len(mesh['nodes'])):
+        wall = np.unique(mesh['markers'][config['marker']])
+        displacement = _wall_displacement(mesh['nodes'][wall],
+                                          _polyline(baseline),
+                                          _polyline(aerofoil))
+        fixed = np.zeros(0, dtype = int)
+        if config['far_field_marker'] in mesh['markers']:
+            fixed = np.unique(mesh['markers'][config['far_field_marker']])
+        nodes = deform(mesh['nodes'], wall, displacement, fixed, config)
+
+    morphed = dict(mesh, nodes = nodes)
+    with span('morph.quality') as s:
+        issues = quality(mesh, morphed, config)
+        s.set('issues', len(issues))
+    return morphed, issues
+
+
+def deform(nodes, wall, displacement, fixed, config):
+    """
+    Interpolate wall displacements into the volume by inverse distance weighting.
+    :param nodes: (n, 2) array of node coordinates.
+    :param wall: indices of wall nodes.
+    :param displacement: (len(wall), 2) array of wall node displacements.
+    :param fixed: indices of nodes held fixed, e.g. the far field.
+    :param config: config as dict, see default_config() for details.
+    :return: (n, 2) array of displaced node coordinates.
+    """
+    if len(fixed) > config['far_field_sources']:
+        fixed_sources = fixed[np.linspace(0, len(fixed) - 1, config['far_field_sources']).astype(int)]
+    else:
+        fixed_sources = fixed
+    sources = np.concatenate([nodes[wall], nodes[fixed_sources]])
+    values = np.concatenate([displacement, np.zeros((len(fixed_sources), 2))])
+
+    out = nodes.copy()
+    for start in range(0, len(nodes), config['chunk_size']):
+        chunk = nodes[start:start + config['chunk_size']]
+        r2 = np.sum((chunk[:, None, :] - sources[None, :, :]) ** 2, axis = 2)
+        with np.errstate(divide = 'ignore'):
+            w = r2 ** (-0.5 * config['power'])
+        exact = np.isinf(w)
+        rows = np.any(exact, axis = 1)
+        w[rows] = exact[rows]
+        out[start:start + len(chunk)] += (w @ values) / np.sum(w, axis = 1)[:, None]
+    out[wall] = nodes[wall] + displacement
+    out[fixed] = nodes[fixed]
+    return out
+
+
+def quality(mesh, morphed, config):
+    """
+    Compare element shapes before and after morphing.
+    :param mesh: baseline mesh as dict, see read_su2().
+    :param morphed: morphed mesh as dict.
+    :param config: config as dict, see default_config() for details.
+    :return: list of issues, each a str. Empty if every element keeps the orientation of all its corners and at least
+             min_area_ratio of its area.
+    """
+    issues = []
+    before_corners, before_area = _element_shape(mesh['nodes'], mesh['elements'])
+    after_corners, after_area = _element_shape(morphed['nodes'], mesh['elements'])
+    valid = mesh['elements'] >= 0
+    inverted = np.any(valid & (np.sign(before_corners) != np.sign(after_corners)), axis = 1)
+    for i in np.flatnonzero(inverted):
+        issues.append('element {} is inverted'.format(i))
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        ratio = after_area / before_area
+    collapsed = ~inverted & (ratio < config['min_area_ratio'])
+    for i in np.flatnonzero(collapsed):
+        issues.append('element {} shrinks to {:.3g} of its area'.format(i, ratio[i]))
+    return issues
+
+
+def run(aerofoil, baseline, config):
+    """
+    Write mesh.su2 for aerofoil, morphing the baseline mesh if possible and remeshing otherwise.
+    :param aerofoil: aerox.aerofoil.aerofoil.Aerofoil object.
+    :param baseline: dict with aerofoil, the baseline aerox.aerofoil.aerofoil.Aerofoil object, and mesh, its mesh as
+                     returned by read_su2().
+    :param config: config as dict, see default_config() for details.
+    :return: dict containing:
+             - method: 'morphed' or 'remeshed'
+             - issues: reasons morphing was rejected, empty if morphed
+             - resources: resource usage of gmsh if remeshed, otherwise None
+    """
+    output = os.path.join(config['working_directory'], 'mesh.su2')
+    with span('morph.run', aerofoil = aerofoil.name) as s:
+        try:
+            morphed, issues = morph(baseline['mesh'], baseline['aerofoil'], aerofoil, config)
+        except ValueError as e:
+            morphed, issues = None, [str(e)]
+        s.set('issues', len(issues))
+        if len(issues) == 0:
+            with open(output, 'w') as fd:
+                write_su2(morphed, fd)
+            s.set('method', 'morphed')
+            return {'method': 'morphed', 'issues': [], 'resources': None}
+
+        from aerox.cfd import mesh
+        from aerox.drivers.gmsh import driver as gmsh
+        mesh_config = mesh.default_config() if config['mesh'] is None else config['mesh']
+        gmsh_config = dict(gmsh.default_config() if config['gmsh'] is None else config['gmsh'])
+        gmsh_config['working_directory'] = config['working_directory']
+        usage = gmsh.run(mesh.aerofoil_geometry(aerofoil, mesh_config), gmsh_config)
+        s.set('method', 'remeshed')
+        return {'method': 'remeshed', 'issues': issues, 'resources': usage}
+
+
+def _polyline(aerofoil):
+    """
+    :param aerofoil: aerox.aerofoil.aerofoil.Aerofoil object.
+    :return: (n + 1, 2) array of aerofoil coordinates, closed by repeating the first.
+    """
+    coordinates = np.array(aerofoil.coordinates, dtype = float)
+    return np.concatenate([coordinates, coordinates[:1]])
+
+
+def _wall_displacement(points, before, after):
+    """
+    Locate points on polyline before and move them to the same position on polyline after.
+    :param points: (n, 2) array of wall node coordinates.
+    :param before: (m, 2) array of baseline surface polyline.
+    :param after: (m, 2) array of new surface polyline.
+    :return: (n, 2) array of displacements.
+    """
+    a = before[:-1]
+    ab = before[1:] - a
+    length2 = np.maximum(np.sum(ab ** 2, axis = 1), 1e-300)
+    t = np.sum((points[:, None, :] - a[None, :, :]) * ab[None, :, :], axis = 2) / length2[None, :]
+    t = np.clip(t, 0.0, 1.0)
+    projection = a[None, :, :] + t[:, :, None] * ab[None, :, :]
+    distance = np.sum((points[:, None, :] - projection) ** 2, axis = 2)
+    segment = np.argmin(distance, axis = 1)
+    t = t[np.arange(len(points)), segment]
+
+    old = before[segment] + t[:, None] * (before[segment + 1] - before[segment])
+    new = after[segment] + t[:, None] * (after[segment + 1] - after[segment])
+    return new - old
+
+
+def _element_shape(nodes, elements):
+    """
+    :return: tuple of ((m, 4) array of corner cross products, zero for padding, (m,) array of absolute areas).
+    """
+    valid = elements >= 0
+    counts = np.sum(valid, axis = 1)
+    index = np.where(valid, elements, elements[:, :1])
+    v = nodes[index]
+    #  previous and next corner of each corner, wrapping within the element's own node count
+    position = np.arange(4)[None, :]
+    previous = v[np.arange(len(v))[:, None], (position - 1) % counts[:, None]]
+    following = v[np.arange(len(v))[:, None], (position + 1) % counts[:, None]]
+    e1 = v - previous
+    e2 = following - v
+    corners = np.where(valid, e1[:, :, 0] * e2[:, :, 1] - e1[:, :, 1] * e2[:, :, 0], 0.0)
+    x = v[:, :, 0]
+    y = v[:, :, 1]
+    area = 0.5 * np.abs(np.sum(np.where(valid, x * following[:, :, 1] - following[:, :, 0] * y, 0.0), axis = 1))
+    return corners, area
@@ -0,0 +1,258 @@
+"""
+Geometric validation of mesh blocks, see aerox.cfd.mesh for the block data structure.
+
+Checks run on the blocks before any gmsh statement is written, so that a C-grid that cannot be meshed is rejected in
+milliseconds rather than after gmsh or SU2 has run:
+- every loop is closed, i.e. its curves join end to end into a single cycle,
+- every loop has a non-negligible area,
+- no corner of a four-sided loop is inverted, i.e. every quad is convex,
+- no two curves cross each other.
+Like gmsh, the checks do not depend on the order and direction curves are listed in a loop: each loop is checked
+against its own orientation, as the corner mapping of each transfinite block is left to the mesh generator. Circle arcs
+are approximated by polylines through their centre.
+"""
+
+import numpy as np
+
+from aerox.drivers.gmsh.geometry import Circle
+from aerox.drivers.gmsh.geometry import Line
+
+
+def default_config():
+    """
+    - area_tolerance: loops with absolute signed area below area_tolerance times the median loop area are degenerate.
+    - arc_segments: number of straight segments used to approximate each circle arc.
+    - max_issues: maximum number of issues reported in the error message.
+    - chunk_size: number of segments tested against all others at once when checking for crossings.
+    :return: default config as dict.
+    """
+    return {'area_tolerance': 1e-9,
+            'arc_segments': 16,
+            'max_issues': 10,
+            'chunk_size': 512}
+
+
+def validate(blocks, config = None):
+    """
+    Validate blocks, raising ValueError describing every issue found (up to config['max_issues']).
+    :param blocks: dict mapping block name (e.g. 'top', 'leading_edge') to block data structure.
+    :param config: validation config, see default_config() for details, or None for defaults.
+    :return: None
+    """
+    issues = check(blocks, config)
+    if len(issues) > 0:
+        if config is None:
+            config = default_config()
+        message = 'Mesh geometry is invalid, {} issue(s) found:\n'.format(len(issues))
+        message += '\n'.join('  - ' + issue for issue in issues[:config['max_issues']])
+        if len(issues) > config['max_issues']:
+            message += '\n  - ... {} more'.format(len(issues) - config['max_issues'])
+        raise ValueError(message)
+
+
+def check(blocks, config = None):
+    """
+    :param blocks: dict mapping block name to block data structure.
+    :param config: validation config, see default_config() for details, or None for defaults.
+    :return: list of issues found, each a str. Empty if the blocks are valid.
+    """
+    if config is None:
+        config = default_config()
+    points = {}
+    curves = {}
+    owners = {}
+    for name, block in blocks.items():
+        for group in block.get('points', {}).values():
+            for point in group:
+                points[point.id] = point
+        for key, group in block.get('curves', {}).items():
+            for i, curve in enumerate(group):
+                curves[curve.id] = curve
+                owners.setdefault(curve.id, '{}/{}[{}]'.format(name, key, i))
+    for curve in curves.values():
+        if isinstance(curve, Line):
+            points[curve.begin.id] = curve.begin
+            points[curve.end.id] = curve.end
+
+    issues = _check_loops(blocks, points, curves, config)
+    issues += _check_crossings(points, curves, owners, config)
+    return issues
+
+
+def _check_loops(blocks, points, curves, config):
+    """
+    Check closure, area and corners of every loop, each against its own orientation.
+    :return: list of issues.
+    """
+    issues = []
+    names = []
+    polygons = []
+    for name, block in blocks.items():
+        for key, group in block.get('loops', {}).items():
+            for i, loop in enumerate(group):
+                label = 'loop {} ({}/{}[{}])'.format(loop.id, name, key, i)
+                vertices, gap = _loop_vertices(loop, points, curves, config)
+                if gap is not None:
+                    issues.append('{} is not closed, no other curve of the loop joins curve {} at ({:.6g}, {:.6g})'
+                                  .format(label, *gap))
+                    continue
+                names.append(label)
+                polygons.append(vertices)
+    if len(polygons) == 0:
+        return issues
+
+    areas = np.array([_signed_area(vertices) for vertices in polygons])
+    degenerate = np.abs(areas) <= config['area_tolerance'] * np.median(np.abs(areas))
+    for i in np.flatnonzero(degenerate):
+        issues.append('{} is degenerate, signed area {:.3e}'.format(names[i], areas[i]))
+
+    quads = [i for i, vertices in enumerate(polygons) if len(vertices) == 4 and not degenerate[i]]
+    if len(quads) > 0:
+        v = np.array([polygons[i] for i in quads])
+        previous = v - np.roll(v, 1, axis = 1)
+        following = np.roll(v, -1, axis = 1) - v
+        corners = previous[:, :, 0] * following[:, :, 1] - previous[:, :, 1] * following[:, :, 0]
+        bad = corners * np.sign(areas[quads])[:, np.newaxis] <= 0.0
+        for j, k in zip(*np.nonzero(bad)):
+            x, y = v[j, k]
+            issues.append('{} has an inverted corner at ({:.6g}, {:.6g})'.format(names[quads[j]], x, y))
+    return issues
+
+
+def _loop_vertices(loop, points, curves, config):
+    """
+    Join the curves of a loop end to end, in whatever order and direction they are listed. The loop starts with its
+    first curve in the direction listed.
+    :return: tuple of (vertices, gap). vertices is an (n, 2) array of the start of each curve in the loop, with circle
+             arcs replaced by the corners of their polyline. gap is None if the loop is closed, otherwise the tuple of
+             (curve id, x, y) of the end of the curve no other curve of the loop joins.
+    """
+    remaining = [(curves[abs(element)], element < 0) for element in loop.elements]
+    curve, reverse = remaining.pop(0)
+    chain = [(curve, reverse)]
+    first = _endpoints(curve)[1 if reverse else 0]
+    while True:
+        end = _endpoints(chain[-1][0])[0 if chain[-1][1] else 1]
+        if len(remaining) == 0:
+            break
+        following = [k for k, (c, _) in enumerate(remaining) if end in _endpoints(c)]
+        if len(following) == 0:
+            break
+        curve, _ = remaining.pop(following[0])
+        chain.append((curve, _endpoints(curve)[1] == end))
+
+    if len(remaining) > 0 or end != first:
+        x, y = points[end].coordinates[:2]
+        return None, (chain[-1][0].id, x, y)
+    vertices = []
+    for curve, reverse in chain:
+        polyline = _polyline(curve, points, config)
+        if reverse:
+            polyline = polyline[::-1]
+        vertices += [tuple(p) for p in polyline[:-1]]
+    return np.array(vertices), None
+
+
+def _endpoints(curve):
+    """
+    :return: tuple of (begin, end) point ids of curve.
+    """
+    if isinstance(curve, Circle):
+        return curve.begin, curve.end
+    return curve.begin.id, curve.end.id
+
+
+def _polyline(curve, points, config):
+    """
+    :return: (n, 2) array of points along curve from its beginning to its end.
+    """
+    if not isinstance(curve, Circle):
+        return np.array([curve.begin.coordinates[:2], curve.end.coordinates[:2]], dtype = float)
+    center = np.array(points[curve.center].coordinates[:2], dtype = float)
+    begin = np.array(points[curve.begin].coordinates[:2], dtype = float) - center
+    end = np.array(points[curve.end].coordinates[:2], dtype = float) - center
+    start = np.arctan2(begin[1], begin[0])
+    sweep = np.arctan2(begin[0] * end[1] - begin[1] * end[0], np.dot(begin, end))
+    t = np.linspace(0.0, 1.0, config['arc_segments'] + 1)
+    radius = np.linalg.norm(begin) + t * (np.linalg.norm(end) - np.linalg.norm(begin))
+    angle = start + t * sweep
+    return center + radius[:, None] * np.stack([np.cos(angle), np.sin(angle)], axis = 1)
+
+
+def _signed_area(vertices):
+    """
+    :param vertices: (n, 2) array of polygon vertices.
+    :return: signed area, positive if the vertices are anticlockwise.
+    """
+    x = vertices[:, 0]
+    y = vertices[:, 1]
+    return 0.5 * float(np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y))
+
+
+def _check_crossings(points, curves, owners, config):
+    """
+    Check that no two curves cross. Segments that share an end point are not tested against each other.
+    :return: list of issues.
+    """
+    begin = []
+    end = []
+    begin_ids = []
+    end_ids = []
+    segment_curves = []
+    synthetic = -1
+    for curve in curves.values():
+        if not isinstance(curve, (Line, Circle)):
+            continue
+        polyline = _polyline(curve, points, config)
+        ids = [_endpoints(curve)[0]]
+        for _ in range(len(polyline) - 2):
+            ids.append(synthetic)
+            synthetic -= 1
+        ids.append(_endpoints(curve)[1])
+        begin.append(polyline[:-1])
+        end.append(polyline[1:])
+        begin_ids += ids[:-1]
+        end_ids += ids[1:]
+        segment_curves += [curve.id] * (len(polyline) - 1)
+    if len(begin) == 0:
+        return []
+
+    p = np.concatenate(begin)
+    q = np.concatenate(end)
+    begin_ids = np.array(begin_ids)
+    end_ids = np.array(end_ids)
+    segment_curves = np.array(segment_curves)
+
+    def orientation(a, b, c):
+        return (b[..., 0] - a[..., 0]) * (c[..., 1] - a[..., 1]) - (b[..., 1] - a[..., 1]) * (c[..., 0] - a[..., 0])
+
+    issues = []
+    reported = set()
+    n = len(p)
+    for start in range(0, n, config['chunk_size']):
+        stop = min(start + config['chunk_size'], n)
+        i = np.arange(start, stop)[:, None]
+        j = np.arange(n)[None, :]
+        a, b = p[i[:, 0]][:, None, :], q[i[:, 0]][:, None, :]
+        c, d = p[None, :, :], q[None, :, :]
+        o1 = orientation(a, b, c)
+        o2 = orientation(a, b, d)
+        o3 = orientation(c, d, a)
+        o4 = orientation(c, d, b)
+        crossing = (np.sign(o1) * np.sign(o2) < 0) & (np.sign(o3) * np.sign(o4) < 0) & (j > i)
+        shared = (begin_ids[i] == begin_ids[j]) | (begin_ids[i] == end_ids[j]) \
+                 | (end_ids[i] == begin_ids[j]) | (end_ids[i] == end_ids[j])
+        crossing &= ~shared & (segment_curves[i] != segment_curves[j])
+        for k, l in zip(*np.nonzero(crossing)):
+            first, second = segment_curves[start + k], segment_curves[l]
+            if (first, second) in reported:
+                continue
+            reported.add((first, second))
+            t = o3[k, l] / (o3[k, l] - o4[k, l])
+            x, y = p[start + k] + t * (q[start + k] - p[start + k])
+            issues.append('curve {} ({}) crosses curve {} ({}) at ({:.6g}, {:.6g})'.format(first,
+                                                                                          owners[first],
+                                                                                          second,
+                                                                                          owners[second],
+                                                                                          x, y))
+    return issues
@@ -0,0 +1,236 @@
+"""
+aerox command line interface.
+
+Only argparse is imported at start up; each subcommand imports the drivers it uses, so short-lived batch processes do
+not pay for solver or plotting libraries they never touch.
+
+Example:
+>>> aerox generate 2412 -o naca2412.dat
+>>> aerox mesh 2412 --output-dir case
+>>> aerox solve --alphas 0 2 4 --manifest sweep.json
+>>> aerox sweep 2412 --range -4 16 1 --reynolds-number 1e6
+>>> aerox work sweep.db --processes 4
+"""
+
+import argparse
+import sys
+
+
+def main(argv = None):
+    """
+    Entry point of the aerox command.
+    :param argv: command line arguments excluding the program name, or None to use sys.argv.
+    :return: exit status.
+    """
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 2
+
+    if args.trace is None:
+        return args.handler(args)
+
+    from aerox.tracing import tracing
+    with tracing.capture(tracing.ChromeTraceSink(args.trace)):
+        return args.handler(args)
+
+
+def _parser():
+    """
+    :return: argparse.ArgumentParser for the aerox command.
+    """
+    parser = argparse.ArgumentParser(prog = 'aerox', description = 'Aerodynamics and aircraft design for X-plane')
+    parser.add_argument('--trace', metavar = 'PATH', help = 'write Chrome trace of the run to PATH')
+    parser.add_argument('--naca456', metavar = 'PATH', help = 'naca456 executable, default naca456 in PATH')
+    subparsers = parser.add_subparsers(dest = 'command')
+
+    generate = subparsers.add_parser('generate', help = 'generate NACA aerofoil coordinates')
+    generate.add_argument('name', help = "NACA designation, e.g. '2412' or '65-110'")
+    generate.add_argument('-o', '--output', help = 'output file in xfoil plain format, default stdout')
+    generate.set_defaults(handler = _generate)
+
+    mesh = subparsers.add_parser('mesh', help = 'mesh aerofoil with gmsh for SU2')
+    mesh.add_argument('aerofoil', help = 'NACA designation or path to naca456 .gnu coordinates')
+    mesh.add_argument('--output-dir', default = '.', help = 'directory to write mesh.geo and mesh.su2 to')
+    mesh.add_argument('--gmsh', metavar = 'PATH', help = 'gmsh executable, default gmsh in PATH')
+    mesh.add_argument('--geo-only', action = 'store_true', help = 'write mesh.geo without running gmsh')
+    mesh.set_defaults(handler = _mesh)
+
+    solve = subparsers.add_parser('solve', help = 'run SU2 sweep on mesh.su2 in the current directory')
+    _add_alphas(solve)
+    solve.add_argument('--su2', metavar = 'PATH', help = 'SU2_CFD executable, default SU2_CFD in PATH')
+    solve.add_argument('--airspeed', type = float, default = 50.0, help = 'airspeed, m/s')
+    solve.add_argument('--window-iterations', type = int, default = 1,
+                       help = 'number of final iterations averaged to compute coefficients')
+    solve.add_argument('--manifest', metavar = 'PATH', help = 'resumable sweep manifest')
+    solve.add_argument('--archive', metavar = 'PATH', help = 'compressed results archive')
+    solve.add_argument('--surface', action = 'store_true', help = 'read surface distributions')
+    solve.add_argument('--scratch', metavar = 'DIR', help = 'run each case under node-local scratch directory DIR')
+    solve.add_argument('--compress', action = 'store_true',
+                       help = 'gzip artefacts copied back to the working directory')
+    solve.add_argument('--verbose', action = 'store_true')
+    solve.set_defaults(handler = _solve)
+
+    sweep = subparsers.add_parser('sweep', help = 'run xfoil sweep')
+    sweep.add_argument('aerofoil', help = 'NACA designation or path to naca456 .gnu coordinates')
+    _add_alphas(sweep)
+    sweep.add_argument('--reynolds-number', type = float, default = 1e6)
+    sweep.add_argument('--mach', type = float, default = 0.0)
+    sweep.set_defaults(handler = _sweep)
+
+    work = subparsers.add_parser('work', help = 'run jobs from a job queue, see aerox.sweep.jobs')
+    work.add_argument('queue', help = 'path of job queue database')
+    work.add_argument('--processes', type = int, default = 1, help = 'number of local worker processes')
+    work.add_argument('--wait', action = 'store_true', help = 'wait for new jobs instead of exiting when none are left')
+    work.set_defaults(handler = _work)
+    return parser
+
+
+def _add_alphas(parser):
+    """
+    Add mutually exclusive alpha selection options to parser.
+    :param parser: argparse parser.
+    :return: None
+    """
+    group = parser.add_mutually_exclusive_group(required = True)
+    group.add_argument('--alphas', type = float, nargs = '+', help = 'angles of attack, degrees')
+    group.add_argument('--range', type = float, nargs = 3, metavar = ('START', 'STOP', 'STEP'),
+                       help = 'angles of attack from START to STOP inclusive, degrees')
+    group.add_argument('--adaptive', type = float, nargs = 2, metavar = ('MIN', 'MAX'),
+                       help = 'choose angles of attack adaptively between MIN and MAX, degrees')
+
+
+def _alphas(args, config):
+    """
+    Set alphas or adaptive sweep in driver config from parsed arguments.
+    :param args: parsed arguments.
+    :param config: xfoil or SU2 driver config.
+    :return: None
+    """
+    if args.alphas is not None:
+        config['alphas'] = args.alphas
+    elif args.range is not None:
+        start, stop, step = args.range
+        n = int(round((stop - start) / step)) + 1
+        config['alphas'] = [start + i * step for i in range(n)]
+    else:
+        from aerox.sweep import adaptive
+        config['adaptive'] = adaptive.default_config()
+        config['adaptive']['alpha_range'] = tuple(args.adaptive)
+
+
+def _load_aerofoil(spec, naca456_path):
+    """
+    :param spec: path to naca456 .gnu file, or NACA designation.
+    :param naca456_path: naca456 executable, or None.
+    :return: aerox.aerofoil.aerofoil.Aerofoil object.
+    """
+    import os
+    if os.path.exists(spec):
+        from aerox.aerofoil.aerofoil import Aerofoil
+        aerofoil = Aerofoil()
+        with open(spec, 'r') as fd:
+            aerofoil.load_from_gnu(fd)
+        aerofoil.name = os.path.splitext(os.path.basename(spec))[0]
+        return aerofoil
+
+    from aerox.drivers.naca456 import driver as naca456
+    config = naca456.default_config()
+    config['path'] = naca456_path
+    return naca456.run(spec, config)
+
+
+def _write_polar(polar, ostream = sys.stdout):
+    """
+    Write polar as CSV.
+    :param polar: aerox.polar.polar.Polar object.
+    :param ostream: output stream.
+    :return: None
+    """
+    ostream.write('alpha,cl,cd,cm,converged\n')
+    for i in range(len(polar)):
+        ostream.write('{},{},{},{},{}\n'.format(polar.alpha[i],
+                                                polar.cl[i],
+                                                polar.cd[i],
+                                                polar.cm[i],
+                                                int(polar.converged[i])))
+
+
+def _generate(args):
+    aerofoil = _load_aerofoil(args.name, args.naca456)
+    if args.output is None:
+        aerofoil.to_xfoil(sys.stdout)
+    else:
+        with open(args.output, 'w') as fd:
+            aerofoil.to_xfoil(fd)
+    return 0
+
+
+def _mesh(args):
+    from aerox.cfd import mesh
+    from aerox.drivers.gmsh import driver as gmsh
+
+    aerofoil = _load_aerofoil(args.aerofoil, args.naca456)
+    geometry = mesh.aerofoil_geometry(aerofoil, mesh.default_config())
+    if args.geo_only:
+        import os
+        with open(os.path.join(args.output_dir, 'mesh.geo'), 'w') as fd:
+            for line in geometry:
+                fd.write(line + '\n')
+        return 0
+
+    config = gmsh.default_config()
+    config['path'] = args.gmsh
+    config['working_directory'] = args.output_dir
+    usage = gmsh.run(geometry, config)
+    if usage['exit_status'] != 0:
+        sys.stderr.write('gmsh failed with exit status {}\n'.format(usage['exit_status']))
+    return usage['exit_status']
+
+
+def _solve(args):
+    from aerox.drivers.su2 import driver as su2
+
+    config = su2.default_config()
+    config['path'] = args.su2
+    config['airspeed'] = args.airspeed
+    config['window_iterations'] = args.window_iterations
+    config['manifest'] = args.manifest
+    config['archive'] = args.archive
+    config['surface'] = args.surface
+    config['storage']['scratch'] = args.scratch
+    config['storage']['compress'] = args.compress
+    _alphas(args, config)
+    _write_polar(su2.run(config, verbose = args.verbose))
+    return 0
+
+
+def _sweep(args):
+    from aerox.drivers.xfoil import driver as xfoil
+
+    aerofoil = _load_aerofoil(args.aerofoil, args.naca456)
+    config = xfoil.default_config()
+    config['xfoil']['reynolds_number'] = args.reynolds_number
+    config['xfoil']['mach'] = args.mach
+    _alphas(args, config)
+    _write_polar(xfoil.run(config, aerofoil))
+    return 0
+
+
+def _work(args):
+    import multiprocessing
+    from aerox.sweep import jobs
+
+    config = jobs.default_config()
+    config['exit_when_empty'] = not args.wait
+    if args.processes == 1:
+        jobs.work(args.queue, config = config)
+        return 0
+    workers = [multiprocessing.Process(target = jobs.work, args = (args.queue,), kwargs = {'config': config})
+               for _ in range(args.processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return max(worker.exitcode for worker in workers)
@@ -1,7 +1,9 @@
 import os
-import subprocess
 import shlex
 
+from aerox.drivers import process
+from aerox.tracing.tracing import span
+
 
 def default_config():
     """
@@ -20,13 +22,14 @@ def run(geometry, config):
     Runs gmsh to generate SU2 mesh.
     :param geometry: gmsh geometry definition (contents of .geo file) as string.
     :param config: gmsh config, see default_config() for details.
-    :return: None
+    :return: resource usage of the gmsh process as dict, see aerox.drivers.process.run() for details.
     """
     geometry_file = os.path.join(config['working_directory'], 'mesh.geo')
     output = os.path.join(config['working_directory'], 'mesh.su2')
-    with open(geometry_file, 'w') as fd:
-        for line in geometry:
-            fd.write(line + '\n')
+    with span('gmsh.write_geo', statements = len(geometry)):
+        with open(geometry_file, 'w') as fd:
+            for line in geometry:
+                fd.write(line + '\n')
 
     executable = 'gmsh'
     if config['path'] is not None:
@@ -36,7 +39,7 @@ def run(geometry, config):
                                                                                      dimensions = config['dimensions'],
                                                                                      geometry = geometry_file,
                                                                                      output = output)
-    p = subprocess.Popen(shlex.split(command),
-                         stdin = subprocess.PIPE,
-                         stdout = subprocess.PIPE)
-    p.wait()
+    with span('gmsh.run', dimensions = config['dimensions']) as s:
+        stdout, stderr, usage = process.run(shlex.split(command))
+        s.set('exit_status', usage['exit_status'])
+    return usage
@@ -1,9 +1,10 @@
 import os
 import shlex
-import subprocess
 import sys
 
 from aerox.aerofoil.aerofoil import Aerofoil
+from aerox.drivers import process
+from aerox.tracing.tracing import span
 
 
 def run(name, config, **kwargs):
@@ -11,7 +12,8 @@ def run(name, config, **kwargs):
     Run naca456 to generate coordinates of NACA aerofoil.
     :param name: name of aerofoil to generate e.g. '2412' for NACA2412 aerofoil or '65-110' for NACA65-110 aerofoil.
     :param config: config as dict. See default_config() for details.
-    :return: Aerofoil object.
+    :return: Aerofoil object. Its resources attribute holds the resource usage of the naca456 process, see
+             aerox.drivers.process.run() for details.
     """
 
     input_filename = 'naca.in'
@@ -22,16 +24,17 @@ def run(name, config, **kwargs):
     if config['path'] is not None:
         command = os.path.join(config['path'])
 
-    process = subprocess.Popen(shlex.split(command),
-                               stdin = subprocess.PIPE,
-                               stdout = subprocess.PIPE)
-    stdout, stderr = process.communicate(input_filename.encode())
+    with span('naca456.run', aerofoil = name) as s:
+        stdout, stderr, usage = process.run(shlex.split(command), input = input_filename.encode())
+        s.set('exit_status', usage['exit_status'])
     if not os.path.exists('naca.gnu'):
         raise ValueError('naca456 failed to execute with the following error message:\n{}'.format(stdout))
 
     aerofoil = Aerofoil()
     with open('naca.gnu', 'r') as fd:
         aerofoil.load_from_gnu(fd)
+    aerofoil.name = name
+    aerofoil.resources = usage
     os.remove('naca.gnu')
     os.remove('naca.dbg')
     os.remove('naca.out')
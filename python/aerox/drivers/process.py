@@ -0,0 +1,138 @@
+"""
+Runs external executables and records their resource usage.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+
+def run(args, input = None, cwd = None):
+    """
+    Run executable to completion, recording resource usage from the kernel's child process accounting.
+
+    stdin, stdout and stderr are backed by temporary files rather than pipes so that a chatty solver cannot block on
+    a full pipe.
+    :param args: command as list of str.
+    :param input: bytes to send to stdin, or None.
+    :param cwd: working directory of process, or None to use the current working directory.
+    :return: tuple of (stdout as bytes, stderr as bytes, usage as dict). usage contains:
+             - command: command as str
+             - exit_status: exit status, negative if terminated by a signal
+             - wall_seconds: elapsed wall clock time
+             - user_seconds: user CPU time, None if unavailable on this platform
+             - system_seconds: system CPU time, None if unavailable on this platform
+             - peak_rss_bytes: peak resident set size, None if unavailable on this platform. On Linux this is never
+                               less than the resident size of the calling Python process at fork time
+    """
+    with tempfile.TemporaryFile() as stdin, tempfile.TemporaryFile() as stdout, tempfile.TemporaryFile() as stderr:
+        if input is not None:
+            stdin.write(input)
+            stdin.seek(0)
+        start = time.perf_counter()
+        process = subprocess.Popen(args, stdin = stdin, stdout = stdout, stderr = stderr, cwd = cwd)
+        if hasattr(os, 'wait4'):
+            _, status, rusage = os.wait4(process.pid, 0)
+            wall_seconds = time.perf_counter() - start
+            process.returncode = os.waitstatus_to_exitcode(status)
+            user_seconds = rusage.ru_utime
+            system_seconds = rusage.ru_stime
+            peak_rss_bytes = rusage.ru_maxrss * _MAXRSS_UNITS
+        else:
+            process.wait()
+            wall_seconds = time.perf_counter() - start
+            user_seconds = None
+            system_seconds = None
+            peak_rss_bytes = None
+
+        stdout.seek(0)
+        stderr.seek(0)
+        usage = {'command': ' '.join(args),
+                 'exit_status': process.returncode,
+                 'wall_seconds': wall_seconds,
+                 'user_seconds': user_seconds,
+                 'system_seconds': system_seconds,
+                 'peak_rss_bytes': peak_rss_bytes}
+        return stdout.read(), stderr.read(), usage
+
+
+def combine(usages):
+    """
+    Combine usage of processes run one after another for the same task, e.g. a steady solve followed by an unsteady
+    one.
+    :param usages: list of usage dicts as returned by run().
+    :return: usage dict as returned by run(), with times summed, the largest peak resident set size, the command and
+             exit status of the last process, plus attempts, the list of usages combined.
+    """
+    rss = [usage['peak_rss_bytes'] for usage in usages if usage['peak_rss_bytes'] is not None]
+
+    def total(key):
+        values = [usage[key] for usage in usages if usage[key] is not None]
+        return sum(values) if len(values) > 0 else None
+
+    return {'command': usages[-1]['command'],
+            'exit_status': usages[-1]['exit_status'],
+            'wall_seconds': total('wall_seconds'),
+            'user_seconds': total('user_seconds'),
+            'system_seconds': total('system_seconds'),
+            'peak_rss_bytes': max(rss) if len(rss) > 0 else None,
+            'attempts': list(usages)}
+
+
+def aggregate(usages, outlier_factor = 3.0):
+    """
+    Summarise resource usage over a sweep.
+    :param usages: list of usage dicts as returned by run(). None entries are ignored.
+    :param outlier_factor: runs whose wall time exceeds this multiple of the median wall time are reported as outliers.
+    :return: dict containing:
+             - runs: number of runs
+             - failures: number of runs with non-zero exit status
+             - wall_seconds, user_seconds, system_seconds: totals over all runs
+             - max_wall_seconds: longest run
+             - median_wall_seconds: median run
+             - peak_rss_bytes: largest peak resident set size of any run
+             - cpu_utilisation: (user + system) / wall, summed over runs. Values well below 1 for a serial solver
+                                suggest the process was waiting on I/O or swapping
+             - outliers: indices into usages of runs whose wall time exceeds outlier_factor x median
+    """
+    indices = [i for i in range(len(usages)) if usages[i] is not None]
+    if len(indices) == 0:
+        return {'runs': 0,
+                'failures': 0,
+                'wall_seconds': 0.0,
+                'user_seconds': 0.0,
+                'system_seconds': 0.0,
+                'max_wall_seconds': None,
+                'median_wall_seconds': None,
+                'peak_rss_bytes': None,
+                'cpu_utilisation': None,
+                'outliers': []}
+
+    def column(key):
+        return np.array([np.nan if usages[i][key] is None else usages[i][key] for i in indices], dtype = float)
+
+    wall = column('wall_seconds')
+    user = column('user_seconds')
+    system = column('system_seconds')
+    rss = column('peak_rss_bytes')
+    median = float(np.median(wall))
+    cpu = float(np.nansum(user) + np.nansum(system))
+    total_wall = float(np.sum(wall))
+    return {'runs': len(indices),
+            'failures': sum(1 for i in indices if usages[i]['exit_status'] != 0),
+            'wall_seconds': total_wall,
+            'user_seconds': float(np.nansum(user)),
+            'system_seconds': float(np.nansum(system)),
+            'max_wall_seconds': float(np.max(wall)),
+            'median_wall_seconds': median,
+            'peak_rss_bytes': None if np.all(np.isnan(rss)) else int(np.nanmax(rss)),
+            'cpu_utilisation': cpu / total_wall if total_wall > 0 else None,
+            'outliers': [indices[j] for j in np.flatnonzero(wall > outlier_factor * median)]}
+
+
+#  ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+_MAXRSS_UNITS = 1 if sys.platform == 'darwin' else 1024
@@ -0,0 +1,62 @@
+"""
+Discrete adjoint solve.
+
+After a case's direct solve is accepted, SU2_CFD_AD is run on the same mesh with the direct solution (restart_flow.dat)
+as its SOLUTION_FILENAME, so the flow is not solved again. The adjoint writes the sensitivity of the objective to
+normal displacements of the surface, Surface_Sensitivity, to surface_adjoint.csv. Use
+aerox.optimisation.cst.project_sensitivity() to turn it into a gradient with respect to the CST weights of the section.
+
+The adjoint is run only for cases whose steady solve is accepted, see aerox.drivers.su2.strategy: the discrete adjoint
+of the unsteady dual-time problem must be integrated back over every time step and is not supported.
+"""
+
+
+#  SU2 objective function names
+OBJECTIVES = ['DRAG', 'LIFT', 'MOMENT_Z', 'EFFICIENCY']
+
+
+def default_config():
+    """
+    - path: path to SU2_CFD_AD executable. If none, use SU2_CFD_AD i.e. assume executable is in PATH.
+    - objective: objective function, one of OBJECTIVES.
+    - iterations: maximum number of adjoint iterations.
+    - su2/*: overrides of the SU2 config for the adjoint solve only.
+    :return: default config as dict.
+    """
+    return {'path': None,
+            'objective': 'DRAG',
+            'iterations': 3000,
+            'su2': {}}
+
+
+def adjoint_config(su2_config, config):
+    """
+    :param su2_config: aerox.drivers.su2.config.Config object of the accepted steady direct solve. Not modified.
+    :param config: adjoint config, see default_config() for details.
+    :return: new Config object for the adjoint solve of the same case.
+    """
+    if config['objective'] not in OBJECTIVES:
+        raise ValueError('Expected objective in {}, got {}'.format(OBJECTIVES, config['objective']))
+    adjoint = su2_config.copy()
+    adjoint['MATH_PROBLEM'] = 'DISCRETE_ADJOINT'
+    adjoint['OBJECTIVE_FUNCTION'] = config['objective']
+    adjoint['SOLUTION_FILENAME'] = restart_file(su2_config)
+    adjoint['RESTART_SOL'] = 'NO'
+    adjoint['ITER'] = str(config['iterations'])
+    adjoint['OUTPUT_FILES'] = '(SURFACE_CSV)'
+    adjoint['SURFACE_ADJ_FILENAME'] = 'surface_adjoint'
+    adjoint['CONV_FIELD'] = 'RMS_ADJ_PRESSURE'
+    adjoint['SCREEN_OUTPUT'] = '(INNER_ITER, RMS_RES)'
+    adjoint['HISTORY_OUTPUT'] = '(ITER, RMS_RES)'
+    adjoint.update(config['su2'])
+    return adjoint
+
+
+def restart_file(su2_config):
+    """
+    :param su2_config: aerox.drivers.su2.config.Config object of the direct solve.
+    :return: path of the direct solution written by SU2_CFD.
+    """
+    if 'RESTART_FILENAME' in su2_config:
+        return su2_config['RESTART_FILENAME'].strip()
+    return 'restart_flow.dat'
@@ -6,6 +6,7 @@ class Config:
     Representation of SU2 config
     """
     def __init__(self):
+        self._config = {}
         self._base_config()
 
     def __getitem__(self, key):
@@ -14,9 +15,20 @@ class Config:
     def __setitem__(self, key, value):
         self._config[ key ] = value
 
+    def __delitem__(self, key):
+        del self._config[key]
+
     def __contains__(self, key):
         return key in self._config
 
+    def copy(self):
+        """
+        :return: new Config object with the same options.
+        """
+        out = Config()
+        out._config = dict(self._config)
+        return out
+
     def keys(self):
         return self._config.keys()
 
@@ -125,5 +137,3 @@ OUTPUT_FILES=(RESTART)
         buffer.write(config_string)
         buffer.seek(0)
         self.read(buffer)
-
-    _config = {}
@@ -1,28 +1,66 @@
 import numpy as np
 import os
 import shlex
-import subprocess
 import sys
 
+from aerox.drivers import process
+from aerox.drivers.su2 import adjoint
+from aerox.drivers.su2 import manifest
+from aerox.drivers.su2 import storage
+from aerox.drivers.su2 import strategy
 from aerox.drivers.su2.config import Config
+from aerox.polar.polar import Polar
+from aerox.results.archive import Archive
+from aerox.results.surface import read_su2_surface
+from aerox.sweep import adaptive
+from aerox.tracing.tracing import span
+
+
+#  SU2 config file written in the directory SU2 runs in
+CONFIG_FILE = 'config.cfg'
 
 
 def default_config():
     """
     - path: path to SU2_CFD executable. If none, use SU2_CFD i.e. assume executable is in PATH
+    - working_directory: directory SU2 runs in and case artefacts are kept in. Relative paths in the SU2 config, e.g.
+                         MESH_FILENAME, are relative to it. The working directory of this process is not changed.
     - alphas: list of alphas to evaluate
+    - adaptive: None to evaluate alphas, or adaptive sweep config to choose alphas adaptively instead. See
+                aerox.sweep.adaptive.default_config() for details.
     - airspeed: airspeed to calculate at, m/s
     - window_iterations: average this many iterations from the end of the history output to calculate aerodynamic
                          moments
     - su2/*: override SU2 config
+    - steady: steady-first strategy config, or None (the default) to always run the unsteady config. If set, each case
+              is first solved steady and escalated to the unsteady config only if the steady solve fails, its residuals
+              stall or the coefficients oscillate. See aerox.drivers.su2.strategy.default_config() for details.
+    - surface: if True, read surface distributions (x, y, cp, cf) of each case from SU2's surface CSV output
+    - adjoint: adjoint config, or None. If set, the discrete adjoint is run after each accepted steady solve, so steady
+               must be set too, and the surface sensitivity is added to the case's surface distributions. See
+               aerox.drivers.su2.adjoint.default_config() for details.
+    - storage: I/O policy config: scratch directory, write frequencies and artefacts kept. See
+               aerox.drivers.su2.storage.default_config() for details.
+    - archive: path of compressed results archive, or None. If set, each case's history, surface output and
+               coefficients are moved into the archive as the case completes. See aerox.results.archive for details.
+    - manifest: path of sweep manifest, or None. Completed cases are recorded in the manifest as they finish and are
+                skipped when the sweep is rerun with the same inputs. See aerox.drivers.su2.manifest for details.
     :return: default config as dict
     """
     config = {}
     config['path'] = None
+    config['working_directory'] = '.'
     config['alphas'] = []
+    config['adaptive'] = None
     config['airspeed'] = 50.0
     config['window_iterations'] = 1
     config['su2'] = {}
+    config['steady'] = None
+    config['surface'] = False
+    config['adjoint'] = None
+    config['storage'] = storage.default_config()
+    config['archive'] = None
+    config['manifest'] = None
     return config
 
 
@@ -31,43 +69,396 @@ def run(config, verbose = False):
     Run SU2
     :param config: run config, see default_config() for details.
     :param verbose: if True, produce verbose output.
-    :return: list of dicts showing lift, drag and pitching_moment coefficients at each configured alpha.
+    :return: aerox.polar.polar.Polar with one point per configured alpha. Polar.resources holds the resource usage of
+             each SU2 process, see aerox.drivers.process.run() for details. Use aerox.drivers.process.aggregate() to
+             summarise a sweep. If surface is set, Polar.surfaces holds the surface distributions of each case. If
+             adjoint is set, the surface distributions of each case with an adjoint solution hold sensitivity, the
+             derivative of the objective with respect to normal displacement of each surface node.
     """
-    command = 'SU2_CFD'
-    if config['path'] is not None:
-        command = config['path']
+    if config.get('adaptive') is not None:
+        return adaptive.sweep(lambda alphas: run(dict(config, alphas = alphas, adaptive = None), verbose),
+                              config['adaptive'])
 
-    config_file = 'config.cfg'
+    command = _command(config['path'], 'SU2_CFD')
+    directory = config['working_directory']
     coefficients = []
-    for alpha in config['alphas']:
-        su2_config = Config()
-        su2_config.update(config['su2'])
-        su2_config['INC_VELOCITY_INIT'] = str(tuple([float(config['airspeed']) * np.cos(alpha * np.pi / 180.0),
-                                                     float(config['airspeed']) * np.sin(alpha * np.pi / 180.0),
-                                                     0.0]))
-        with open(config_file, 'w') as fd:
-            su2_config.write(fd)
-        result = subprocess.run( shlex.split('{} {}'.format(command, config_file)),
-                                 stdin = subprocess.PIPE,
-                                 stdout = subprocess.PIPE,
-                                 stderr = subprocess.PIPE)
-        if not os.path.exists('history.dat') or result.returncode != 0:
-            raise ValueError('SU2_CFD failed with\n{}\n{}'.format(result.stdout, result.stderr))
-
-        with open('history.dat', 'r') as fd:
-            coefficients.append(_load_history(fd, config))
-
-        os.rename('history.dat', 'history_{}.dat'.format(alpha))
-
-        if verbose:
-            sys.stderr.write('{},{},{},{}\n'.format(alpha,
-                                                    coefficients[-1]['lift'],
-                                                    coefficients[-1]['drag'],
-                                                    coefficients[-1]['pitching_moment']))
-            sys.stderr.flush()
+    sweep_manifest = None
+    key = None
+    tracked = config.get('manifest') is not None or config.get('archive') is not None
+    if config.get('manifest') is not None:
+        sweep_manifest = manifest.Manifest(config['manifest'])
+    if tracked:
+        mesh_digest = manifest.file_digest(os.path.join(directory, _case_config(0.0, config)['MESH_FILENAME'].strip()))
+    with span('su2.sweep', alphas = len(config['alphas']), airspeed = config['airspeed']):
+        for alpha in config['alphas']:
+            with span('su2.case', alpha = alpha) as s:
+                su2_config = _case_config(alpha, config)
+                entry = None
+                if tracked:
+                    key = manifest.case_hash(su2_config, config, mesh_digest)
+                if sweep_manifest is not None:
+                    entry = sweep_manifest.completed(key)
+                if entry is None:
+                    entry = _archived_case(alpha, key, config)
+                    if entry is not None and sweep_manifest is not None:
+                        sweep_manifest.record(key, alpha, dict(entry['coefficients'], resources = entry['resources'],
+                                                               solver = entry.get('solver')), [config['archive']])
+                s.set('resumed', entry is not None)
+                if entry is not None:
+                    coefficients.append(dict(entry['coefficients'],
+                                             resources = entry['resources'],
+                                             surface = _load_surface(alpha, key, config)))
+                else:
+                    policy = config.get('storage') or storage.default_config()
+                    case_config = storage.prepare(su2_config, policy, directory)
+                    with storage.case_directory(policy, directory) as run_directory:
+                        coefficients.append(_run_case(command, run_directory, case_config, alpha, config))
+                        coefficients[-1]['surface'], artefacts = _collect_case(alpha, coefficients[-1], run_directory,
+                                                                               config)
+                        artefacts = storage.retrieve(artefacts, run_directory, directory, policy)
+                    artefacts = _archive_case(alpha, key, coefficients[-1], artefacts, config)
+                    if sweep_manifest is not None:
+                        sweep_manifest.record(key, alpha, coefficients[-1], artefacts)
+
+            if verbose:
+                sys.stderr.write('{},{},{},{}\n'.format(alpha,
+                                                        coefficients[-1]['lift'],
+                                                        coefficients[-1]['drag'],
+                                                        coefficients[-1]['pitching_moment']))
+                sys.stderr.flush()
+    reynolds_number, mach = _flow_conditions(config)
+    return Polar(config['alphas'],
+                 [c['lift'] for c in coefficients],
+                 [c['drag'] for c in coefficients],
+                 [c['pitching_moment'] for c in coefficients],
+                 reynolds_number = reynolds_number,
+                 mach = mach,
+                 resources = [c['resources'] for c in coefficients],
+                 surfaces = [c['surface'] for c in coefficients],
+                 fidelity = 'su2')
+
+
+def _case_config(alpha, config):
+    """
+    :param alpha: angle of attack, degrees.
+    :param config: run config, see default_config() for details.
+    :return: SU2 Config object for a single alpha.
+    """
+    su2_config = Config()
+    su2_config.update(config['su2'])
+    su2_config['INC_VELOCITY_INIT'] = str(tuple([float(config['airspeed'] * np.cos(alpha * np.pi / 180.0)),
+                                                 float(config['airspeed'] * np.sin(alpha * np.pi / 180.0)),
+                                                 0.0]))
+    if config.get('surface'):
+        outputs = su2_config['OUTPUT_FILES'].strip().strip('()')
+        if 'SURFACE_CSV' not in outputs:
+            su2_config['OUTPUT_FILES'] = '({}, SURFACE_CSV)'.format(outputs)
+    return su2_config
+
+
+def _command(path, default):
+    """
+    :param path: path to executable, possibly followed by arguments, or None.
+    :param default: executable to use if path is None.
+    :return: command line, with a relative executable path made absolute as SU2 runs in another directory.
+    """
+    if path is None:
+        return default
+    args = shlex.split(path)
+    if os.sep in args[0] and not os.path.isabs(args[0]):
+        args[0] = os.path.abspath(args[0])
+    return ' '.join(shlex.quote(arg) for arg in args)
+
+
+def _history_file(alpha):
+    """
+    :param alpha: angle of attack, degrees.
+    :return: path history of case at alpha is kept under.
+    """
+    return 'history_{}.dat'.format(alpha)
+
+
+def _surface_file(alpha):
+    """
+    :param alpha: angle of attack, degrees.
+    :return: path surface output of case at alpha is kept under.
+    """
+    return 'surface_flow_{}.csv'.format(alpha)
+
+
+def _adjoint_file(alpha):
+    """
+    :param alpha: angle of attack, degrees.
+    :return: path adjoint surface output of case at alpha is kept under.
+    """
+    return 'surface_adjoint_{}.csv'.format(alpha)
+
+
+def _case_name(alpha, key):
+    """
+    :param alpha: angle of attack, degrees.
+    :param key: case hash, see aerox.drivers.su2.manifest.case_hash().
+    :return: name of case at alpha in results archive. Cases with different inputs at the same alpha have different
+             names, so an archive can be reused after the inputs change.
+    """
+    return 'alpha_{}_{}'.format(alpha, key[:16])
+
+
+def _archived_case(alpha, key, config):
+    """
+    :param alpha: angle of attack, degrees.
+    :param key: case hash, see aerox.drivers.su2.manifest.case_hash().
+    :param config: run config, see default_config() for details.
+    :return: metadata of the case if the archive already holds it, e.g. from a run whose manifest was lost, otherwise
+             None.
+    """
+    if config.get('archive') is None or not os.path.exists(config['archive']):
+        return None
+    with Archive(config['archive']) as archive:
+        if _case_name(alpha, key) not in archive.cases():
+            return None
+        return archive.read_metadata(_case_name(alpha, key))
+
+
+def _restart_file(alpha):
+    """
+    :param alpha: angle of attack, degrees.
+    :return: path final direct solution of case at alpha is kept under.
+    """
+    return 'restart_flow_{}.dat'.format(alpha)
+
+
+def _collect_case(alpha, coefficients, directory, config):
+    """
+    Gather outputs of a completed case in the directory it ran in and read its surface distributions.
+    :param alpha: angle of attack, degrees.
+    :param coefficients: coefficients of case, see _run_case().
+    :param directory: directory the case ran in.
+    :param config: run config, see default_config() for details.
+    :return: tuple of (surface distributions as dict or None, dict mapping artefact name to file name in directory, see
+             aerox.drivers.su2.storage.ARTEFACTS).
+    """
+    artefacts = {'history': _history_file(alpha)}
+    if config.get('surface'):
+        if not os.path.exists(os.path.join(directory, 'surface_flow.csv')):
+            raise ValueError('SU2_CFD did not write surface_flow.csv')
+        os.rename(os.path.join(directory, 'surface_flow.csv'), os.path.join(directory, _surface_file(alpha)))
+        artefacts['surface'] = _surface_file(alpha)
+    if coefficients.get('adjoint'):
+        artefacts['adjoint'] = _adjoint_file(alpha)
+    if os.path.exists(os.path.join(directory, _restart_file(alpha))):
+        artefacts['restart'] = _restart_file(alpha)
+    with span('su2.load_surface'):
+        surface = _read_surfaces(alpha, directory, config)
+    return surface, artefacts
+
+
+def _archive_case(alpha, key, coefficients, artefacts, config):
+    """
+    Move retrieved artefacts of a case into the archive, if configured.
+    :param alpha: angle of attack, degrees.
+    :param key: case hash, see aerox.drivers.su2.manifest.case_hash(), or None if archive is not set.
+    :param coefficients: coefficients of case, see _run_case(), with surface distributions under surface.
+    :param artefacts: list of artefact paths, see aerox.drivers.su2.storage.retrieve().
+    :param config: run config, see default_config() for details.
+    :return: list of artefact paths, i.e. the archive if configured, otherwise artefacts.
+    """
+    surface = coefficients['surface']
+    if config.get('archive') is not None:
+        metadata = {'alpha': float(alpha),
+                    'case_hash': key,
+                    'coefficients': {k: float(coefficients[k]) for k in ('lift', 'drag', 'pitching_moment')},
+                    'resources': coefficients['resources'],
+                    'solver': coefficients.get('solver'),
+                    'escalation': coefficients.get('escalation'),
+                    'adjoint': coefficients.get('adjoint')}
+        with span('su2.archive'):
+            with Archive(config['archive'], 'a') as archive:
+                archive.write_case(_case_name(alpha, key),
+                                   surface,
+                                   metadata,
+                                   files = {os.path.basename(path): path for path in artefacts})
+        for path in artefacts:
+            os.remove(path)
+        artefacts = [config['archive']]
+    return artefacts
+
+
+def _load_surface(alpha, key, config):
+    """
+    Load surface distributions of a case completed in an earlier run.
+    :param alpha: angle of attack, degrees.
+    :param key: case hash, see aerox.drivers.su2.manifest.case_hash(), or None if neither manifest nor archive is set.
+    :param config: run config, see default_config() for details.
+    :return: surface distributions as dict, or None if neither surface nor adjoint is set.
+    """
+    if not config.get('surface') and config.get('adjoint') is None:
+        return None
+    if config.get('archive') is not None:
+        with Archive(config['archive']) as archive:
+            return archive.read_case(_case_name(alpha, key))[0]
+    return _read_surfaces(alpha, config['working_directory'], config)
+
+
+def _read_surfaces(alpha, directory, config):
+    """
+    Read the surface output of a case and the sensitivity from its adjoint surface output, if present.
+    :param alpha: angle of attack, degrees.
+    :param directory: directory holding the outputs.
+    :param config: run config, see default_config() for details.
+    :return: surface distributions as dict, or None if there is neither.
+    """
+    surface = None
+    if config.get('surface'):
+        with storage.open_artefact(os.path.join(directory, _surface_file(alpha))) as fd:
+            surface = read_su2_surface(fd)
+    if config.get('adjoint') is None:
+        return surface
+    adjoint_file = os.path.join(directory, _adjoint_file(alpha))
+    if not os.path.exists(adjoint_file) and not os.path.exists(adjoint_file + '.gz'):
+        return surface
+
+    with storage.open_artefact(adjoint_file) as fd:
+        sensitivity = read_su2_surface(fd, quantities = ('x', 'y', 'sensitivity'))
+    if 'sensitivity' not in sensitivity:
+        raise ValueError('No Surface_Sensitivity in {}'.format(_adjoint_file(alpha)))
+    if surface is None:
+        return sensitivity
+    #  both files list the nodes of the plotted markers in the same order
+    if len(surface['x']) != len(sensitivity['x']) or not np.allclose(surface['x'], sensitivity['x']):
+        raise ValueError('Nodes of {} do not match {}'.format(_adjoint_file(alpha), _surface_file(alpha)))
+    surface['sensitivity'] = sensitivity['sensitivity']
+    return surface
+
+
+def _run_case(command, directory, su2_config, alpha, config):
+    """
+    Run SU2 at a single alpha. If steady is set, the steady solve is tried first, see aerox.drivers.su2.strategy.
+    :param command: SU2_CFD executable.
+    :param directory: directory to run SU2 in.
+    :param su2_config: SU2 Config object for the case, see _case_config().
+    :param alpha: angle of attack, degrees.
+    :param config: run config, see default_config() for details.
+    :return: coefficients as dict, see _load_history() for details, plus:
+             - resources: SU2 process resource usage. If the case was escalated, the combined usage of both solves,
+                          see aerox.drivers.process.combine().
+             - solver: 'steady' or 'unsteady', the solve the coefficients come from.
+             - escalation: reason the steady solution was rejected, or None.
+             - adjoint: True if the adjoint was run, leaving its surface output in _adjoint_file(alpha).
+    """
+    usages = []
+    solver = 'unsteady'
+    escalation = None
+    if config.get('steady') is not None:
+        steady_config = strategy.steady_config(su2_config, config['steady'])
+        with span('su2.steady') as s:
+            usage, history = _solve(command, directory, steady_config, check = False)
+            usages.append(usage)
+            escalation = 'failed' if history is None else strategy.assess(history, config['steady'])
+            s.set('escalation', escalation)
+        if escalation is None:
+            solver = 'steady'
+
+    if solver == 'unsteady':
+        with span('su2.unsteady'):
+            usage, history = _solve(command, directory, su2_config)
+            usages.append(usage)
+    os.rename(os.path.join(directory, 'history.dat'), os.path.join(directory, _history_file(alpha)))
+
+    run_adjoint = config.get('adjoint') is not None and solver == 'steady'
+    if run_adjoint:
+        with span('su2.adjoint'):
+            usages.append(_solve_adjoint(directory, steady_config, alpha, config['adjoint']))
+
+    coefficients = _coefficients(history, config)
+    coefficients['resources'] = usages[0] if len(usages) == 1 else process.combine(usages)
+    coefficients['solver'] = solver
+    coefficients['escalation'] = escalation
+    coefficients['adjoint'] = run_adjoint
+
+    restart = os.path.join(directory, adjoint.restart_file(su2_config))
+    if os.path.exists(restart):
+        os.rename(restart, os.path.join(directory, _restart_file(alpha)))
     return coefficients
 
 
+def _solve(command, directory, su2_config, check = True):
+    """
+    Run SU2 once, leaving its history in history.dat.
+    :param command: SU2_CFD executable.
+    :param directory: directory to write SU2 config to and run SU2 in.
+    :param su2_config: SU2 Config object.
+    :param check: if True, raise ValueError if SU2 fails, i.e. exits with non-zero status or leaves no readable history.
+                  If False, return None history instead.
+    :return: tuple of (SU2 process resource usage, history as NumPy structured array, see _read_history()).
+    """
+    history_file = os.path.join(directory, 'history.dat')
+    if os.path.exists(history_file):
+        os.remove(history_file)  # left by an earlier solve, must not be mistaken for this one's
+    with span('su2.write_config'):
+        with open(os.path.join(directory, CONFIG_FILE), 'w') as fd:
+            su2_config.write(fd)
+    with span('su2.solve') as s:
+        stdout, stderr, usage = process.run(shlex.split('{} {}'.format(command, CONFIG_FILE)), cwd = directory)
+        s.set('exit_status', usage['exit_status'])
+        s.set('peak_rss_bytes', usage['peak_rss_bytes'])
+    try:
+        if not os.path.exists(history_file) or usage['exit_status'] != 0:
+            raise ValueError('SU2_CFD failed with\n{}\n{}'.format(stdout, stderr))
+        with span('su2.load_history'):
+            with open(history_file, 'r') as fd:
+                history = _read_history(fd)
+    except ValueError:
+        if check:
+            raise
+        return usage, None
+    return usage, history
+
+
+def _solve_adjoint(directory, su2_config, alpha, config):
+    """
+    Run SU2_CFD_AD from the direct solution of the case, leaving its surface output in _adjoint_file(alpha).
+    :param directory: directory the direct solve ran in, to write SU2 config to and run SU2_CFD_AD in.
+    :param su2_config: SU2 Config object of the accepted steady direct solve.
+    :param alpha: angle of attack, degrees.
+    :param config: adjoint config, see aerox.drivers.su2.adjoint.default_config() for details.
+    :return: SU2_CFD_AD process resource usage.
+    """
+    command = _command(config['path'], 'SU2_CFD_AD')
+    adjoint_config = adjoint.adjoint_config(su2_config, config)
+    if not os.path.exists(os.path.join(directory, adjoint_config['SOLUTION_FILENAME'].strip())):
+        raise ValueError('SU2_CFD did not write direct solution {}'.format(adjoint_config['SOLUTION_FILENAME']))
+    with open(os.path.join(directory, CONFIG_FILE), 'w') as fd:
+        adjoint_config.write(fd)
+    with span('su2.solve_adjoint') as s:
+        stdout, stderr, usage = process.run(shlex.split('{} {}'.format(command, CONFIG_FILE)), cwd = directory)
+        s.set('exit_status', usage['exit_status'])
+        s.set('peak_rss_bytes', usage['peak_rss_bytes'])
+    surface_file = os.path.join(directory, '{}.csv'.format(adjoint_config['SURFACE_ADJ_FILENAME'].strip()))
+    if not os.path.exists(surface_file) or usage['exit_status'] != 0:
+        raise ValueError('SU2_CFD_AD failed with\n{}\n{}'.format(stdout, stderr))
+    os.rename(surface_file, os.path.join(directory, _adjoint_file(alpha)))
+    if os.path.exists(os.path.join(directory, 'history.dat')):
+        #  adjoint history, not to be mistaken for the next direct solve's
+        os.remove(os.path.join(directory, 'history.dat'))
+    return usage
+
+
+def _flow_conditions(config):
+    """
+    :param config: run config, see default_config() for details.
+    :return: tuple of (Reynolds number, Mach number) based on reference length, airspeed and SU2 freestream settings.
+    """
+    su2_config = Config()
+    su2_config.update(config['su2'])
+    density = float(su2_config['INC_DENSITY_INIT'])
+    viscosity = float(su2_config['MU_CONSTANT'])
+    length = float(su2_config['REF_LENGTH'])
+    temperature = float(su2_config['FREESTREAM_TEMPERATURE'])
+    airspeed = float(config['airspeed'])
+    return density * airspeed * length / viscosity, airspeed / np.sqrt(1.4 * 287.058 * temperature)
+
+
 def _load_history(file, config):
     """
     :param file: file-like object
@@ -77,13 +468,22 @@ def _load_history(file, config):
              - lift: lift coefficient
              - pitching_moment: moment coefficient
     """
+    return _coefficients(_read_history(file), config)
+
+
+def _read_history(file):
+    """
+    :param file: file-like object holding SU2 history in TECPLOT format.
+    :return: history as NumPy structured array with one field per column, excluding iteration 0.
+    """
     #  skip prefix
     file.readline()
     header = file.readline()
-    columns = header.split(',')
+    columns = header.split('=', 1)[-1].split(',')
     for i in range(len(columns)):
         columns[i] = columns[i].replace(' ', '')
         columns[i] = columns[i].replace('"', '')
+        columns[i] = columns[i].strip()
     dtype = []
     for column in columns:
         dtype.append((column, 'f'))
@@ -92,8 +492,16 @@ def _load_history(file, config):
     for line in file:
         data.append(tuple(line.split(',')))
     data = np.array(data, dtype = dtype)
-    data = data[np.where(data['Inner_Iter'] > 0)]
-    data = data[-config['window_iterations']:]
+    return data[np.where(data['Inner_Iter'] > 0)]
+
+
+def _coefficients(history, config):
+    """
+    :param history: history as NumPy structured array, see _read_history().
+    :param config: config as dict. See default_config for details.
+    :return: coefficients averaged over the final window_iterations rows, see _load_history() for details.
+    """
+    data = history[-config['window_iterations']:]
     return {'drag': np.mean(data['CD']),
             'lift': np.mean(data['CL']),
             'pitching_moment': -np.mean(data['CMz'])}  # negate pitching moment due to sign conventions
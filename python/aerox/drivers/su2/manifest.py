@@ -0,0 +1,104 @@
+"""
+Sweep manifests: a checkpoint of completed SU2 cases, so an interrupted sweep can be resumed.
+
+A manifest is a JSON file mapping a hash of each case's inputs (SU2 config, mesh and post-processing settings) to the
+case's coefficients and artefact paths. It is rewritten atomically as each case completes, so it is never left
+half-written by a crash.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+
+class Manifest:
+    """
+    Record of completed cases, backed by a JSON file.
+    """
+    def __init__(self, path):
+        """
+        :param path: path of manifest file. Loaded if it exists.
+        """
+        self.path = path
+        self.cases = {}
+        if os.path.exists(path):
+            with open(path, 'r') as fd:
+                self.cases = json.load(fd)['cases']
+
+    def completed(self, key):
+        """
+        :param key: case hash, see case_hash().
+        :return: manifest entry as dict if the case completed and all its artefacts still exist, otherwise None.
+        """
+        entry = self.cases.get(key)
+        if entry is None:
+            return None
+        for path in entry['artefacts']:
+            if not os.path.exists(path):
+                return None
+        return entry
+
+    def record(self, key, alpha, coefficients, artefacts):
+        """
+        Record completed case and write manifest.
+        :param key: case hash, see case_hash().
+        :param alpha: angle of attack, degrees.
+        :param coefficients: coefficients as dict, see aerox.drivers.su2.driver._load_history(), optionally with
+                             resources. Other keys are ignored.
+        :param artefacts: list of paths of files produced by the case.
+        :return: None
+        """
+        self.cases[key] = {'alpha': float(alpha),
+                           'coefficients': {k: float(coefficients[k]) for k in ('lift', 'drag', 'pitching_moment')},
+                           'resources': coefficients.get('resources'),
+                           'solver': coefficients.get('solver'),
+                           'artefacts': list(artefacts),
+                           'completed': time.strftime('%Y-%m-%dT%H:%M:%S%z')}
+        self.write()
+
+    def write(self):
+        """
+        Write manifest atomically.
+        :return: None
+        """
+        temporary = '{}.tmp{}'.format(self.path, os.getpid())
+        with open(temporary, 'w') as fd:
+            json.dump({'cases': self.cases}, fd, indent = 1)
+            fd.flush()
+            os.fsync(fd.fileno())
+        os.replace(temporary, self.path)
+
+
+def case_hash(su2_config, config, mesh_digest):
+    """
+    :param su2_config: aerox.drivers.su2.config.Config object for the case.
+    :param config: run config, see aerox.drivers.su2.driver.default_config() for details.
+    :param mesh_digest: digest of mesh file, see file_digest().
+    :return: hash identifying the case's inputs, as hex str.
+    """
+    h = hashlib.sha1()
+    for key in sorted(su2_config.keys()):
+        h.update('{}={}\n'.format(key, str(su2_config[key]).strip()).encode())
+    h.update('window_iterations={}\n'.format(config['window_iterations']).encode())
+    if config.get('steady') is not None:
+        h.update('steady={}\n'.format(json.dumps(config['steady'], sort_keys = True)).encode())
+    if config.get('adjoint') is not None:
+        h.update('adjoint={}\n'.format(json.dumps(config['adjoint'], sort_keys = True)).encode())
+    h.update('mesh={}\n'.format(mesh_digest).encode())
+    return h.hexdigest()
+
+
+def file_digest(path, block_size = 1 << 20):
+    """
+    :param path: path of file.
+    :param block_size: bytes read at a time.
+    :return: sha1 digest of file contents as hex str, or None if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return None
+    h = hashlib.sha1()
+    with open(path, 'rb') as fd:
+        for block in iter(lambda: fd.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
@@ -0,0 +1,136 @@
+"""
+I/O policy of SU2 cases.
+
+The base config writes the solution and convergence history far more often than post-processing reads them, and the
+driver's working directory is usually on a shared network filesystem. Parallel sweeps then spend most of their time
+waiting on the file server. The policy
+- throttles SU2's solution and history write frequencies. Only the final solution, and history at the frequency the
+  steady-first strategy and coefficient averaging read it, are written.
+- optionally runs each case in its own directory under node-local scratch, e.g. /dev/shm or the batch system's
+  $TMPDIR. The mesh is read in place.
+- copies back only the selected artefacts to the driver's working directory, optionally gzip compressed, and deletes
+  the rest.
+
+Artefacts:
+- 'history': convergence history, history_<alpha>.dat.
+- 'surface': surface output, surface_flow_<alpha>.csv, if the driver's surface is set.
+- 'adjoint': adjoint surface output, surface_adjoint_<alpha>.csv, if the driver's adjoint is set.
+- 'restart': final direct solution, restart_flow_<alpha>.dat.
+Cases resumed from a manifest without an archive read their surface and adjoint artefacts back, so keep them if
+surface or adjoint is set.
+"""
+
+import contextlib
+import gzip
+import os
+import shutil
+import tempfile
+
+from aerox.tracing.tracing import span
+
+
+ARTEFACTS = ['history', 'surface', 'adjoint', 'restart']
+
+#  written only at the end of the run when solution_frequency is None
+FINAL_ONLY = 1000000
+
+
+def default_config():
+    """
+    - scratch: directory each case runs in a new temporary directory under, e.g. '/dev/shm', or None to run in the
+               driver's working directory.
+    - keep: artefacts copied back to the driver's working directory, see ARTEFACTS.
+    - compress: if True, artefacts are copied back gzip compressed, with a .gz suffix.
+    - solution_frequency: iterations between solution writes, or None to write the solution only at the end.
+    - history_frequency: inner iterations between history rows. The steady-first strategy assesses convergence over
+                         windows of hundreds of iterations, so a row every few tens of iterations is enough.
+    :return: default config as dict.
+    """
+    return {'scratch': None,
+            'keep': ['history', 'surface', 'adjoint'],
+            'compress': False,
+            'solution_frequency': None,
+            'history_frequency': 50}
+
+
+def prepare(su2_config, config, working_directory = '.'):
+    """
+    :param su2_config: aerox.drivers.su2.config.Config object of the case. Not modified.
+    :param config: I/O policy config, see default_config() for details.
+    :param working_directory: driver's working directory, which a relative mesh path is relative to.
+    :return: new Config object with throttled write frequencies and, if scratch is set, an absolute mesh path.
+    """
+    for artefact in config['keep']:
+        if artefact not in ARTEFACTS:
+            raise ValueError('Expected artefacts in {}, got {}'.format(ARTEFACTS, artefact))
+    out = su2_config.copy()
+    solution = FINAL_ONLY if config['solution_frequency'] is None else int(config['solution_frequency'])
+    for key in ('WRT_SOL_FREQ', 'WRT_SOL_FREQ_DUALTIME'):
+        if key in out:
+            out[key] = str(solution)
+    for key in ('WRT_CON_FREQ', 'HISTORY_WRT_FREQ_INNER'):
+        if key in out:
+            out[key] = str(int(config['history_frequency']))
+    if config['scratch'] is not None:
+        out['MESH_FILENAME'] = os.path.abspath(os.path.join(working_directory, out['MESH_FILENAME'].strip()))
+    return out
+
+
+@contextlib.contextmanager
+def case_directory(config, working_directory = '.'):
+    """
+    Provide the directory a case runs in: a new directory under scratch, if set, deleted on exit, otherwise the
+    driver's working directory. The working directory of this process is not changed.
+    :param config: I/O policy config, see default_config() for details.
+    :param working_directory: driver's working directory.
+    :return: context manager yielding the directory to run the case in.
+    """
+    if config['scratch'] is None:
+        yield working_directory
+        return
+    os.makedirs(config['scratch'], exist_ok = True)
+    directory = tempfile.mkdtemp(prefix = 'aerox_su2_', dir = config['scratch'])
+    try:
+        yield directory
+    finally:
+        shutil.rmtree(directory, ignore_errors = True)
+
+
+def retrieve(files, source, destination, config):
+    """
+    Copy back selected artefacts of a case from the directory it ran in and delete the others.
+    :param files: dict mapping artefact name to file name in source, see ARTEFACTS.
+    :param source: directory the case ran in, see case_directory().
+    :param destination: driver's working directory artefacts are copied back to.
+    :param config: I/O policy config, see default_config() for details.
+    :return: list of paths of retrieved artefacts, i.e. under destination.
+    """
+    out = []
+    with span('su2.retrieve') as s:
+        size = 0
+        for name, file_name in files.items():
+            path = os.path.join(source, file_name)
+            if name not in config['keep']:
+                os.remove(path)
+                continue
+            target = os.path.join(destination, file_name + '.gz' if config['compress'] else file_name)
+            if config['compress']:
+                with open(path, 'rb') as fd_in, gzip.open(target, 'wb') as fd:
+                    shutil.copyfileobj(fd_in, fd)
+                os.remove(path)
+            elif os.path.abspath(path) != os.path.abspath(target):
+                shutil.move(path, target)
+            size += os.path.getsize(target)
+            out.append(target)
+        s.set('bytes', size)
+    return out
+
+
+def open_artefact(path):
+    """
+    :param path: path of artefact as written by SU2, i.e. without a .gz suffix.
+    :return: file-like object reading the artefact as text, from path or its gzip compressed copy.
+    """
+    if not os.path.exists(path) and os.path.exists(path + '.gz'):
+        return gzip.open(path + '.gz', 'rt')
+    return open(path, 'r')
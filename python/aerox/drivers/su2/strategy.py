@@ -0,0 +1,110 @@
+"""
+Steady-first solve strategy.
+
+Each case is first solved as a steady RANS problem, which costs a few thousand pseudo-time iterations. The solution is
+accepted if the residuals drop far enough and the coefficients settle; otherwise the case is escalated to the unsteady
+dual-time configuration, which costs TIME_ITER x INNER_ITER iterations. Attached flow is steady, so at most angles of
+attack only the steady solve runs. The strategy is opt-in: set the SU2 driver's steady config to enable it.
+
+Solutions whose residuals drop by residual_drop are accepted without further checks, as a lift coefficient still
+creeping towards its converged value is not an oscillation.
+
+Escalation reasons:
+- 'stalled': residuals stopped falling over the last stall_window iterations before reaching residual_drop.
+- 'oscillating': lift coefficient, less its linear trend, varies by more than oscillation_tolerance over the last
+  oscillation_window iterations.
+- 'not_converged': iteration limit reached without stalling or oscillating, but also without reaching residual_drop.
+- 'failed': the steady solve diverged or crashed, i.e. SU2 exited with non-zero status or left no readable history.
+  Assigned by aerox.drivers.su2.driver, not by assess().
+"""
+
+import numpy as np
+
+
+#  options used only by time-domain simulations, removed from the steady config
+UNSTEADY_OPTIONS = ['TIME_MARCHING',
+                    'TIME_STEP',
+                    'TIME_ITER',
+                    'INNER_ITER',
+                    'WINDOW_CAUCHY_CRIT',
+                    'CONV_WINDOW_FIELD',
+                    'CONV_WINDOW_STARTITER',
+                    'CONV_WINDOW_CAUCHY_EPS',
+                    'CONV_WINDOW_CAUCHY_ELEMS',
+                    'WINDOW_START_ITER',
+                    'WINDOW_FUNCTION',
+                    'WRT_SOL_FREQ_DUALTIME',
+                    'WRT_CON_FREQ_DUALTIME']
+
+
+def default_config():
+    """
+    - iterations: maximum number of steady iterations.
+    - residual_drop: orders of magnitude the first RMS residual must drop by for the steady solution to be accepted.
+    - stall_window: number of final iterations over which residual stall is assessed.
+    - stall_drop: residuals that drop less than this many orders of magnitude over stall_window have stalled.
+    - oscillation_window: number of final iterations over which oscillation of the lift coefficient is assessed.
+    - oscillation_tolerance: maximum peak to peak variation of the detrended lift coefficient over oscillation_window,
+                             relative to max(|mean lift coefficient|, 0.1).
+    - su2/*: overrides of the SU2 config for the steady solve only, e.g. a larger CFL_NUMBER.
+    :return: default config as dict.
+    """
+    return {'iterations': 3000,
+            'residual_drop': 3.0,
+            'stall_window': 500,
+            'stall_drop': 0.1,
+            'oscillation_window': 500,
+            'oscillation_tolerance': 1e-3,
+            'su2': {}}
+
+
+def steady_config(su2_config, config):
+    """
+    :param su2_config: aerox.drivers.su2.config.Config object of the unsteady case. Not modified.
+    :param config: strategy config, see default_config() for details.
+    :return: new Config object for the steady solve of the same case.
+    """
+    steady = su2_config.copy()
+    for key in UNSTEADY_OPTIONS:
+        if key in steady:
+            del steady[key]
+    steady['TIME_DOMAIN'] = 'NO'
+    steady['ITER'] = str(config['iterations'])
+    steady['SCREEN_OUTPUT'] = '(INNER_ITER, RMS_RES, AERO_COEFF)'
+    steady['HISTORY_OUTPUT'] = '(ITER, RMS_RES, AERO_COEFF)'
+    steady.update(config['su2'])
+    return steady
+
+
+def assess(history, config):
+    """
+    Decide whether a steady solution is acceptable.
+    :param history: history as NumPy structured array, see aerox.drivers.su2.driver._read_history().
+    :param config: strategy config, see default_config() for details.
+    :return: None if the steady solution is acceptable, otherwise the escalation reason, see module documentation.
+    """
+    iterations = history['Inner_Iter']
+    if len(iterations) < 2:
+        return 'not_converged'
+    last = iterations[-1]
+
+    residuals = [name for name in history.dtype.names if name.startswith('rms[')]
+    if len(residuals) == 0:
+        raise ValueError('Expected RMS residuals in SU2 history, got columns {}'.format(history.dtype.names))
+    residual = history[residuals[0]]
+    if float(np.max(residual) - residual[-1]) >= config['residual_drop']:
+        return None
+
+    recent = iterations >= last - config['oscillation_window']
+    lift = history['CL'][recent]
+    scale = max(abs(float(np.mean(lift))), 0.1)
+    if len(lift) > 2:
+        x = iterations[recent].astype(float)
+        lift = lift - np.polyval(np.polyfit(x, lift, 1), x)
+    if np.ptp(lift) > config['oscillation_tolerance'] * scale:
+        return 'oscillating'
+
+    window = residual[iterations >= last - config['stall_window']]
+    if float(np.max(window) - window[-1]) < config['stall_drop']:
+        return 'stalled'
+    return 'not_converged'
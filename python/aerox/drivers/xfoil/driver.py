@@ -1,16 +1,24 @@
 import numpy as np
-import xfoil
+
+from aerox.polar.polar import Polar
+from aerox.sweep import adaptive
+from aerox.tracing.tracing import span
 
 
 def default_config():
     """
     - alphas: list of alphas to evaluate
+    - adaptive: None to evaluate alphas, or adaptive sweep config to choose alphas adaptively instead. See
+                aerox.sweep.adaptive.default_config() for details.
+    - surface: if True, keep the pressure coefficient distribution of each converged point
     - xfoil/reynolds_number: Reynolds number
     - xfoil/mach: freestream Mach number
     :return: default config as dict
     """
     config = {}
     config['alphas'] = []
+    config['adaptive'] = None
+    config['surface'] = False
     config['xfoil'] = {'reynolds_number': '1e6',
                        'mach': 0.0 }
     return config
@@ -21,25 +29,43 @@ def run(config, aerofoil):
     Run xfoil analysis.
     :param config: config as dict, see default_config() for details.
     :param aerofoil: aerox.aerofoil.aerofoil.Aerofoil object.
-    :return: list of length equal to the number of alphas to evaluate. Entries are either None (analysis failed to
-             converge) or dict with the following keys:
-             - lift: lift coefficient
-             - drag: drag coefficing
-             - pitching_moment: quarter-chord pitching moment coefficient
+    :return: aerox.polar.polar.Polar with one point per alpha to evaluate. Points where the analysis failed to converge
+             are NaN and masked out by Polar.converged. If surface is set, Polar.surfaces holds dicts with x and cp
+             arrays for converged points.
     """
-    xf = xfoil.XFoil()
-    xf.airfoil = aerofoil.to_xfoil_airfoil()
-    xf.Re = float(config['xfoil']['reynolds_number'])
-    xf.M = config['xfoil']['mach']
-    xf.max_iter = 100
-    r = []
-    for alpha in config['alphas']:
-        xf.reset_bls()
-        cl, cd, cm, cp = xf.a(alpha)
-        if np.isnan(cl):
-            r.append(None)
-        else:
-            r.append({'lift': cl,
-                      'drag': cd,
-                      'pitching_moment': cm})
-    return r
+    if config.get('adaptive') is not None:
+        return adaptive.sweep(lambda alphas: run(dict(config, alphas = alphas, adaptive = None), aerofoil),
+                              config['adaptive'])
+
+    import xfoil  # imported on use so that importing this module does not load the xfoil library
+
+    with span('xfoil.sweep',
+              aerofoil = aerofoil.name,
+              reynolds_number = config['xfoil']['reynolds_number'],
+              mach = config['xfoil']['mach'],
+              alphas = len(config['alphas'])):
+        xf = xfoil.XFoil()
+        xf.airfoil = aerofoil.to_xfoil_airfoil()
+        xf.Re = float(config['xfoil']['reynolds_number'])
+        xf.M = config['xfoil']['mach']
+        xf.max_iter = 100
+        n = len(config['alphas'])
+        coefficients = np.full((3, n), np.nan)
+        surfaces = [None] * n
+        for i, alpha in enumerate(config['alphas']):
+            with span('xfoil.alpha', alpha = alpha) as s:
+                xf.reset_bls()
+                cl, cd, cm, cp = xf.a(alpha)
+                s.set('converged', not np.isnan(cl))
+            coefficients[:, i] = (cl, cd, cm)
+            if config.get('surface') and not np.isnan(cl):
+                x, cp = xf.get_cp_distribution()
+                surfaces[i] = {'x': x, 'cp': cp}
+    return Polar(config['alphas'],
+                 coefficients[0],
+                 coefficients[1],
+                 coefficients[2],
+                 reynolds_number = float(config['xfoil']['reynolds_number']),
+                 mach = config['xfoil']['mach'],
+                 surfaces = surfaces,
+                 fidelity = 'xfoil')
@@ -0,0 +1,158 @@
+"""
+Class/Shape function Transformation (CST) aerofoil parameterisation.
+
+Each surface is y(x) = C(x) S(x) + x dz, where C(x) = x^N1 (1 - x)^N2 is the class function (N1 = 0.5, N2 = 1 for a
+round nosed aerofoil with a sharp trailing edge), S(x) is a weighted sum of Bernstein polynomials and dz is the
+trailing edge offset. All functions operate on whole populations: weights have shape (population, order + 1).
+"""
+
+import math
+
+import numpy as np
+
+from aerox.aerofoil.aerofoil import Aerofoil
+
+
+def default_config():
+    """
+    - order: order of Bernstein polynomials. Each surface has order + 1 weights
+    - points: number of points on each surface, cosine spaced
+    - class/n1, class/n2: class function exponents
+    - trailing_edge_thickness: trailing edge thickness as fraction of chord, split equally between the surfaces
+    :return: default config as dict
+    """
+    return {'order': 5,
+            'points': 100,
+            'class': {'n1': 0.5, 'n2': 1.0},
+            'trailing_edge_thickness': 0.0}
+
+
+def stations(config):
+    """
+    :param config: config as dict, see default_config() for details.
+    :return: cosine spaced chordwise stations from leading edge (0) to trailing edge (1).
+    """
+    return 0.5 * (1.0 - np.cos(np.linspace(0.0, np.pi, config['points'])))
+
+
+def basis(x, config):
+    """
+    Class function multiplied by each Bernstein polynomial.
+    :param x: chordwise stations.
+    :param config: config as dict, see default_config() for details.
+    :return: array of shape (order + 1, len(x)).
+    """
+    n = config['order']
+    x = np.asarray(x, dtype = float)
+    i = np.arange(n + 1)[:, np.newaxis]
+    binomial = np.array([math.comb(n, k) for k in range(n + 1)], dtype = float)[:, np.newaxis]
+    bernstein = binomial * x ** i * (1.0 - x) ** (n - i)
+    c = x ** config['class']['n1'] * (1.0 - x) ** config['class']['n2']
+    return bernstein * c
+
+
+def surfaces(upper, lower, config):
+    """
+    Evaluate upper and lower surfaces for a population of weights.
+    :param upper: upper surface weights, shape (population, order + 1) or (order + 1,).
+    :param lower: lower surface weights, same shape as upper.
+    :param config: config as dict, see default_config() for details.
+    :return: tuple of (x, y_upper, y_lower). x has shape (points,), y_upper and y_lower have shape (population, points).
+    """
+    x = stations(config)
+    b = basis(x, config)
+    te = 0.5 * config['trailing_edge_thickness'] * x
+    y_upper = np.atleast_2d(upper) @ b + te
+    y_lower = np.atleast_2d(lower) @ b - te
+    return x, y_upper, y_lower
+
+
+def aerofoils(upper, lower, config):
+    """
+    Construct Aerofoil objects for a population of weights.
+    :param upper: upper surface weights, shape (population, order + 1) or (order + 1,).
+    :param lower: lower surface weights, same shape as upper.
+    :param config: config as dict, see default_config() for details.
+    :return: list of aerox.aerofoil.aerofoil.Aerofoil objects, one per member of the population.
+    """
+    x, y_upper, y_lower = surfaces(upper, lower, config)
+    out = []
+    for yu, yl in zip(y_upper, y_lower):
+        aerofoil = Aerofoil()
+        aerofoil.load_from_surfaces(np.column_stack([x, yu]), np.column_stack([x, yl]))
+        out.append(aerofoil)
+    return out
+
+
+def check(upper, lower, config, constraints):
+    """
+    Check geometric constraints for a population, without constructing Aerofoil objects.
+    :param upper: upper surface weights, shape (population, order + 1).
+    :param lower: lower surface weights, same shape as upper.
+    :param config: config as dict, see default_config() for details.
+    :param constraints: dict with any of the following keys:
+                        - min_thickness: minimum of maximum thickness, fraction of chord
+                        - max_thickness: maximum of maximum thickness, fraction of chord
+                        - min_local_thickness: minimum thickness anywhere between 1% and 99% chord. Use 0 to forbid
+                                               crossing surfaces
+    :return: tuple of (feasible, thickness). feasible is a boolean array, one entry per member; thickness is the
+             maximum thickness of each member.
+    """
+    x, y_upper, y_lower = surfaces(upper, lower, config)
+    thickness = y_upper - y_lower
+    maximum = np.max(thickness, axis = 1)
+    feasible = np.ones(len(maximum), dtype = bool)
+    if constraints.get('min_thickness') is not None:
+        feasible &= maximum >= constraints['min_thickness']
+    if constraints.get('max_thickness') is not None:
+        feasible &= maximum <= constraints['max_thickness']
+    if constraints.get('min_local_thickness') is not None:
+        interior = (x > 0.01) & (x < 0.99)
+        feasible &= np.min(thickness[:, interior], axis = 1) >= constraints['min_local_thickness']
+    return feasible, maximum
+
+
+def project_sensitivity(upper, lower, x, y, sensitivity, config):
+    """
+    Project surface sensitivities onto the weights of a single member, by the chain rule: each weight moves every
+    surface node vertically by its basis function at the node's x, and the sensitivity gives the derivative of the
+    objective with respect to the normal component of that displacement.
+    :param upper: upper surface weights, shape (order + 1,), of the aerofoil the sensitivities were computed for.
+    :param lower: lower surface weights, same shape as upper.
+    :param x: chordwise coordinates of surface nodes, fraction of chord.
+    :param y: vertical coordinates of surface nodes, fraction of chord.
+    :param sensitivity: derivative of the objective with respect to displacement of each node along the surface normal
+                        pointing out of the aerofoil, e.g. Surface_Sensitivity of SU2's discrete adjoint, see
+                        aerox.drivers.su2.adjoint.
+    :param config: config as dict, see default_config() for details.
+    :return: tuple of (gradient with respect to upper weights, gradient with respect to lower weights).
+    """
+    upper = np.asarray(upper, dtype = float)
+    lower = np.asarray(lower, dtype = float)
+    if upper.shape != (config['order'] + 1,) or lower.shape != upper.shape:
+        raise ValueError('Expected weights of shape ({},), got {} and {}'.format(config['order'] + 1,
+                                                                                upper.shape,
+                                                                                lower.shape))
+    x = np.clip(np.asarray(x, dtype = float), 0.0, 1.0)
+    y = np.asarray(y, dtype = float)
+    sensitivity = np.asarray(sensitivity, dtype = float)
+    te = 0.5 * config['trailing_edge_thickness']
+
+    #  assign each node to the nearer surface, then take the slope of that surface by central differences
+    b = basis(x, config)
+    y_upper = upper @ b + te * x
+    y_lower = lower @ b - te * x
+    on_upper = np.abs(y - y_upper) <= np.abs(y - y_lower)
+    h = 1e-6
+    x_minus = np.clip(x - h, 0.0, 1.0)
+    x_plus = np.clip(x + h, 0.0, 1.0)
+    b_minus = basis(x_minus, config)
+    b_plus = basis(x_plus, config)
+    weights = np.where(on_upper[np.newaxis, :], upper[:, np.newaxis], lower[:, np.newaxis])
+    offset = np.where(on_upper, te, -te)
+    slope = (np.sum(weights * (b_plus - b_minus), axis = 0) + offset * (x_plus - x_minus)) / (x_plus - x_minus)
+
+    #  vertical component of the outward normal, zero at the leading edge where the slope is infinite
+    normal_y = np.where(on_upper, 1.0, -1.0) / np.sqrt(1.0 + slope ** 2)
+    dj_dy = sensitivity * normal_y
+    return b @ np.where(on_upper, dj_dy, 0.0), b @ np.where(on_upper, 0.0, dj_dy)
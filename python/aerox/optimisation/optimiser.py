@@ -0,0 +1,211 @@
+"""
+Batched aerofoil shape optimisation with CST parameterisation and differential evolution.
+
+Each generation is generated as a whole population of CST weights. Geometric constraints are checked on the population
+before any solver call; feasible, previously unseen designs are then evaluated by xfoil as one batch across worker
+processes.
+
+Example:
+>>> config = optimiser.default_config()
+>>> config['xfoil']['alphas'] = [0, 2, 4, 6, 8]
+>>> result = optimiser.run(config)
+>>> result['aerofoil'].plot()
+"""
+
+import concurrent.futures
+import os
+
+import numpy as np
+
+from aerox.drivers.xfoil import driver as xfoil_driver
+from aerox.optimisation import cst
+from aerox.tracing.tracing import span
+
+
+def default_config():
+    """
+    - cst: CST parameterisation config, see aerox.optimisation.cst.default_config() for details
+    - population: number of members of the population
+    - generations: number of generations
+    - bounds/upper: (minimum, maximum) of every upper surface CST weight
+    - bounds/lower: (minimum, maximum) of every lower surface CST weight
+    - constraints: geometric constraints, see aerox.optimisation.cst.check() for details
+    - differential_weight: differential evolution mutation scale factor
+    - crossover: differential evolution crossover probability
+    - workers: number of worker processes, None to use one per CPU
+    - seed: random seed, or None
+    - xfoil: xfoil driver config used to evaluate each design, see aerox.drivers.xfoil.driver.default_config()
+    :return: default config as dict
+    """
+    xfoil_config = xfoil_driver.default_config()
+    xfoil_config['alphas'] = [0.0, 2.0, 4.0, 6.0, 8.0]
+    return {'cst': cst.default_config(),
+            'population': 32,
+            'generations': 30,
+            'bounds': {'upper': (0.05, 0.4),
+                       'lower': (-0.4, 0.05)},
+            'constraints': {'min_thickness': 0.08,
+                            'max_thickness': 0.2,
+                            'min_local_thickness': 0.0},
+            'differential_weight': 0.7,
+            'crossover': 0.9,
+            'workers': None,
+            'seed': None,
+            'xfoil': xfoil_config}
+
+
+def max_lift_to_drag(polar):
+    """
+    Default objective: negative of the maximum lift to drag ratio over converged points.
+    :param polar: aerox.polar.polar.Polar object.
+    :return: objective to minimise, inf if no point converged.
+    """
+    ld = polar.lift_to_drag()
+    if not np.any(np.isfinite(ld)):
+        return np.inf
+    return -float(np.nanmax(ld))
+
+
+class Evaluator:
+    """
+    Memoised batch evaluation of aerofoils with xfoil in a process pool.
+
+    Designs are identified by Aerofoil.digest(), so a design is solved at most once however often the optimiser
+    proposes it.
+    """
+    def __init__(self, xfoil_config, workers = None):
+        self.xfoil_config = xfoil_config
+        self.workers = workers if workers is not None else os.cpu_count()
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+        self._executor = None
+
+    def __enter__(self):
+        self._executor = concurrent.futures.ProcessPoolExecutor(max_workers = self.workers)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._executor.shutdown()
+        self._executor = None
+        return False
+
+    def __call__(self, aerofoils):
+        """
+        :param aerofoils: list of aerox.aerofoil.aerofoil.Aerofoil objects.
+        :return: list of aerox.polar.polar.Polar objects, one per aerofoil.
+        """
+        digests = [aerofoil.digest() for aerofoil in aerofoils]
+        pending = {}
+        for digest, aerofoil in zip(digests, aerofoils):
+            if digest in self.cache or digest in pending:
+                self.hits += 1
+            else:
+                pending[digest] = aerofoil
+        self.misses += len(pending)
+
+        if len(pending) > 0:
+            chunksize = max(1, len(pending) // (4 * self.workers))
+            with span('optimiser.evaluate', designs = len(pending)):
+                if self._executor is None:
+                    polars = [_solve(aerofoil, self.xfoil_config) for aerofoil in pending.values()]
+                else:
+                    polars = self._executor.map(_solve,
+                                                pending.values(),
+                                                [self.xfoil_config] * len(pending),
+                                                chunksize = chunksize)
+                for digest, polar in zip(pending.keys(), polars):
+                    self.cache[digest] = polar
+        return [self.cache[digest] for digest in digests]
+
+
+def evaluate(weights, config, evaluator, objective = max_lift_to_drag):
+    """
+    Evaluate a population.
+    :param weights: array of shape (population, 2 * (order + 1)) of upper then lower surface CST weights.
+    :param config: config as dict, see default_config() for details.
+    :param evaluator: Evaluator object.
+    :param objective: callable taking an aerox.polar.polar.Polar and returning a float to minimise.
+    :return: array of objectives, inf for members that violate geometric constraints.
+    """
+    upper, lower = np.split(weights, 2, axis = 1)
+    feasible, _ = cst.check(upper, lower, config['cst'], config['constraints'])
+    out = np.full(len(weights), np.inf)
+    indices = np.flatnonzero(feasible)
+    if len(indices) == 0:
+        return out
+    polars = evaluator(cst.aerofoils(upper[indices], lower[indices], config['cst']))
+    out[indices] = [objective(polar) for polar in polars]
+    return out
+
+
+def run(config, objective = max_lift_to_drag):
+    """
+    Run differential evolution optimisation.
+    :param config: config as dict, see default_config() for details.
+    :param objective: callable taking an aerox.polar.polar.Polar and returning a float to minimise. Evaluated in the
+                      calling process.
+    :return: dict containing:
+             - upper, lower: CST weights of the best design
+             - objective: objective of the best design
+             - aerofoil: best design as aerox.aerofoil.aerofoil.Aerofoil
+             - polar: xfoil polar of the best design
+             - history: best objective after each generation
+             - evaluations: number of designs solved by xfoil
+             - cache_hits: number of proposed designs already solved
+    """
+    rng = np.random.default_rng(config['seed'])
+    n = config['cst']['order'] + 1
+    low = np.array([config['bounds']['upper'][0]] * n + [config['bounds']['lower'][0]] * n)
+    high = np.array([config['bounds']['upper'][1]] * n + [config['bounds']['lower'][1]] * n)
+    size = config['population']
+    if size < 4:
+        raise ValueError('Expected population of at least 4, got {}'.format(size))
+
+    history = []
+    with Evaluator(config['xfoil'], config['workers']) as evaluator:
+        with span('optimiser.generation', generation = 0):
+            population = low + rng.random((size, 2 * n)) * (high - low)
+            objectives = evaluate(population, config, evaluator, objective)
+        history.append(float(np.min(objectives)))
+
+        for generation in range(1, config['generations']):
+            with span('optimiser.generation', generation = generation):
+                #  three distinct donors per member, none equal to the member itself
+                donors = np.argsort(rng.random((size, size - 1)), axis = 1)[:, :3]
+                donors += donors >= np.arange(size)[:, np.newaxis]
+                mutant = population[donors[:, 0]] \
+                         + config['differential_weight'] * (population[donors[:, 1]] - population[donors[:, 2]])
+                mutant = np.clip(mutant, low, high)
+                crossover = rng.random((size, 2 * n)) < config['crossover']
+                crossover[np.arange(size), rng.integers(0, 2 * n, size)] = True
+                trial = np.where(crossover, mutant, population)
+
+                trial_objectives = evaluate(trial, config, evaluator, objective)
+                better = trial_objectives <= objectives
+                population[better] = trial[better]
+                objectives[better] = trial_objectives[better]
+            history.append(float(np.min(objectives)))
+
+        best = int(np.argmin(objectives))
+        upper, lower = np.split(population[best], 2)
+        aerofoil = cst.aerofoils(upper, lower, config['cst'])[0]
+        polar = evaluator([aerofoil])[0]
+        return {'upper': upper,
+                'lower': lower,
+                'objective': float(objectives[best]),
+                'aerofoil': aerofoil,
+                'polar': polar,
+                'history': history,
+                'evaluations': evaluator.misses,
+                'cache_hits': evaluator.hits}
+
+
+def _solve(aerofoil, xfoil_config):
+    """
+    Worker task: run xfoil for one design.
+    :param aerofoil: aerox.aerofoil.aerofoil.Aerofoil object.
+    :param xfoil_config: xfoil driver config.
+    :return: aerox.polar.polar.Polar object.
+    """
+    return xfoil_driver.run(xfoil_config, aerofoil)
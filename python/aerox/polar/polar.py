@@ -0,0 +1,165 @@
+import numpy as np
+
+
+class Polar:
+    """
+    Columnar representation of aerodynamic coefficients over a set of angles of attack.
+
+    Each column is a NumPy array with one entry per point. Points that failed to converge have NaN coefficients and
+    a False entry in converged. Reynolds number, Mach number and fidelity are stored per point so that polars from
+    different sweeps and solvers can be concatenated.
+    """
+    def __init__(self, alpha, cl, cd, cm, converged = None, reynolds_number = np.nan, mach = np.nan, resources = None,
+                 surfaces = None, fidelity = ''):
+        """
+        :param alpha: angles of attack, degrees.
+        :param cl: lift coefficients.
+        :param cd: drag coefficients.
+        :param cm: quarter-chord pitching moment coefficients.
+        :param converged: boolean mask of converged points. If None, points with finite lift coefficient are converged.
+        :param reynolds_number: Reynolds number, scalar or one per point.
+        :param mach: Mach number, scalar or one per point.
+        :param resources: list of resource usage dicts, one per point, or None. See aerox.drivers.process.run().
+        :param surfaces: list of surface distributions, one per point, or None. Each entry is None or a dict mapping
+                         quantity name (e.g. 'x', 'cp', 'cf') to a NumPy array.
+        :param fidelity: name of the model each point was computed with, e.g. 'xfoil' or 'su2', scalar or one per point.
+        """
+        self.alpha = np.asarray(alpha, dtype = float).reshape(-1)
+        n = len(self.alpha)
+        self.cl = np.asarray(cl, dtype = float).reshape(n)
+        self.cd = np.asarray(cd, dtype = float).reshape(n)
+        self.cm = np.asarray(cm, dtype = float).reshape(n)
+        if converged is None:
+            converged = np.isfinite(self.cl)
+        self.converged = np.asarray(converged, dtype = bool).reshape(n)
+        self.reynolds_number = np.broadcast_to(np.asarray(reynolds_number, dtype = float), (n,)).copy()
+        self.mach = np.broadcast_to(np.asarray(mach, dtype = float), (n,)).copy()
+        self.resources = [None] * n if resources is None else list(resources)
+        self.surfaces = [None] * n if surfaces is None else list(surfaces)
+        self.fidelity = np.broadcast_to(np.asarray(fidelity, dtype = object), (n,)).copy()
+
+    def __len__(self):
+        return len(self.alpha)
+
+    def __getitem__(self, i):
+        """
+        :param i: index of point, or slice, integer indices or boolean mask of points.
+        :return: for a slice, indices or mask, new Polar containing the selected points, see take(). For an index,
+                 None if point did not converge, otherwise dict with the following keys:
+                 - lift: lift coefficient
+                 - drag: drag coefficient
+                 - pitching_moment: quarter-chord pitching moment coefficient
+                 - resources: resource usage of the solver run, if recorded
+        """
+        if isinstance(i, (slice, list, np.ndarray)):
+            return self.take(i)
+        if not self.converged[i]:
+            return None
+        out = {'lift': float(self.cl[i]),
+               'drag': float(self.cd[i]),
+               'pitching_moment': float(self.cm[i])}
+        if self.resources[i] is not None:
+            out['resources'] = self.resources[i]
+        return out
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def take(self, indices):
+        """
+        :param indices: integer indices or boolean mask of points to keep.
+        :return: new Polar containing only the selected points.
+        """
+        indices = np.arange(len(self))[indices]
+        return Polar(self.alpha[indices],
+                     self.cl[indices],
+                     self.cd[indices],
+                     self.cm[indices],
+                     converged = self.converged[indices],
+                     reynolds_number = self.reynolds_number[indices],
+                     mach = self.mach[indices],
+                     resources = [self.resources[i] for i in indices],
+                     surfaces = [self.surfaces[i] for i in indices],
+                     fidelity = self.fidelity[indices])
+
+    def sorted(self):
+        """
+        :return: new Polar sorted by angle of attack.
+        """
+        return self.take(np.argsort(self.alpha, kind = 'stable'))
+
+    def converged_only(self):
+        """
+        :return: new Polar containing only converged points.
+        """
+        return self.take(self.converged)
+
+    def lift_to_drag(self):
+        """
+        :return: lift to drag ratio at each point, NaN where not converged.
+        """
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            return np.where(self.converged, self.cl / self.cd, np.nan)
+
+    def cl_max(self):
+        """
+        :return: tuple of (maximum lift coefficient, angle of attack at which it occurs) over converged points, or
+                 (NaN, NaN) if no point converged.
+        """
+        if not np.any(self.converged):
+            return np.nan, np.nan
+        cl = np.where(self.converged, self.cl, -np.inf)
+        i = np.argmax(cl)
+        return float(self.cl[i]), float(self.alpha[i])
+
+    def zero_lift_alpha(self):
+        """
+        Angle of attack at which lift is zero, linearly interpolated between the converged points either side of the
+        sign change nearest to zero angle of attack.
+        :return: zero-lift angle of attack, degrees, or NaN if lift does not change sign.
+        """
+        p = self.converged_only().sorted()
+        crossings = np.flatnonzero(np.sign(p.cl[:-1]) != np.sign(p.cl[1:]))
+        if len(crossings) == 0:
+            exact = np.flatnonzero(p.cl == 0.0)
+            return float(p.alpha[exact[0]]) if len(exact) > 0 else np.nan
+        i = crossings[np.argmin(np.abs(p.alpha[crossings]))]
+        return float(p.alpha[i] - p.cl[i] * (p.alpha[i + 1] - p.alpha[i]) / (p.cl[i + 1] - p.cl[i]))
+
+    def lift_slope(self, alpha_range = (-5.0, 5.0)):
+        """
+        Least squares lift curve slope over converged points within alpha_range.
+        :param alpha_range: tuple of (minimum, maximum) angle of attack to fit over, degrees.
+        :return: lift curve slope, per degree, or NaN if fewer than two points are in range.
+        """
+        mask = self.converged & (self.alpha >= alpha_range[0]) & (self.alpha <= alpha_range[1])
+        if np.count_nonzero(mask) < 2:
+            return np.nan
+        return float(np.polyfit(self.alpha[mask], self.cl[mask], 1)[0])
+
+
+def concatenate(polars):
+    """
+    Concatenate polars, e.g. from several sweeps.
+    :param polars: iterable of Polar objects.
+    :return: new Polar containing all points in order.
+    """
+    polars = list(polars)
+    if len(polars) == 0:
+        return Polar([], [], [], [])
+    resources = []
+    surfaces = []
+    for p in polars:
+        resources += p.resources
+        surfaces += p.surfaces
+    return Polar(np.concatenate([p.alpha for p in polars]),
+                 np.concatenate([p.cl for p in polars]),
+                 np.concatenate([p.cd for p in polars]),
+                 np.concatenate([p.cm for p in polars]),
+                 converged = np.concatenate([p.converged for p in polars]),
+                 reynolds_number = np.concatenate([p.reynolds_number for p in polars]),
+                 mach = np.concatenate([p.mach for p in polars]),
+                 resources = resources,
+                 surfaces = surfaces,
+                 fidelity = np.concatenate([p.fidelity for p in polars]))
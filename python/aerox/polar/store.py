@@ -0,0 +1,273 @@
+"""
+Append-only store of polars in memory-mapped columnar files.
+
+A store is a directory holding one raw binary file per point column (alpha, cl, cd, cm, converged, fidelity) and an
+index with one record per polar: section digest, Reynolds number, Mach number, the range of points it owns, and
+summary values (CLmax and its alpha, minimum drag, maximum lift to drag ratio). Files are opened with np.memmap, so
+queries on the index and reads of individual polars touch only the pages they need, however large the store.
+
+Points are appended before their index record, which commits them. A writer that crashes between the two leaves
+uncommitted points at the end of the column files; they are truncated the next time the store is opened for
+appending. Writers take an exclusive lock on the store, readers take none.
+
+Example:
+>>> with PolarStore('study.polars', 'a') as store:
+>>>     store.append(aerofoil.digest(), polar)
+>>> store = PolarStore('study.polars')
+>>> entries = store.select(reynolds_number = 1e6, cl_max = (1.4, None))
+>>> digests = store.index['digest'][entries]
+>>> polar = store.polar(entries[0])
+"""
+
+import os
+
+import numpy as np
+
+from aerox.polar.polar import Polar
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows, where a single writer must be ensured by the caller
+    fcntl = None
+
+
+INDEX_DTYPE = np.dtype([('digest', 'S40'),
+                        ('reynolds_number', '<f8'),
+                        ('mach', '<f8'),
+                        ('start', '<i8'),
+                        ('count', '<i8'),
+                        ('cl_max', '<f8'),
+                        ('alpha_cl_max', '<f8'),
+                        ('cd_min', '<f8'),
+                        ('lift_to_drag_max', '<f8')])
+
+COLUMNS = {'alpha': np.dtype('<f8'),
+           'cl': np.dtype('<f8'),
+           'cd': np.dtype('<f8'),
+           'cm': np.dtype('<f8'),
+           'converged': np.dtype('?'),
+           'fidelity': np.dtype('S16')}
+
+
+class PolarStore:
+    """
+    Append-only, memory-mapped store of polars indexed by section digest, Reynolds number and Mach number.
+    """
+    def __init__(self, path, mode = 'r', fsync = True):
+        """
+        :param path: path of store directory. Created if mode is 'a' and it does not exist.
+        :param mode: 'r' to read, 'a' to read and append.
+        :param fsync: if True, flush appended data to disk before committing each index record.
+        """
+        if mode not in ('r', 'a'):
+            raise ValueError("Expected mode 'r' or 'a', got {}".format(mode))
+        self.path = path
+        self.mode = mode
+        self.fsync = fsync
+        self._lock = None
+        if mode == 'a':
+            os.makedirs(path, exist_ok = True)
+            self._lock = open(os.path.join(path, 'lock'), 'w')
+            if fcntl is not None:
+                fcntl.flock(self._lock, fcntl.LOCK_EX)
+            self._truncate()
+        elif not os.path.exists(os.path.join(path, 'index.bin')):
+            raise ValueError('No polar store at {}'.format(path))
+        self._map()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def __len__(self):
+        return len(self.index)
+
+    def close(self):
+        self.index = None
+        self._columns = None
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+    def append(self, digest, polar):
+        """
+        Append polar. Points with different Reynolds or Mach numbers are stored as separate index records.
+        :param digest: section digest, e.g. aerox.aerofoil.aerofoil.Aerofoil.digest().
+        :param polar: aerox.polar.polar.Polar object. Surface distributions and resource usage are not stored.
+        :return: list of index record numbers appended.
+        """
+        if self.mode != 'a':
+            raise ValueError('Polar store {} is open for reading'.format(self.path))
+        #  NaN (unknown) conditions are grouped together
+        conditions = np.nan_to_num(np.stack([polar.reynolds_number, polar.mach], axis = 1), nan = -1.0)
+        keys, inverse = np.unique(conditions, axis = 0, return_inverse = True)
+        records = []
+        for k in range(len(keys)):
+            records.append(self._append(digest, polar.take(np.flatnonzero(inverse.reshape(-1) == k)).sorted()))
+        self._map()
+        return records
+
+    def select(self, digest = None, reynolds_number = None, mach = None, cl_max = None, cd_min = None,
+               lift_to_drag_max = None, rtol = 1e-6):
+        """
+        Find index records matching all the given conditions, scanning only the index.
+        :param digest: section digest, or None for any.
+        :param reynolds_number: Reynolds number, matched to relative tolerance rtol, or None for any.
+        :param mach: Mach number, matched to absolute tolerance rtol, or None for any.
+        :param cl_max: tuple of (minimum, maximum) CLmax, either may be None, or None for any.
+        :param cd_min: tuple of (minimum, maximum) minimum drag coefficient, or None for any.
+        :param lift_to_drag_max: tuple of (minimum, maximum) maximum lift to drag ratio, or None for any.
+        :param rtol: tolerance of Reynolds and Mach number matches.
+        :return: array of index record numbers.
+        """
+        index = self.index
+        mask = np.ones(len(index), dtype = bool)
+        if digest is not None:
+            mask &= index['digest'] == _digest_bytes(digest)
+        if reynolds_number is not None:
+            mask &= np.abs(index['reynolds_number'] - reynolds_number) <= rtol * abs(reynolds_number)
+        if mach is not None:
+            mask &= np.abs(index['mach'] - mach) <= rtol
+        for name, bounds in (('cl_max', cl_max), ('cd_min', cd_min), ('lift_to_drag_max', lift_to_drag_max)):
+            if bounds is None:
+                continue
+            if bounds[0] is not None:
+                mask &= index[name] >= bounds[0]
+            if bounds[1] is not None:
+                mask &= index[name] <= bounds[1]
+        return np.flatnonzero(mask)
+
+    def polar(self, record):
+        """
+        :param record: index record number.
+        :return: aerox.polar.polar.Polar of the record's points.
+        """
+        entry = self.index[record]
+        points = slice(int(entry['start']), int(entry['start'] + entry['count']))
+        return Polar(np.array(self._columns['alpha'][points]),
+                     np.array(self._columns['cl'][points]),
+                     np.array(self._columns['cd'][points]),
+                     np.array(self._columns['cm'][points]),
+                     converged = np.array(self._columns['converged'][points]),
+                     reynolds_number = float(entry['reynolds_number']),
+                     mach = float(entry['mach']),
+                     fidelity = np.array([f.decode() for f in self._columns['fidelity'][points]], dtype = object))
+
+    def _append(self, digest, polar):
+        """
+        Append points of a single flow condition, then commit them with an index record. The index record is built
+        before anything is written, and points are written from the end of the committed points, so neither a
+        rejected append nor points left by one can be read back as part of a later record.
+        :return: index record number.
+        """
+        start = self._points()
+        cl, alpha = polar.cl_max()
+        cd = np.where(polar.converged, polar.cd, np.nan)
+        lift_to_drag = polar.lift_to_drag()
+        entry = np.zeros(1, dtype = INDEX_DTYPE)
+        entry['digest'] = _digest_bytes(digest)
+        entry['reynolds_number'] = polar.reynolds_number[0] if len(polar) > 0 else np.nan
+        entry['mach'] = polar.mach[0] if len(polar) > 0 else np.nan
+        entry['start'] = start
+        entry['count'] = len(polar)
+        entry['cl_max'] = cl
+        entry['alpha_cl_max'] = alpha
+        entry['cd_min'] = np.nanmin(cd) if np.any(polar.converged) else np.nan
+        entry['lift_to_drag_max'] = np.nanmax(lift_to_drag) if np.any(polar.converged) else np.nan
+        values = {'alpha': polar.alpha,
+                  'cl': polar.cl,
+                  'cd': polar.cd,
+                  'cm': polar.cm,
+                  'converged': polar.converged,
+                  'fidelity': np.array([str(f).encode() for f in polar.fidelity], dtype = COLUMNS['fidelity'])}
+        values = {name: np.ascontiguousarray(values[name], dtype = dtype).tobytes() for name, dtype in COLUMNS.items()}
+
+        try:
+            for name, dtype in COLUMNS.items():
+                with open(self._column_file(name), 'r+b') as fd:
+                    fd.seek(start * dtype.itemsize)
+                    fd.write(values[name])
+                    fd.truncate()
+                    self._sync(fd)
+            with open(self._index_file(), 'ab') as fd:
+                fd.write(entry.tobytes())
+                self._sync(fd)
+        except BaseException:
+            self._truncate()
+            raise
+        return os.path.getsize(self._index_file()) // INDEX_DTYPE.itemsize - 1
+
+    def _sync(self, fd):
+        if self.fsync:
+            fd.flush()
+            os.fsync(fd.fileno())
+
+    def _points(self):
+        """
+        :return: number of committed points, i.e. the end of the last index record.
+        """
+        n = os.path.getsize(self._index_file()) // INDEX_DTYPE.itemsize if os.path.exists(self._index_file()) else 0
+        if n == 0:
+            return 0
+        last = np.fromfile(self._index_file(), dtype = INDEX_DTYPE, count = 1, offset = (n - 1) * INDEX_DTYPE.itemsize)
+        return int(last['start'][0] + last['count'][0])
+
+    def _truncate(self):
+        """
+        Discard points and partial index records left by an interrupted append.
+        :return: None
+        """
+        index_file = self._index_file()
+        if not os.path.exists(index_file):
+            open(index_file, 'wb').close()
+        size = os.path.getsize(index_file)
+        if size % INDEX_DTYPE.itemsize != 0:
+            os.truncate(index_file, size - size % INDEX_DTYPE.itemsize)
+        n = self._points()
+        for name, dtype in COLUMNS.items():
+            path = self._column_file(name)
+            if not os.path.exists(path):
+                open(path, 'wb').close()
+            if os.path.getsize(path) > n * dtype.itemsize:
+                os.truncate(path, n * dtype.itemsize)
+
+    def _map(self):
+        """
+        Memory-map index and committed points.
+        :return: None
+        """
+        records = os.path.getsize(self._index_file()) // INDEX_DTYPE.itemsize
+        self.index = _memmap(self._index_file(), INDEX_DTYPE, records)
+        n = self._points()
+        self._columns = {name: _memmap(self._column_file(name), dtype, n) for name, dtype in COLUMNS.items()}
+
+    def _index_file(self):
+        return os.path.join(self.path, 'index.bin')
+
+    def _column_file(self, name):
+        return os.path.join(self.path, '{}.bin'.format(name))
+
+
+def _memmap(path, dtype, n):
+    """
+    :return: read-only memory map of the first n records of path, or an empty array if n is 0.
+    """
+    if n == 0:
+        return np.zeros(0, dtype = dtype)
+    return np.memmap(path, dtype = dtype, mode = 'r', shape = (n,))
+
+
+def _digest_bytes(digest):
+    """
+    :param digest: digest as str or bytes.
+    :return: digest as bytes, as stored in the index.
+    """
+    if isinstance(digest, str):
+        digest = digest.encode()
+    if len(digest) > INDEX_DTYPE['digest'].itemsize:
+        raise ValueError('Expected digest of at most {} characters, got {}'.format(INDEX_DTYPE['digest'].itemsize,
+                                                                                  len(digest)))
+    return digest
@@ -0,0 +1,232 @@
+"""
+Gridded lookup tables of aerodynamic coefficients over angle of attack, Reynolds number and Mach number.
+
+Example:
+>>> polars = [xfoil.driver.run(config, aerofoil) for config in configs]  # one sweep per Reynolds number
+>>> t = table.build(polars, table.default_config())
+>>> cl, cd, cm = t.query(alpha, reynolds_number, mach)  # arrays of any matching shape
+"""
+
+import numpy as np
+
+from aerox.polar.polar import concatenate
+
+
+def default_config():
+    """
+    - alphas: angle of attack grid, degrees
+    - reynolds_numbers: Reynolds number grid, or None to use the distinct Reynolds numbers in the polars
+    - machs: Mach number grid, or None to use the distinct Mach numbers in the polars
+    - log_reynolds: if True, interpolate linearly in log10 of the Reynolds number
+    - dtype: floating point type of table and query results
+    - chunk_size: maximum number of query points evaluated at once, bounding temporary memory
+    :return: default config as dict
+    """
+    return {'alphas': list(np.arange(-20.0, 20.25, 0.25)),
+            'reynolds_numbers': None,
+            'machs': None,
+            'log_reynolds': True,
+            'dtype': 'float32',
+            'chunk_size': 65536}
+
+
+class LookupTable:
+    """
+    Coefficients on a regular (not necessarily uniform) grid of angle of attack, Reynolds number and Mach number,
+    queried by multilinear interpolation. Queries outside the grid are clamped to its edges.
+    """
+    def __init__(self, alphas, reynolds_numbers, machs, coefficients, log_reynolds = True, chunk_size = 65536):
+        """
+        :param alphas: angle of attack grid, ascending, degrees.
+        :param reynolds_numbers: Reynolds number grid, ascending.
+        :param machs: Mach number grid, ascending.
+        :param coefficients: array of shape (len(alphas), len(reynolds_numbers), len(machs), 3) holding cl, cd and cm.
+        :param log_reynolds: if True, interpolate linearly in log10 of the Reynolds number.
+        :param chunk_size: maximum number of query points evaluated at once.
+        """
+        self.alphas = np.asarray(alphas, dtype = float)
+        self.reynolds_numbers = np.asarray(reynolds_numbers, dtype = float)
+        self.machs = np.asarray(machs, dtype = float)
+        self.coefficients = np.ascontiguousarray(coefficients)
+        self.log_reynolds = log_reynolds
+        self.chunk_size = chunk_size
+        expected = (len(self.alphas), len(self.reynolds_numbers), len(self.machs), 3)
+        if self.coefficients.shape != expected:
+            raise ValueError('Expected coefficients of shape {}, got {}'.format(expected, self.coefficients.shape))
+        self._axes = [self.alphas,
+                      np.log10(self.reynolds_numbers) if log_reynolds else self.reynolds_numbers,
+                      self.machs]
+        self._flat = self.coefficients.reshape(-1, 3)
+        self._strides = np.array([expected[1] * expected[2], expected[2], 1])
+
+    def query(self, alpha, reynolds_number, mach):
+        """
+        Evaluate coefficients at arbitrary points. Arguments are broadcast against each other.
+        :param alpha: angle of attack, degrees.
+        :param reynolds_number: Reynolds number.
+        :param mach: Mach number.
+        :return: tuple of (cl, cd, cm) arrays with the broadcast shape of the arguments.
+        """
+        alpha, reynolds_number, mach = np.broadcast_arrays(np.asarray(alpha, dtype = float),
+                                                           np.asarray(reynolds_number, dtype = float),
+                                                           np.asarray(mach, dtype = float))
+        shape = alpha.shape
+        queries = [alpha.reshape(-1),
+                   np.log10(reynolds_number.reshape(-1)) if self.log_reynolds else reynolds_number.reshape(-1),
+                   mach.reshape(-1)]
+        n = len(queries[0])
+        out = np.empty((n, 3), dtype = self.coefficients.dtype)
+        for start in range(0, n, self.chunk_size):
+            end = min(start + self.chunk_size, n)
+            out[start:end] = self._interpolate([q[start:end] for q in queries])
+        return out[:, 0].reshape(shape), out[:, 1].reshape(shape), out[:, 2].reshape(shape)
+
+    def save(self, file):
+        """
+        Save table in NumPy .npz format.
+        :param file: path or file-like object.
+        :return: None
+        """
+        np.savez(file,
+                 alphas = self.alphas,
+                 reynolds_numbers = self.reynolds_numbers,
+                 machs = self.machs,
+                 coefficients = self.coefficients,
+                 log_reynolds = self.log_reynolds)
+
+    @staticmethod
+    def load(file, chunk_size = 65536):
+        """
+        Load table saved with save().
+        :param file: path or file-like object.
+        :param chunk_size: maximum number of query points evaluated at once.
+        :return: LookupTable object.
+        """
+        with np.load(file) as data:
+            return LookupTable(data['alphas'],
+                               data['reynolds_numbers'],
+                               data['machs'],
+                               data['coefficients'],
+                               log_reynolds = bool(data['log_reynolds']),
+                               chunk_size = chunk_size)
+
+    def _interpolate(self, queries):
+        """
+        :param queries: list of three 1D arrays of query coordinates in table axis space.
+        :return: array of shape (n, 3) of interpolated coefficients.
+        """
+        lower = []
+        upper = []
+        weights = []
+        for axis, q in zip(self._axes, queries):
+            if len(axis) == 1:
+                i = np.zeros(len(q), dtype = np.intp)
+                lower.append(i)
+                upper.append(i)
+                weights.append(np.zeros(len(q), dtype = self.coefficients.dtype))
+                continue
+            i = np.clip(np.searchsorted(axis, q, side = 'right') - 1, 0, len(axis) - 2)
+            t = np.clip((q - axis[i]) / (axis[i + 1] - axis[i]), 0.0, 1.0).astype(self.coefficients.dtype)
+            lower.append(i)
+            upper.append(i + 1)
+            weights.append(t)
+
+        out = np.zeros((len(queries[0]), 3), dtype = self.coefficients.dtype)
+        for corner in range(8):
+            index = np.zeros(len(queries[0]), dtype = np.intp)
+            weight = np.ones(len(queries[0]), dtype = self.coefficients.dtype)
+            for axis in range(3):
+                if corner & (1 << axis):
+                    index += upper[axis] * self._strides[axis]
+                    weight *= weights[axis]
+                else:
+                    index += lower[axis] * self._strides[axis]
+                    weight *= 1 - weights[axis]
+            out += weight[:, np.newaxis] * self._flat[index]
+        return out
+
+
+def build(polars, config):
+    """
+    Build lookup table from polars.
+
+    Each distinct (Reynolds number, Mach number) pair in the polars is interpolated onto the alpha grid from its
+    converged points. Grid nodes with no data are filled by interpolation across Reynolds number, then Mach number.
+    If config specifies Reynolds or Mach grids, the table is then resampled onto them.
+    :param polars: iterable of aerox.polar.polar.Polar objects, e.g. from xfoil.driver.run or su2.driver.run.
+    :param config: config as dict, see default_config() for details.
+    :return: LookupTable object.
+    """
+    p = concatenate(polars).converged_only()
+    if len(p) == 0:
+        raise ValueError('Expected at least one converged point to build lookup table')
+    if np.any(np.isnan(p.reynolds_number)) or np.any(np.isnan(p.mach)):
+        raise ValueError('Expected polars with Reynolds and Mach numbers set')
+
+    alphas = np.asarray(config['alphas'], dtype = float)
+    reynolds_numbers = np.unique(p.reynolds_number)
+    machs = np.unique(p.mach)
+    coefficients = np.full((len(alphas), len(reynolds_numbers), len(machs), 3), np.nan)
+    i = np.searchsorted(reynolds_numbers, p.reynolds_number)
+    j = np.searchsorted(machs, p.mach)
+    for r, m in set(zip(i, j)):
+        mask = (i == r) & (j == m)
+        alpha, inverse = np.unique(p.alpha[mask], return_inverse = True)
+        counts = np.bincount(inverse)
+        for k, c in enumerate((p.cl[mask], p.cd[mask], p.cm[mask])):
+            mean = np.bincount(inverse, weights = c) / counts  # average repeated alphas
+            coefficients[:, r, m, k] = np.interp(alphas, alpha, mean)
+
+    axis = np.log10(reynolds_numbers) if config['log_reynolds'] else reynolds_numbers
+    coefficients = _fill(coefficients, axis, 1)
+    coefficients = _fill(coefficients, machs, 2)
+
+    table = LookupTable(alphas,
+                        reynolds_numbers,
+                        machs,
+                        coefficients.astype(config['dtype']),
+                        log_reynolds = config['log_reynolds'],
+                        chunk_size = config['chunk_size'])
+    if config['reynolds_numbers'] is None and config['machs'] is None:
+        return table
+
+    target_reynolds_numbers = reynolds_numbers if config['reynolds_numbers'] is None \
+                              else np.sort(np.asarray(config['reynolds_numbers'], dtype = float))
+    target_machs = machs if config['machs'] is None else np.sort(np.asarray(config['machs'], dtype = float))
+    a, r, m = np.meshgrid(alphas, target_reynolds_numbers, target_machs, indexing = 'ij')
+    resampled = np.stack(table.query(a, r, m), axis = -1)
+    return LookupTable(alphas,
+                       target_reynolds_numbers,
+                       target_machs,
+                       resampled,
+                       log_reynolds = config['log_reynolds'],
+                       chunk_size = config['chunk_size'])
+
+
+def _fill(coefficients, axis, dimension):
+    """
+    Fill grid nodes with no data by linear interpolation along one dimension, holding end values constant.
+    :param coefficients: array of shape (alphas, reynolds numbers, machs, 3) with NaN at nodes with no data.
+    :param axis: grid coordinates along dimension.
+    :param dimension: 1 to fill across Reynolds number, 2 to fill across Mach number.
+    :return: filled coefficients. Nodes remain NaN only where an entire line along dimension has no data.
+    """
+    c = np.moveaxis(coefficients, dimension, -1).copy()  # (alphas, other grid dimension, 3, dimension)
+    known = ~np.isnan(c[0, :, 0, :])  # data presence does not vary with alpha or coefficient
+    for line in range(known.shape[0]):
+        present = np.flatnonzero(known[line])
+        missing = np.flatnonzero(~known[line])
+        if len(present) == 0 or len(missing) == 0:
+            continue
+        values = c[:, line, :, :]  # view of shape (alphas, 3, dimension)
+        for k in missing:
+            hi = np.searchsorted(axis[present], axis[k])
+            if hi == 0:
+                values[..., k] = values[..., present[0]]
+            elif hi == len(present):
+                values[..., k] = values[..., present[-1]]
+            else:
+                a, b = present[hi - 1], present[hi]
+                t = (axis[k] - axis[a]) / (axis[b] - axis[a])
+                values[..., k] = (1 - t) * values[..., a] + t * values[..., b]
+    return np.moveaxis(c, -1, dimension)
@@ -0,0 +1,175 @@
+"""
+Compressed archive of per-case results.
+
+An archive is a zip file with one directory per case holding NumPy arrays (.npy), metadata (metadata.json) and
+arbitrary files such as solver histories. Each member is compressed independently and the zip central directory gives
+random access, so reading one case does not decompress the others.
+
+Writes go to a temporary copy of the archive, which replaces it when the Archive is closed. A process killed while
+writing leaves the archive as it was, so cases already archived stay readable. As each Archive opened for appending
+copies the archive, write many cases through one open Archive where possible.
+
+Example:
+>>> with Archive('results.zip', 'a') as archive:
+>>>     archive.write_case('alpha_4.0', {'x': x, 'cp': cp}, {'lift': 0.61}, files = {'history.dat': 'history_4.0.dat'})
+>>> with Archive('results.zip') as archive:
+>>>     cp = archive.read_array('alpha_4.0', 'cp')
+"""
+
+import io
+import json
+import os
+import shutil
+import zipfile
+
+import numpy as np
+
+
+class Archive:
+    """
+    Compressed, randomly accessible store of per-case arrays, metadata and files.
+    """
+    def __init__(self, path, mode = 'r', compression = zipfile.ZIP_DEFLATED, compresslevel = 6):
+        """
+        :param path: path of archive.
+        :param mode: 'r' to read, 'a' to append (creating the archive if necessary), 'w' to overwrite.
+        :param compression: zipfile compression method, e.g. zipfile.ZIP_DEFLATED or zipfile.ZIP_LZMA.
+        :param compresslevel: compression level, see zipfile.ZipFile.
+        """
+        if mode not in ('r', 'a', 'w'):
+            raise ValueError("Expected mode 'r', 'a' or 'w', got {}".format(mode))
+        self.path = path
+        self._temporary = None
+        target = path
+        if mode != 'r':
+            self._temporary = '{}.tmp{}'.format(path, os.getpid())
+            if mode == 'a' and os.path.exists(path):
+                shutil.copyfile(path, self._temporary)
+            elif os.path.exists(self._temporary):
+                os.remove(self._temporary)  # left by a killed process with the same id
+            target = self._temporary
+        self._zip = zipfile.ZipFile(target, mode, compression = compression, compresslevel = compresslevel)
+        self._cases = set(name.split('/')[0] for name in self._zip.namelist())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def close(self):
+        """
+        Close archive, replacing it with the written copy if open for writing.
+        :return: None
+        """
+        self._zip.close()
+        if self._temporary is not None:
+            with open(self._temporary, 'rb') as fd:
+                os.fsync(fd.fileno())
+            os.replace(self._temporary, self.path)
+            self._temporary = None
+
+    def abort(self):
+        """
+        Close archive, discarding everything written since it was opened.
+        :return: None
+        """
+        self._zip.close()
+        if self._temporary is not None:
+            os.remove(self._temporary)
+            self._temporary = None
+
+    def cases(self):
+        """
+        :return: sorted list of case names.
+        """
+        return sorted(self._cases)
+
+    def write_case(self, case, arrays = None, metadata = None, files = None):
+        """
+        Add case to archive.
+        :param case: case name, must not contain '/' and must not already be in the archive.
+        :param arrays: dict mapping array name to NumPy array, or None.
+        :param metadata: JSON serialisable dict, or None.
+        :param files: dict mapping name in archive to path of file on disk, or None.
+        :return: None
+        """
+        if '/' in case:
+            raise ValueError('Expected case name without "/", got {}'.format(case))
+        if case in self._cases:
+            raise ValueError('Case {} already in archive {}'.format(case, self.path))
+        for name, array in (arrays or {}).items():
+            buffer = io.BytesIO()
+            np.save(buffer, np.asarray(array), allow_pickle = False)
+            self._zip.writestr('{}/{}.npy'.format(case, name), buffer.getvalue())
+        self._zip.writestr('{}/metadata.json'.format(case), json.dumps(metadata or {}))
+        for name, path in (files or {}).items():
+            self._zip.write(path, '{}/files/{}'.format(case, name))
+        self._cases.add(case)
+
+    def read_case(self, case):
+        """
+        :param case: case name.
+        :return: tuple of (arrays, metadata). arrays is a dict mapping array name to NumPy array.
+        """
+        prefix = '{}/'.format(case)
+        arrays = {}
+        for name in self._zip.namelist():
+            if name.startswith(prefix) and name.endswith('.npy') and '/files/' not in name:
+                arrays[name[len(prefix):-4]] = self.read_array(case, name[len(prefix):-4])
+        return arrays, self.read_metadata(case)
+
+    def read_array(self, case, name):
+        """
+        :param case: case name.
+        :param name: array name.
+        :return: NumPy array.
+        """
+        with self._zip.open('{}/{}.npy'.format(case, name)) as fd:
+            return np.load(io.BytesIO(fd.read()), allow_pickle = False)
+
+    def read_metadata(self, case):
+        """
+        :param case: case name.
+        :return: metadata as dict.
+        """
+        with self._zip.open('{}/metadata.json'.format(case)) as fd:
+            return json.load(fd)
+
+    def open_file(self, case, name):
+        """
+        Open a file stored with the case, decompressing as it is read.
+        :param case: case name.
+        :param name: name of file in archive.
+        :return: text file-like object.
+        """
+        return io.TextIOWrapper(self._zip.open('{}/files/{}'.format(case, name)))
+
+
+def write_polar(archive, polar, prefix = ''):
+    """
+    Add one case per point of a polar, holding its surface distributions and coefficients.
+    :param archive: Archive object open for writing.
+    :param polar: aerox.polar.polar.Polar object.
+    :param prefix: prefix of case names, e.g. an aerofoil or Reynolds number identifier.
+    :return: list of case names written.
+    """
+    cases = []
+    for i in range(len(polar)):
+        case = '{}alpha_{}'.format(prefix, float(polar.alpha[i]))
+        metadata = {'alpha': float(polar.alpha[i]),
+                    'converged': bool(polar.converged[i]),
+                    'reynolds_number': float(polar.reynolds_number[i]),
+                    'mach': float(polar.mach[i]),
+                    'fidelity': polar.fidelity[i],
+                    'coefficients': {'lift': float(polar.cl[i]),
+                                     'drag': float(polar.cd[i]),
+                                     'pitching_moment': float(polar.cm[i])},
+                    'resources': polar.resources[i]}
+        archive.write_case(case, polar.surfaces[i], metadata)
+        cases.append(case)
+    return cases
@@ -0,0 +1,53 @@
+"""
+Streaming readers for surface distributions written by solvers.
+"""
+
+import itertools
+
+import numpy as np
+
+
+#  SU2 surface CSV column names for each quantity, in order of preference
+SU2_COLUMNS = {'x': ['x'],
+               'y': ['y'],
+               'cp': ['Pressure_Coefficient'],
+               'cf_x': ['Skin_Friction_Coefficient_x'],
+               'cf_y': ['Skin_Friction_Coefficient_y'],
+               'sensitivity': ['Surface_Sensitivity']}
+
+
+def read_su2_surface(file, quantities = ('x', 'y', 'cp', 'cf_x', 'cf_y'), chunk_rows = 65536):
+    """
+    Read surface distributions from an SU2 surface CSV file (SURFACE_CSV output), a chunk of rows at a time so memory
+    use is bounded by chunk_rows plus the selected columns.
+    :param file: file-like object.
+    :param quantities: quantities to read, see SU2_COLUMNS. Quantities absent from the file are skipped, but at least
+                       one must be present.
+    :param chunk_rows: number of rows parsed at once.
+    :return: dict mapping quantity to NumPy array. If cf_x and cf_y are read, cf, the skin friction magnitude signed
+             by the direction of cf_x, is added.
+    """
+    header = [column.strip().strip('"') for column in file.readline().split(',')]
+    columns = {}
+    for quantity in quantities:
+        for name in SU2_COLUMNS.get(quantity, [quantity]):
+            if name in header:
+                columns[quantity] = header.index(name)
+                break
+    if len(columns) == 0:
+        raise ValueError('None of {} in SU2 surface file with columns {}'.format(list(quantities), header))
+
+    names = list(columns.keys())
+    indices = [columns[name] for name in names]
+    chunks = []
+    while True:
+        lines = list(itertools.islice(file, chunk_rows))
+        if len(lines) == 0:
+            break
+        chunks.append(np.loadtxt(lines, delimiter = ',', usecols = indices, ndmin = 2))
+
+    data = np.concatenate(chunks) if len(chunks) > 0 else np.zeros((0, len(names)))
+    out = {name: np.ascontiguousarray(data[:, i]) for i, name in enumerate(names)}
+    if 'cf_x' in out and 'cf_y' in out:
+        out['cf'] = np.copysign(np.hypot(out['cf_x'], out['cf_y']), out['cf_x'])
+    return out
@@ -0,0 +1,101 @@
+"""
+Adaptive angle of attack sampling.
+
+A sweep starts from a coarse, uniform set of alphas and is refined in rounds. Each round bisects intervals where the
+lift curve bends, where the solver failed to converge next to a converged point, or either side of the maximum lift
+coefficient, until CLmax and the stall alpha are bracketed to within min_step.
+"""
+
+import numpy as np
+
+from aerox.polar.polar import concatenate
+from aerox.tracing.tracing import span
+
+
+def default_config():
+    """
+    - alpha_range: tuple of (minimum, maximum) angle of attack to sweep, degrees
+    - initial_step: spacing of the initial coarse sweep, degrees
+    - min_step: intervals narrower than this are never refined. CLmax and stall alpha are bracketed to this tolerance
+    - curvature_tolerance: an interval is refined where the lift coefficient at a point differs from linear
+                           interpolation between its neighbours by more than this
+    - max_evaluations: maximum number of alphas evaluated in total
+    :return: default config as dict
+    """
+    return {'alpha_range': (-5.0, 25.0),
+            'initial_step': 4.0,
+            'min_step': 0.25,
+            'curvature_tolerance': 0.02,
+            'max_evaluations': 60}
+
+
+def sweep(evaluate, config):
+    """
+    Run adaptive sweep.
+    :param evaluate: callable taking a list of alphas and returning an aerox.polar.polar.Polar with one point per
+                     alpha. Called once per refinement round, so batch solvers see every new alpha in a round at once.
+    :param config: config as dict, see default_config() for details.
+    :return: aerox.polar.polar.Polar containing every evaluated point, sorted by alpha.
+    """
+    low, high = config['alpha_range']
+    alphas = list(np.arange(low, high, config['initial_step'])) + [high]
+    alphas = [float(a) for a in alphas]
+
+    polars = []
+    evaluations = 0
+    rounds = 0
+    with span('adaptive.sweep', alpha_range = (low, high)) as s:
+        while len(alphas) > 0:
+            alphas = alphas[:config['max_evaluations'] - evaluations]
+            if len(alphas) == 0:
+                break
+            with span('adaptive.round', round = rounds, alphas = len(alphas)):
+                polars.append(evaluate(alphas))
+            evaluations += len(alphas)
+            rounds += 1
+            alphas = refine(concatenate(polars).sorted(), config)
+        s.set('evaluations', evaluations)
+        s.set('rounds', rounds)
+    return concatenate(polars).sorted()
+
+
+def refine(polar, config):
+    """
+    Choose alphas to evaluate next.
+    :param polar: aerox.polar.polar.Polar of points evaluated so far, sorted by alpha.
+    :param config: config as dict, see default_config() for details.
+    :return: sorted list of new alphas, empty if the sweep is resolved.
+    """
+    alpha = polar.alpha
+    converged = polar.converged
+    intervals = set()
+
+    def add(low, high):
+        #  bisect interval between alphas low and high
+        if high - low > config['min_step']:
+            intervals.add((low, high))
+
+    #  convergence failures next to converged points
+    boundaries = np.flatnonzero(converged[:-1] != converged[1:])
+    for i in boundaries:
+        add(alpha[i], alpha[i + 1])
+
+    #  curvature: deviation of each converged point from the chord between its converged neighbours
+    c = np.flatnonzero(converged)
+    if len(c) >= 3:
+        a0, a1, a2 = alpha[c[:-2]], alpha[c[1:-1]], alpha[c[2:]]
+        cl0, cl1, cl2 = polar.cl[c[:-2]], polar.cl[c[1:-1]], polar.cl[c[2:]]
+        error = np.abs(cl1 - (cl0 + (cl2 - cl0) * (a1 - a0) / (a2 - a0)))
+        for j in np.flatnonzero(error > config['curvature_tolerance']):
+            add(a0[j], a1[j])
+            add(a1[j], a2[j])
+
+    #  bracket CLmax on both sides
+    if len(c) > 0:
+        i = c[np.argmax(polar.cl[c])]
+        if i > 0:
+            add(alpha[i - 1], alpha[i])
+        if i < len(alpha) - 1:
+            add(alpha[i], alpha[i + 1])
+
+    return sorted(float(0.5 * (low + high)) for low, high in intervals)
@@ -0,0 +1,430 @@
+"""
+File-backed job queue for sharing sweeps between worker processes and nodes.
+
+The queue is a single SQLite database holding jobs and their results, so it needs no server: any process that can open
+the file can enqueue jobs or work on them. A worker leases one job at a time and renews the lease with heartbeats while
+the job runs. If a worker dies, its lease expires and the job returns to the queue for another worker. A job that
+raises is retried until it has been attempted max_attempts times.
+
+Workers on several nodes need the database on a shared filesystem with working POSIX locks, and clocks synchronised
+to well within lease_seconds.
+
+Example:
+>>> with JobQueue('sweep.db') as queue:
+>>>     enqueue_alphas(queue, 'xfoil', {'aerofoil': aerofoil_payload(aerofoil), 'config': config}, range(-4, 16))
+>>> # on each node, in any number of processes
+>>> work('sweep.db')
+>>> with JobQueue('sweep.db') as queue:
+>>>     polar = collect(queue, 'xfoil')
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+import numpy as np
+
+from aerox.polar.polar import Polar
+from aerox.polar.polar import concatenate
+from aerox.tracing.tracing import span
+
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    key TEXT UNIQUE,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    created REAL NOT NULL,
+    finished REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id);
+"""
+
+
+def default_config():
+    """
+    - lease_seconds: a leased job returns to the queue if its worker sends no heartbeat for this long.
+    - heartbeat_seconds: interval between heartbeats of a running job. Must be well below lease_seconds.
+    - max_attempts: a job that raises or whose lease expires this many times is marked failed.
+    - poll_seconds: interval at which an idle worker checks for new jobs.
+    - exit_when_empty: if True, a worker exits once no job is pending or leased, otherwise it waits for more.
+    :return: default config as dict.
+    """
+    return {'lease_seconds': 300.0,
+            'heartbeat_seconds': 30.0,
+            'max_attempts': 3,
+            'poll_seconds': 5.0,
+            'exit_when_empty': True}
+
+
+class JobQueue:
+    """
+    Queue of jobs and their results, backed by an SQLite database.
+
+    A job is a dict with keys id, kind, key, payload and attempts. kind selects the handler that runs it, see work().
+    payload and results are JSON serialisable.
+    """
+    def __init__(self, path, config = None, timeout = 60.0):
+        """
+        :param path: path of database, created if it does not exist.
+        :param config: queue config, see default_config(), or None for defaults.
+        :param timeout: seconds to wait for another process's lock on the database.
+        """
+        self.path = path
+        self.config = default_config() if config is None else config
+        self._connection = sqlite3.connect(path, timeout = timeout, isolation_level = None)
+        self._connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        self._connection.close()
+
+    def put(self, kind, payload, key = None):
+        """
+        Enqueue job.
+        :param kind: job kind, see work().
+        :param payload: JSON serialisable job input.
+        :param key: unique identifier of the job, e.g. a case hash, or None. A job whose key is already in the queue is
+                    not added again, so enqueueing a sweep twice does not duplicate work.
+        :return: id of job, or None if a job with key already exists.
+        """
+        cursor = self._connection.execute('INSERT OR IGNORE INTO jobs (kind, key, payload, state, created) '
+                                          'VALUES (?, ?, ?, ?, ?)',
+                                          (kind, key, json.dumps(payload), PENDING, time.time()))
+        return cursor.lastrowid if cursor.rowcount == 1 else None
+
+    def lease(self, worker):
+        """
+        Lease the oldest pending job, first returning jobs with expired leases to the queue.
+        :param worker: worker identifier.
+        :return: job as dict, or None if no job is pending.
+        """
+        with self._transaction():
+            self._requeue_expired()
+            row = self._connection.execute('SELECT id, kind, key, payload, attempts FROM jobs WHERE state = ? '
+                                           'ORDER BY id LIMIT 1', (PENDING,)).fetchone()
+            if row is None:
+                return None
+            self._connection.execute('UPDATE jobs SET state = ?, worker = ?, lease_expires = ?, '
+                                     'attempts = attempts + 1 WHERE id = ?',
+                                     (LEASED, worker, time.time() + self.config['lease_seconds'], row[0]))
+        return {'id': row[0], 'kind': row[1], 'key': row[2], 'payload': json.loads(row[3]), 'attempts': row[4] + 1}
+
+    def heartbeat(self, job_id, worker):
+        """
+        Renew lease on job.
+        :param job_id: id of job.
+        :param worker: worker identifier the job was leased to.
+        :return: True if the lease was renewed, False if the worker no longer holds it.
+        """
+        cursor = self._connection.execute('UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker = ? AND state = ?',
+                                          (time.time() + self.config['lease_seconds'], job_id, worker, LEASED))
+        return cursor.rowcount == 1
+
+    def complete(self, job_id, worker, result):
+        """
+        Store result of job.
+        :param job_id: id of job.
+        :param worker: worker identifier the job was leased to.
+        :param result: JSON serialisable result.
+        :return: True if the result was stored, False if the worker no longer holds the lease.
+        """
+        cursor = self._connection.execute('UPDATE jobs SET state = ?, result = ?, finished = ?, lease_expires = NULL '
+                                          'WHERE id = ? AND worker = ? AND state = ?',
+                                          (DONE, json.dumps(result), time.time(), job_id, worker, LEASED))
+        return cursor.rowcount == 1
+
+    def fail(self, job_id, worker, error):
+        """
+        Record failure of job. The job returns to the queue unless it has been attempted max_attempts times.
+        :param job_id: id of job.
+        :param worker: worker identifier the job was leased to.
+        :param error: description of the failure, e.g. a traceback.
+        :return: None
+        """
+        self._connection.execute('UPDATE jobs SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, error = ?, '
+                                 'worker = NULL, lease_expires = NULL, finished = ? '
+                                 'WHERE id = ? AND worker = ? AND state = ?',
+                                 (self.config['max_attempts'], FAILED, PENDING, error, time.time(), job_id, worker,
+                                  LEASED))
+
+    def requeue_expired(self):
+        """
+        Return jobs whose leases have expired to the queue.
+        :return: number of jobs requeued or, if out of attempts, marked failed.
+        """
+        with self._transaction():
+            return self._requeue_expired()
+
+    def counts(self):
+        """
+        :return: dict mapping job state (PENDING, LEASED, DONE, FAILED) to number of jobs.
+        """
+        out = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        for state, n in self._connection.execute('SELECT state, COUNT(*) FROM jobs GROUP BY state'):
+            out[state] = n
+        return out
+
+    def results(self, kind = None):
+        """
+        :param kind: job kind, or None for all kinds.
+        :return: list of (job, result) tuples of completed jobs, in order of enqueueing.
+        """
+        query = 'SELECT id, kind, key, payload, attempts, result FROM jobs WHERE state = ?'
+        parameters = (DONE,)
+        if kind is not None:
+            query += ' AND kind = ?'
+            parameters += (kind,)
+        out = []
+        for row in self._connection.execute(query + ' ORDER BY id', parameters):
+            job = {'id': row[0], 'kind': row[1], 'key': row[2], 'payload': json.loads(row[3]), 'attempts': row[4]}
+            out.append((job, json.loads(row[5])))
+        return out
+
+    def failures(self):
+        """
+        :return: list of (job, error) tuples of jobs that ran out of attempts.
+        """
+        out = []
+        for row in self._connection.execute('SELECT id, kind, key, payload, attempts, error FROM jobs WHERE state = ? '
+                                            'ORDER BY id', (FAILED,)):
+            job = {'id': row[0], 'kind': row[1], 'key': row[2], 'payload': json.loads(row[3]), 'attempts': row[4]}
+            out.append((job, row[5]))
+        return out
+
+    def _requeue_expired(self):
+        cursor = self._connection.execute('UPDATE jobs SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, '
+                                          'error = ?, worker = NULL, lease_expires = NULL '
+                                          'WHERE state = ? AND lease_expires < ?',
+                                          (self.config['max_attempts'], FAILED, PENDING, 'lease expired', LEASED,
+                                           time.time()))
+        return cursor.rowcount
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """
+        Hold the database write lock until the block exits, committing on success.
+        """
+        self._connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self._connection.execute('ROLLBACK')
+            raise
+        self._connection.execute('COMMIT')
+
+
+def work(path, handlers = None, config = None, worker = None):
+    """
+    Run jobs from the queue until it is empty (or forever, if exit_when_empty is False).
+    :param path: path of queue database.
+    :param handlers: dict mapping job kind to callable taking the job payload and returning a JSON serialisable
+                     result, or None for default_handlers().
+    :param config: queue config, see default_config(), or None for defaults.
+    :param worker: worker identifier, or None to use host name, process id and a random suffix.
+    :return: number of jobs completed by this worker.
+    """
+    if handlers is None:
+        handlers = default_handlers()
+    if config is None:
+        config = default_config()
+    if worker is None:
+        worker = '{}:{}:{}'.format(socket.gethostname(), os.getpid(), uuid.uuid4().hex[:8])
+
+    #  handlers may change the working directory, the heartbeat thread must still open this queue
+    path = os.path.abspath(path)
+    completed = 0
+    with JobQueue(path, config) as queue:
+        while True:
+            job = queue.lease(worker)
+            if job is None:
+                counts = queue.counts()
+                if config['exit_when_empty'] and counts[PENDING] == 0 and counts[LEASED] == 0:
+                    return completed
+                time.sleep(config['poll_seconds'])
+                continue
+
+            stop = threading.Event()
+            ready = threading.Event()
+            heartbeat = threading.Thread(target = _heartbeat, args = (path, config, job['id'], worker, stop, ready))
+            heartbeat.daemon = True
+            heartbeat.start()
+            ready.wait()
+            try:
+                with span('jobs.run', kind = job['kind'], job = job['id'], attempt = job['attempts']):
+                    if job['kind'] not in handlers:
+                        raise ValueError('No handler for job kind {}'.format(job['kind']))
+                    result = handlers[job['kind']](job['payload'])
+            except Exception:
+                stop.set()
+                heartbeat.join()
+                queue.fail(job['id'], worker, traceback.format_exc())
+                continue
+            stop.set()
+            heartbeat.join()
+            if queue.complete(job['id'], worker, result):
+                completed += 1
+
+
+def _heartbeat(path, config, job_id, worker, stop, ready):
+    """
+    Renew lease on job every heartbeat_seconds until stop is set. Runs in its own thread with its own connection, which
+    is opened before ready is set.
+    """
+    try:
+        queue = JobQueue(path, config)
+    finally:
+        ready.set()
+    with queue:
+        while not stop.wait(config['heartbeat_seconds']):
+            if not queue.heartbeat(job_id, worker):
+                return
+
+
+def enqueue_alphas(queue, kind, payload, alphas, key = None):
+    """
+    Enqueue one job per angle of attack.
+    :param queue: JobQueue object.
+    :param kind: job kind, e.g. 'xfoil' or 'su2'.
+    :param payload: payload shared by all jobs, see default_handlers(). Each job's config/alphas is set to its alpha.
+    :param alphas: angles of attack, degrees.
+    :param key: prefix of job keys, e.g. a digest identifying aerofoil and flow condition, or None for no keys.
+    :return: list of ids of jobs added.
+    """
+    ids = []
+    for alpha in alphas:
+        job = dict(payload, config = dict(payload['config'], alphas = [float(alpha)], adaptive = None))
+        job_key = None if key is None else '{}:{}:{}'.format(kind, key, float(alpha))
+        job_id = queue.put(kind, job, key = job_key)
+        if job_id is not None:
+            ids.append(job_id)
+    return ids
+
+
+def collect(queue, kind):
+    """
+    :param queue: JobQueue object.
+    :param kind: job kind whose results are polars, e.g. 'xfoil' or 'su2'.
+    :return: aerox.polar.polar.Polar of all completed jobs of kind, sorted by alpha.
+    """
+    return concatenate([polar_from_dict(result) for _, result in queue.results(kind)]).sorted()
+
+
+def default_handlers():
+    """
+    Handlers for sweep jobs:
+    - 'xfoil': payload has aerofoil, see aerofoil_payload(), and config, see
+               aerox.drivers.xfoil.driver.default_config().
+    - 'su2': payload has directory, holding mesh.su2, and config, see aerox.drivers.su2.driver.default_config(). Each
+             job runs in its own subdirectory of directory, named after its alpha and a hash of its config. Relative
+             manifest and archive paths are relative to that subdirectory.
+    :return: dict mapping job kind to handler.
+    """
+    return {'xfoil': _xfoil,
+            'su2': _su2}
+
+
+def aerofoil_payload(aerofoil):
+    """
+    :param aerofoil: aerox.aerofoil.aerofoil.Aerofoil object.
+    :return: JSON serialisable description of aerofoil, see aerofoil_from_payload().
+    """
+    return {'name': aerofoil.name,
+            'top': [list(aerofoil.leading_edge)] + [list(p) for p in aerofoil.top],
+            'bottom': [list(aerofoil.leading_edge)] + [list(p) for p in reversed(aerofoil.bottom)]}
+
+
+def aerofoil_from_payload(payload):
+    """
+    :param payload: aerofoil description, see aerofoil_payload().
+    :return: aerox.aerofoil.aerofoil.Aerofoil object.
+    """
+    from aerox.aerofoil.aerofoil import Aerofoil
+    aerofoil = Aerofoil()
+    aerofoil.load_from_surfaces(payload['top'], payload['bottom'])
+    aerofoil.name = payload['name']
+    return aerofoil
+
+
+def polar_to_dict(polar):
+    """
+    :param polar: aerox.polar.polar.Polar object.
+    :return: JSON serialisable dict of polar. Surface distributions are not included. NaN is stored as None.
+    """
+    def floats(values):
+        return [None if np.isnan(v) else float(v) for v in values]
+
+    return {'alpha': floats(polar.alpha),
+            'cl': floats(polar.cl),
+            'cd': floats(polar.cd),
+            'cm': floats(polar.cm),
+            'converged': [bool(c) for c in polar.converged],
+            'reynolds_number': floats(polar.reynolds_number),
+            'mach': floats(polar.mach),
+            'resources': polar.resources,
+            'fidelity': list(polar.fidelity)}
+
+
+def polar_from_dict(d):
+    """
+    :param d: dict as returned by polar_to_dict().
+    :return: aerox.polar.polar.Polar object.
+    """
+    def floats(values):
+        return np.array([np.nan if v is None else v for v in values], dtype = float)
+
+    return Polar(floats(d['alpha']),
+                 floats(d['cl']),
+                 floats(d['cd']),
+                 floats(d['cm']),
+                 converged = d['converged'],
+                 reynolds_number = floats(d['reynolds_number']),
+                 mach = floats(d['mach']),
+                 resources = d['resources'],
+                 fidelity = np.array(d['fidelity'], dtype = object))
+
+
+def _xfoil(payload):
+    from aerox.drivers.xfoil import driver as xfoil
+    return polar_to_dict(xfoil.run(payload['config'], aerofoil_from_payload(payload['aerofoil'])))
+
+
+def _su2(payload):
+    from aerox.drivers.su2 import driver as su2
+    directory = os.path.abspath(payload['directory'])
+    #  jobs sharing a directory at the same alpha may differ in config, e.g. airspeed
+    digest = hashlib.sha1(json.dumps(payload['config'], sort_keys = True, default = str).encode()).hexdigest()
+    case_directory = os.path.join(directory, 'alpha_{}_{}'.format(payload['config']['alphas'][0], digest[:16]))
+    os.makedirs(case_directory, exist_ok = True)
+    config = dict(payload['config'], working_directory = case_directory)
+    config['su2'] = dict(config['su2'])
+    config['su2'].setdefault('MESH_FILENAME', os.path.join(directory, 'mesh.su2'))
+    for key in ('manifest', 'archive'):
+        if config.get(key) is not None:
+            config[key] = os.path.join(case_directory, config[key])
+    return polar_to_dict(su2.run(config))
@@ -0,0 +1,227 @@
+"""
+Multi-fidelity sweeps: xfoil everywhere, SU2 only where xfoil cannot be trusted.
+
+A sweep runs xfoil over every alpha, then selects the points to rerun with SU2:
+- 'unconverged': xfoil failed to converge,
+- 'stall': within stall_margin of xfoil's maximum (or minimum) lift coefficient, where xfoil's separation model is
+  least reliable, or beyond it,
+- 'correction': a correction model fitted to previous SU2 results predicts that SU2 differs from xfoil by more than
+  the correction tolerances at that alpha.
+Every other point keeps its xfoil coefficients, shifted by the correction model if one is fitted. The merged polar
+records the source of each point in Polar.fidelity: 'su2', 'xfoil' or 'xfoil_corrected'.
+
+SU2 runs in the current working directory on mesh.su2, see aerox.drivers.su2.driver. The xfoil and SU2 configs should
+describe the same flow conditions.
+
+Example:
+>>> config = multifidelity.default_config()
+>>> config['alphas'] = list(range(-4, 21))
+>>> polar = multifidelity.run(config, aerofoil, reference = previous)
+>>> previous = concatenate([previous, polar.take(polar.fidelity == 'su2')])
+"""
+
+import numpy as np
+
+from aerox.drivers.su2 import driver as su2
+from aerox.drivers.xfoil import driver as xfoil
+from aerox.polar.polar import Polar
+from aerox.tracing.tracing import span
+
+
+#  order in which selected points are kept when max_su2_points limits the SU2 budget
+REASONS = ['unconverged', 'stall', 'correction']
+
+
+def default_config():
+    """
+    - alphas: list of alphas to evaluate. If None, xfoil/alphas or xfoil/adaptive choose them.
+    - xfoil: xfoil driver config, see aerox.drivers.xfoil.driver.default_config().
+    - su2: SU2 driver config, see aerox.drivers.su2.driver.default_config(). alphas and adaptive are ignored.
+    - stall_margin: points within this many degrees of the xfoil CLmax (CLmin) alpha, or beyond it, run with SU2.
+    - max_su2_points: maximum number of points run with SU2, or None for no limit. Points are kept in REASONS order,
+                      then nearest the stall alpha first.
+    - correction/degree: degree of the polynomial in alpha fitted to SU2 minus xfoil coefficients.
+    - correction/lift_tolerance: points whose predicted lift correction exceeds this run with SU2.
+    - correction/drag_tolerance: points whose predicted drag correction exceeds this fraction of the xfoil drag
+                                 coefficient run with SU2.
+    - correction/apply: if True, add the predicted correction to points that keep their xfoil coefficients.
+    :return: default config as dict.
+    """
+    return {'alphas': None,
+            'xfoil': xfoil.default_config(),
+            'su2': su2.default_config(),
+            'stall_margin': 2.0,
+            'max_su2_points': None,
+            'correction': {'degree': 2,
+                           'lift_tolerance': 0.05,
+                           'drag_tolerance': 0.25,
+                           'apply': True}}
+
+
+def run(config, aerofoil, reference = None):
+    """
+    Run multi-fidelity sweep.
+    :param config: config as dict, see default_config() for details.
+    :param aerofoil: aerox.aerofoil.aerofoil.Aerofoil object.
+    :param reference: aerox.polar.polar.Polar of previous SU2 results for this aerofoil and flow condition, used to
+                      fit the correction model, or None.
+    :return: aerox.polar.polar.Polar with one point per xfoil alpha, tagged with its fidelity.
+    """
+    xfoil_config = dict(config['xfoil'])
+    if config['alphas'] is not None:
+        xfoil_config['alphas'] = config['alphas']
+    with span('multifidelity.sweep', aerofoil = aerofoil.name) as s:
+        low = xfoil.run(xfoil_config, aerofoil)
+        model = fit_correction(low, reference, config['correction'])
+        reasons = select(low, model, config)
+        indices = [i for i in range(len(low)) if reasons[i] is not None]
+        s.set('points', len(low))
+        s.set('su2_points', len(indices))
+
+        high = None
+        if len(indices) > 0:
+            high = su2.run(dict(config['su2'], alphas = [float(low.alpha[i]) for i in indices], adaptive = None))
+    return merge(low, high, indices, model if config['correction']['apply'] else None)
+
+
+def select(polar, model, config):
+    """
+    Choose xfoil points to rerun with SU2.
+    :param polar: aerox.polar.polar.Polar of xfoil results.
+    :param model: correction model, see fit_correction(), or None.
+    :param config: config as dict, see default_config() for details.
+    :return: list with one entry per point: the reason to run it with SU2 (see REASONS), or None to keep xfoil's.
+    """
+    n = len(polar)
+    reasons = [None] * n
+    for i in np.flatnonzero(~polar.converged):
+        reasons[i] = 'unconverged'
+
+    stall = _stall_alphas(polar)
+    low, high = stall
+    for i in range(n):
+        if reasons[i] is None and (polar.alpha[i] >= high - config['stall_margin']
+                                   or polar.alpha[i] <= low + config['stall_margin']):
+            reasons[i] = 'stall'
+
+    if model is not None:
+        correction = evaluate_correction(model, polar.alpha)
+        tolerance = config['correction']
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            disagree = (np.abs(correction['cl']) > tolerance['lift_tolerance']) \
+                       | (np.abs(correction['cd'] / polar.cd) > tolerance['drag_tolerance'])
+        disagree &= correction['valid']
+        for i in np.flatnonzero(disagree):
+            if reasons[i] is None:
+                reasons[i] = 'correction'
+
+    if config['max_su2_points'] is not None:
+        order = sorted([i for i in range(n) if reasons[i] is not None],
+                       key = lambda i: (REASONS.index(reasons[i]),
+                                        min(abs(polar.alpha[i] - high), abs(polar.alpha[i] - low))))
+        for i in order[config['max_su2_points']:]:
+            reasons[i] = None
+    return reasons
+
+
+def fit_correction(polar, reference, config):
+    """
+    Fit polynomials in alpha to the difference between SU2 and xfoil coefficients.
+    :param polar: aerox.polar.polar.Polar of xfoil results. Interpolated to the alphas of reference.
+    :param reference: aerox.polar.polar.Polar of SU2 results, or None.
+    :param config: correction config, see default_config() for details.
+    :return: correction model as dict, or None if reference is None or shares fewer than two alphas with the
+             converged xfoil range. Contains cl, cd and cm, polynomial coefficients as returned by np.polyfit(), and
+             alpha_range, the range of alphas the model was fitted over.
+    """
+    if reference is None:
+        return None
+    low = polar.converged_only().sorted()
+    high = reference.converged_only()
+    if len(low) < 2:
+        return None
+    inside = (high.alpha >= low.alpha[0]) & (high.alpha <= low.alpha[-1])
+    high = high.take(inside)
+    if len(high) < 2:
+        return None
+
+    degree = min(config['degree'], len(high) - 1)
+    model = {'alpha_range': (float(np.min(high.alpha)), float(np.max(high.alpha)))}
+    for name in ('cl', 'cd', 'cm'):
+        difference = getattr(high, name) - np.interp(high.alpha, low.alpha, getattr(low, name))
+        model[name] = np.polyfit(high.alpha, difference, degree)
+    return model
+
+
+def evaluate_correction(model, alpha):
+    """
+    :param model: correction model, see fit_correction().
+    :param alpha: angles of attack, degrees.
+    :return: dict of predicted SU2 minus xfoil cl, cd and cm at each alpha, plus valid, a boolean mask of alphas within
+             the range the model was fitted over. Predictions outside it are extrapolated.
+    """
+    alpha = np.asarray(alpha, dtype = float)
+    out = {name: np.polyval(model[name], alpha) for name in ('cl', 'cd', 'cm')}
+    out['valid'] = (alpha >= model['alpha_range'][0]) & (alpha <= model['alpha_range'][1])
+    return out
+
+
+def merge(low, high, indices, model = None):
+    """
+    Merge xfoil and SU2 results.
+    :param low: aerox.polar.polar.Polar of xfoil results.
+    :param high: aerox.polar.polar.Polar of SU2 results, one point per entry of indices, or None if indices is empty.
+    :param indices: indices into low of the points in high.
+    :param model: correction model applied to the remaining xfoil points within its range, or None.
+    :return: aerox.polar.polar.Polar with one point per point of low.
+    """
+    coefficients = np.array([low.cl, low.cd, low.cm])
+    converged = low.converged.copy()
+    reynolds_number = low.reynolds_number.copy()
+    mach = low.mach.copy()
+    resources = list(low.resources)
+    surfaces = list(low.surfaces)
+    fidelity = low.fidelity.copy()
+
+    if model is not None:
+        correction = evaluate_correction(model, low.alpha)
+        mask = correction['valid'] & converged
+        for row, name in enumerate(('cl', 'cd', 'cm')):
+            coefficients[row, mask] += correction[name][mask]
+        fidelity[mask] = 'xfoil_corrected'
+
+    for j, i in enumerate(indices):
+        coefficients[:, i] = (high.cl[j], high.cd[j], high.cm[j])
+        converged[i] = high.converged[j]
+        reynolds_number[i] = high.reynolds_number[j]
+        mach[i] = high.mach[j]
+        resources[i] = high.resources[j]
+        surfaces[i] = high.surfaces[j]
+        fidelity[i] = high.fidelity[j]
+
+    return Polar(low.alpha,
+                 coefficients[0],
+                 coefficients[1],
+                 coefficients[2],
+                 converged = converged,
+                 reynolds_number = reynolds_number,
+                 mach = mach,
+                 resources = resources,
+                 surfaces = surfaces,
+                 fidelity = fidelity)
+
+
+def _stall_alphas(polar):
+    """
+    :param polar: aerox.polar.polar.Polar of xfoil results.
+    :return: tuple of (alpha of minimum lift coefficient, alpha of maximum lift coefficient) over converged points.
+             Either is replaced by -inf or inf if it is at the end of the converged range, i.e. stall was not reached.
+    """
+    p = polar.converged_only().sorted()
+    if len(p) < 3:
+        return -np.inf, np.inf
+    i_max = int(np.argmax(p.cl))
+    i_min = int(np.argmin(p.cl))
+    high = float(p.alpha[i_max]) if i_max < len(p) - 1 else np.inf
+    low = float(p.alpha[i_min]) if i_min > 0 else -np.inf
+    return low, high
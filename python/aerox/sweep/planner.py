@@ -0,0 +1,304 @@
+"""
+Sweep planning: solve each distinct case once.
+
+Sweeps submitted together often overlap: several users request the same section at the same flow conditions, and
+symmetric sections (e.g. every NACA 00xx) have mirrored coefficients at +alpha and -alpha. The planner reduces the
+submitted sweeps to groups of unique cases before dispatch:
+- cases are identified by (solver, section digest, config hash, alpha). Driver config keys that do not change results,
+  see default_config(), are left out of the config hash, and for SU2 the digest of the mesh is included.
+- on sections found to be symmetric, negative alphas are solved at -alpha and mirrored: cl and cm change sign, cd is
+  unchanged.
+Results of the groups are then expanded back into one polar per submitted sweep.
+
+Example:
+>>> sweeps = [{'kind': 'xfoil', 'aerofoil': naca0012, 'config': dict(config, alphas = list(range(-10, 11)))},
+>>>           {'kind': 'xfoil', 'aerofoil': naca0012, 'config': dict(config, alphas = [0, 4, 8, 12])}]
+>>> plan = planner.plan(sweeps)
+>>> polars = planner.run(plan)  # 12 alphas solved for 25 requested points
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from aerox.drivers.su2 import manifest
+from aerox.polar.polar import Polar
+from aerox.polar.polar import concatenate
+from aerox.sweep import jobs
+from aerox.tracing.tracing import span
+
+
+def default_config():
+    """
+    - symmetry_tolerance: maximum distance between a surface and the mirror image of the other surface, as a fraction
+                          of chord, for a section to be treated as symmetric.
+    - mirror: if True, negative alphas of symmetric sections are mirrored from positive alphas.
+    - decimals: alphas are rounded to this many decimal places when identifying duplicate cases.
+    - ignored_keys: driver config keys left out of the config hash, as they do not change results.
+    :return: default config as dict.
+    """
+    return {'symmetry_tolerance': 1e-4,
+            'mirror': True,
+            'decimals': 6,
+            'ignored_keys': ['alphas', 'adaptive', 'path', 'working_directory', 'manifest', 'archive', 'storage']}
+
+
+def is_symmetric(aerofoil, tolerance = 1e-4):
+    """
+    :param aerofoil: aerox.aerofoil.aerofoil.Aerofoil object.
+    :param tolerance: maximum distance between a surface and the mirror image of the other surface about the chord
+                      line, as a fraction of chord.
+    :return: True if the section is symmetric about its chord line.
+    """
+    leading_edge = np.asarray(aerofoil.leading_edge, dtype = float)
+    #  midpoint of the trailing edge points of the surfaces, which bottom holds first
+    trailing_edge = 0.5 * (np.asarray(aerofoil.top[-1], dtype = float) + np.asarray(aerofoil.bottom[0], dtype = float))
+    chord = trailing_edge - leading_edge
+    length = np.hypot(chord[0], chord[1])
+    if length == 0.0:
+        raise ValueError('Expected aerofoil with distinct leading and trailing edges')
+    u = chord / length
+    v = np.array([-u[1], u[0]])
+
+    def chord_frame(points):
+        p = (np.asarray(points, dtype = float).reshape(-1, 2) - leading_edge) / length
+        p = np.column_stack([p @ u, p @ v])
+        return p[np.argsort(p[:, 0], kind = 'stable')]
+
+    top = chord_frame([aerofoil.leading_edge] + list(aerofoil.top))
+    bottom = chord_frame([aerofoil.leading_edge] + list(aerofoil.bottom))
+    deviation = max(np.max(np.abs(top[:, 1] + np.interp(top[:, 0], bottom[:, 0], bottom[:, 1]))),
+                    np.max(np.abs(bottom[:, 1] + np.interp(bottom[:, 0], top[:, 0], top[:, 1]))))
+    return bool(deviation <= tolerance)
+
+
+def config_hash(config, ignored_keys):
+    """
+    :param config: driver config as dict.
+    :param ignored_keys: keys left out of the hash.
+    :return: hash of config as hex str.
+    """
+    relevant = {k: v for k, v in config.items() if k not in ignored_keys}
+    return hashlib.sha1(json.dumps(relevant, sort_keys = True, default = str).encode()).hexdigest()
+
+
+def plan(sweeps, config = None):
+    """
+    Reduce sweeps to groups of unique cases.
+
+    The alphas of a group are solved as one ascending sweep, with negative alphas of symmetric sections mirrored into
+    it. XFOIL starts each point from the previous solution, so results near stall or transition may differ slightly
+    from those of the sweeps solved on their own, in the order requested.
+    :param sweeps: list of sweeps, each a dict with:
+                   - kind: solver, 'xfoil' or 'su2'.
+                   - aerofoil: aerox.aerofoil.aerofoil.Aerofoil object.
+                   - config: driver config with alphas, see aerox.drivers.xfoil.driver.default_config() and
+                             aerox.drivers.su2.driver.default_config(). Adaptive sweeps are not supported.
+                   - directory: SU2 only, directory holding mesh.su2. Each group runs in its own subdirectory, see
+                                run() and aerox.sweep.jobs.default_handlers().
+    :param config: planner config, see default_config() for details. If None, use default_config().
+    :return: plan as dict containing:
+             - groups: list of groups, each a dict with kind, aerofoil, config and directory of the first sweep that
+                       requested it, key identifying solver, section and config, symmetric, and alphas to solve.
+             - points: one list per sweep with a (group index, alpha solved, mirrored) tuple per requested alpha.
+             - statistics: dict of the number of points requested, cases solved and points mirrored.
+             - decimals: decimal places alphas were rounded to.
+    """
+    if config is None:
+        config = default_config()
+    groups = []
+    keys = {}
+    points = []
+    statistics = {'requested': 0, 'solved': 0, 'mirrored': 0}
+    with span('planner.plan', sweeps = len(sweeps)) as s:
+        for sweep in sweeps:
+            if sweep['config'].get('adaptive') is not None:
+                raise ValueError('Adaptive sweeps cannot be planned, expected alphas')
+            key = _group_key(sweep, config)
+            if key not in keys:
+                keys[key] = len(groups)
+                symmetric = config['mirror'] and is_symmetric(sweep['aerofoil'], config['symmetry_tolerance'])
+                groups.append({'kind': sweep['kind'],
+                               'aerofoil': sweep['aerofoil'],
+                               'config': sweep['config'],
+                               'directory': sweep.get('directory'),
+                               'key': key,
+                               'symmetric': symmetric,
+                               'alphas': []})
+            index = keys[key]
+            group = groups[index]
+            requested = []
+            for alpha in sweep['config']['alphas']:
+                alpha = round(float(alpha), config['decimals']) + 0.0
+                mirrored = group['symmetric'] and alpha < 0.0
+                solved = -alpha if mirrored else alpha
+                statistics['requested'] += 1
+                statistics['mirrored'] += int(mirrored)
+                if solved not in group['alphas']:
+                    group['alphas'].append(solved)
+                requested.append((index, solved, mirrored))
+            points.append(requested)
+        for group in groups:
+            group['alphas'].sort()
+            statistics['solved'] += len(group['alphas'])
+        for name, value in statistics.items():
+            s.set(name, value)
+    return {'groups': groups, 'points': points, 'statistics': statistics, 'decimals': config['decimals']}
+
+
+def run(plan, solve = None):
+    """
+    Solve the groups of a plan in this process and expand the results.
+    :param plan: plan, see plan().
+    :param solve: function taking a group and returning an aerox.polar.polar.Polar of its alphas, or None to run the
+                  xfoil or SU2 driver with the group's config. SU2 groups run in a subdirectory of their directory
+                  named after the group key, so groups sharing a directory do not overwrite each other's files.
+    :return: list of aerox.polar.polar.Polar, one per sweep, see expand().
+    """
+    if solve is None:
+        solve = _solve
+    results = []
+    for group in plan['groups']:
+        with span('planner.group', kind = group['kind'], alphas = len(group['alphas'])):
+            results.append(solve(group) if len(group['alphas']) > 0 else None)
+    return expand(plan, results)
+
+
+def enqueue(queue, plan):
+    """
+    Enqueue the cases of a plan as jobs, see aerox.sweep.jobs. Job keys include the group key, so cases already in the
+    queue, e.g. from an earlier plan, are not enqueued again.
+    :param queue: aerox.sweep.jobs.JobQueue object.
+    :param plan: plan, see plan().
+    :return: list of ids of jobs added.
+    """
+    ids = []
+    for group in plan['groups']:
+        if group['kind'] == 'su2':
+            if group['directory'] is None:
+                raise ValueError('Expected directory holding mesh.su2 for SU2 sweep')
+            payload = {'directory': group['directory'], 'config': group['config']}
+        else:
+            payload = {'aerofoil': jobs.aerofoil_payload(group['aerofoil']), 'config': group['config']}
+        ids += jobs.enqueue_alphas(queue, group['kind'], payload, group['alphas'], key = group['key'])
+    return ids
+
+
+def collect(queue, plan):
+    """
+    :param queue: aerox.sweep.jobs.JobQueue object the plan was enqueued to, see enqueue().
+    :param plan: plan, see plan().
+    :return: list of aerox.polar.polar.Polar, one per sweep, see expand().
+    """
+    results = {group['key']: [] for group in plan['groups']}
+    for job, result in queue.results():
+        if job['key'] is None:
+            continue
+        #  job keys are '<kind>:<group key>:<alpha>', see aerox.sweep.jobs.enqueue_alphas()
+        key = job['key'].split(':', 1)[-1].rsplit(':', 1)[0]
+        if key in results:
+            results[key].append(jobs.polar_from_dict(result))
+    return expand(plan, [concatenate(results[group['key']]) if len(results[group['key']]) > 0 else None
+                         for group in plan['groups']])
+
+
+def expand(plan, results):
+    """
+    Map results of the groups back to the submitted sweeps.
+    :param plan: plan, see plan().
+    :param results: list with one aerox.polar.polar.Polar (or None if nothing was solved) per group.
+    :return: list of aerox.polar.polar.Polar, one per sweep, with one point per requested alpha in the order requested.
+             Mirrored points have cl and cm negated, surface y (and cf_y) negated, and no resource usage, as they cost
+             nothing. Cases missing from the results are unconverged NaN points.
+    """
+    decimals = plan['decimals']
+    lookup = []
+    for result in results:
+        if result is None:
+            lookup.append({})
+        else:
+            lookup.append({round(float(a), decimals) + 0.0: i for i, a in enumerate(result.alpha)})
+
+    out = []
+    for requested in plan['points']:
+        points = []
+        for index, solved, mirrored in requested:
+            result = results[index]
+            i = lookup[index].get(solved)
+            if i is None:
+                points.append(Polar([-solved if mirrored else solved], [np.nan], [np.nan], [np.nan]))
+                continue
+            point = result.take([i])
+            if mirrored:
+                point = Polar([-solved],
+                              -point.cl,
+                              point.cd,
+                              -point.cm,
+                              converged = point.converged,
+                              reynolds_number = point.reynolds_number,
+                              mach = point.mach,
+                              surfaces = [_mirror_surface(point.surfaces[0])],
+                              fidelity = point.fidelity)
+            points.append(point)
+        out.append(concatenate(points) if len(points) > 0 else Polar([], [], [], []))
+    return out
+
+
+def _group_key(sweep, config):
+    """
+    :param sweep: sweep, see plan().
+    :param config: planner config, see default_config() for details.
+    :return: str identifying solver, section and config of sweep.
+    """
+    parts = [sweep['aerofoil'].digest(), config_hash(sweep['config'], config['ignored_keys'])]
+    if sweep['kind'] == 'su2' and sweep.get('directory') is not None:
+        parts.append(str(manifest.file_digest(os.path.join(sweep['directory'], 'mesh.su2'))))
+    return ':'.join([sweep['kind']] + parts)
+
+
+def _group_directory(group):
+    """
+    :param group: group, see plan().
+    :return: name of subdirectory of the group's directory its cases run in when solved in this process.
+    """
+    return 'group_{}'.format(hashlib.sha1(group['key'].encode()).hexdigest()[:16])
+
+
+def _mirror_surface(surface):
+    """
+    :param surface: surface distributions as dict, or None.
+    :return: surface distributions of the mirrored case, or None. Sensitivities are dropped, as their sign depends on
+             the objective.
+    """
+    if surface is None:
+        return None
+    out = {k: v for k, v in surface.items() if k != 'sensitivity'}
+    for name in ('y', 'cf_y'):
+        if name in out:
+            out[name] = -out[name]
+    return out
+
+
+def _solve(group):
+    """
+    Run the driver of a group at its alphas.
+    :param group: group, see plan().
+    :return: aerox.polar.polar.Polar.
+    """
+    config = dict(group['config'], alphas = list(group['alphas']), adaptive = None)
+    if group['kind'] == 'xfoil':
+        from aerox.drivers.xfoil import driver as xfoil
+        return xfoil.run(config, group['aerofoil'])
+    if group['kind'] == 'su2':
+        from aerox.drivers.su2 import driver as su2
+        if group['directory'] is None:
+            raise ValueError('Expected directory holding mesh.su2 for SU2 sweep')
+        directory = os.path.abspath(group['directory'])
+        config['working_directory'] = os.path.join(directory, _group_directory(group))
+        os.makedirs(config['working_directory'], exist_ok = True)
+        config['su2'] = dict(config['su2'])
+        config['su2'].setdefault('MESH_FILENAME', os.path.join(directory, 'mesh.su2'))
+        return su2.run(config)
+    raise ValueError("Expected kind 'xfoil' or 'su2', got {}".format(group['kind']))
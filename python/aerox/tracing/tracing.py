@@ -0,0 +1,224 @@
+"""
+Lightweight structured tracing.
+
+Code is instrumented with nested spans, each with a name, a duration and a dict of attributes. Completed spans are sent
+to a sink. Tracing is disabled until a sink is installed with enable(); while disabled, span() returns a shared no-op
+object so instrumentation costs one function call and a global lookup.
+
+Example:
+>>> from aerox.tracing import tracing
+>>> with tracing.capture(tracing.ChromeTraceSink('trace.json')):
+>>>     coefficients = su2.driver.run(config)
+Open trace.json in chrome://tracing or https://ui.perfetto.dev
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+
+
+def enable(sink):
+    """
+    Start sending spans to sink.
+    :param sink: sink object implementing emit(span) and close().
+    :return: None
+    """
+    global _sink
+    _sink = sink
+
+
+def disable():
+    """
+    Stop tracing. The sink is closed.
+    :return: None
+    """
+    global _sink
+    sink = _sink
+    _sink = None
+    if sink is not None:
+        sink.close()
+
+
+def enabled():
+    """
+    :return: True if a sink is installed.
+    """
+    return _sink is not None
+
+
+@contextlib.contextmanager
+def capture(sink):
+    """
+    Context manager that traces its body to sink, closing the sink on exit.
+    :param sink: sink object implementing emit(span) and close().
+    :return: sink
+    """
+    enable(sink)
+    try:
+        yield sink
+    finally:
+        disable()
+
+
+def span(name, **attributes):
+    """
+    Create a span, to be used as a context manager.
+
+    Example:
+    >>> with span('su2.case', alpha = alpha) as s:
+    >>>     ...
+    >>>     s.set('exit_status', result.returncode)
+    :param name: name of span, by convention <module>.<stage>.
+    :param attributes: attributes to attach to span.
+    :return: Span object, or a no-op span if tracing is disabled.
+    """
+    if _sink is None:
+        return _NULL_SPAN
+    return Span(name, attributes)
+
+
+class Span:
+    """
+    A timed, named region of code with attributes. Spans nest per thread.
+    """
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self.start = None  # start time, ns since tracing epoch
+        self.duration = None  # duration, ns
+        self.depth = 0
+        self.parent = None
+        self.thread = threading.get_ident()
+        self.process = os.getpid()
+
+    def set(self, key, value):
+        """
+        Set attribute on span.
+        :param key: attribute name.
+        :param value: attribute value.
+        :return: None
+        """
+        self.attributes[key] = value
+
+    def __enter__(self):
+        stack = _stack()
+        if len(stack) > 0:
+            self.parent = stack[-1]
+            self.depth = len(stack)
+        stack.append(self)
+        self.start = time.perf_counter_ns() - _epoch
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.duration = time.perf_counter_ns() - _epoch - self.start
+        if exc_type is not None:
+            self.attributes['error'] = '{}: {}'.format(exc_type.__name__, exc_value)
+        stack = _stack()
+        if len(stack) > 0 and stack[-1] is self:
+            stack.pop()
+        sink = _sink
+        if sink is not None:
+            sink.emit(self)
+        return False
+
+
+class MemorySink:
+    """
+    Sink that keeps completed spans in a list.
+    """
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def emit(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def close(self):
+        pass
+
+    def summary(self):
+        """
+        :return: dict mapping span name to dict with count and total seconds.
+        """
+        out = {}
+        for s in self.spans:
+            entry = out.setdefault(s.name, {'count': 0, 'seconds': 0.0})
+            entry['count'] += 1
+            entry['seconds'] += s.duration * 1e-9
+        return out
+
+
+class ChromeTraceSink:
+    """
+    Sink that writes spans to a Chrome trace event format JSON file when closed.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._events = []
+        self._lock = threading.Lock()
+
+    def emit(self, span):
+        event = {'name': span.name,
+                 'cat': span.name.split('.')[0],
+                 'ph': 'X',
+                 'ts': span.start / 1000.0,
+                 'dur': span.duration / 1000.0,
+                 'pid': span.process,
+                 'tid': span.thread,
+                 'args': {key: _json_value(value) for key, value in span.attributes.items()}}
+        with self._lock:
+            self._events.append(event)
+
+    def close(self):
+        with self._lock:
+            events = self._events
+            self._events = []
+        with open(self.path, 'w') as fd:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, fd)
+
+
+class _NullSpan:
+    """
+    Span returned when tracing is disabled.
+    """
+    def set(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+def _stack():
+    """
+    :return: this thread's stack of open spans.
+    """
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = []
+        _local.stack = stack
+    return stack
+
+
+def _json_value(value):
+    """
+    :param value: attribute value.
+    :return: value if it can be serialised to JSON, otherwise its string representation.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+_sink = None
+_local = threading.local()
+_epoch = time.perf_counter_ns()
+_NULL_SPAN = _NullSpan()
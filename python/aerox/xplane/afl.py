@@ -0,0 +1,272 @@
+"""
+Export of X-Plane airfoil (.afl) files.
+
+xfoil sweeps are run at each configured Reynolds number in parallel worker processes. xfoil only converges for
+attached and lightly stalled flow, so each polar is blended into a flat plate model beyond its converged range to cover
+the full -180 to 180 degree range X-Plane needs.
+
+X-Plane interpolates each section between a low and a high Reynolds number, so a file holds exactly two blocks. The
+file starts with the A/version header line pair and a description line. Each block then has a fixed header of one
+value per line, followed by its label (see HEADER), a line giving the number of table rows, and one row per alpha with
+columns alpha, cl, cd and cm. The low Reynolds number block comes first.
+
+Example:
+>>> config = afl.default_config()
+>>> config['reynolds_numbers'] = [2e5, 1e6, 5e6]
+>>> afl.export(aerofoil, 'NACA2412.afl', config)
+>>> afl.export_all({'wing_root': root, 'wing_tip': tip, 'tail': tail}, 'airfoils', config)
+"""
+
+import concurrent.futures
+import copy
+import os
+
+import numpy as np
+
+from aerox.drivers.xfoil import driver as xfoil_driver
+from aerox.polar.polar import Polar
+from aerox.tracing.tracing import span
+
+
+VERSION = 1000
+
+#  parameters of each Reynolds number block, in file order, with their labels
+HEADER = [('reynolds_number', 'Reynolds number'),
+          ('thickness', 'maximum thickness to chord ratio'),
+          ('zero_lift_alpha', 'zero lift alpha (deg)'),
+          ('lift_slope', 'lift curve slope (1/deg)'),
+          ('cl_max', 'maximum lift coefficient'),
+          ('alpha_cl_max', 'positive stall alpha (deg)'),
+          ('cl_min', 'minimum lift coefficient'),
+          ('alpha_cl_min', 'negative stall alpha (deg)'),
+          ('cd_min', 'minimum drag coefficient'),
+          ('cl_cd_min', 'lift coefficient at minimum drag'),
+          ('cm_zero_lift', 'moment coefficient at zero lift')]
+
+
+def default_config():
+    """
+    - reynolds_numbers: low and high Reynolds numbers to tabulate. A single Reynolds number is written to both blocks
+    - mach: freestream Mach number
+    - alphas: alphas solved by xfoil, degrees
+    - alpha_step: spacing of the output table, degrees
+    - workers: number of worker processes, None to use one per CPU
+    - description: description line written to the file
+    - post_stall/cd_max: drag coefficient of the flat plate model at 90 degrees
+    - post_stall/blend_width: angle over which the edge of the xfoil polar blends into the flat plate model, degrees
+    :return: default config as dict
+    """
+    return {'reynolds_numbers': [1e6, 1e7],
+            'mach': 0.0,
+            'alphas': list(np.arange(-20.0, 20.5, 0.5)),
+            'alpha_step': 1.0,
+            'workers': None,
+            'description': 'Generated by aerox',
+            'post_stall': {'cd_max': 1.98,
+                           'blend_width': 8.0}}
+
+
+def export(aerofoil, path, config):
+    """
+    Run xfoil sweeps and write .afl file for a single aerofoil.
+    :param aerofoil: aerox.aerofoil.aerofoil.Aerofoil object.
+    :param path: output path.
+    :param config: config as dict, see default_config() for details.
+    :return: dict mapping Reynolds number to aerox.polar.polar.Polar as solved by xfoil.
+    """
+    return export_all({path: aerofoil}, '', config)[path]
+
+
+def export_all(aerofoils, directory, config):
+    """
+    Run xfoil sweeps for several aerofoils and write one .afl file per aerofoil. Every (aerofoil, Reynolds number)
+    sweep is an independent task in a single process pool.
+    :param aerofoils: dict mapping output file name to aerox.aerofoil.aerofoil.Aerofoil object. '.afl' is appended to
+                      names without an extension.
+    :param directory: output directory.
+    :param config: config as dict, see default_config() for details.
+    :return: dict mapping file name to dict mapping Reynolds number to aerox.polar.polar.Polar as solved by xfoil.
+    """
+    reynolds_numbers = sorted(float(r) for r in config['reynolds_numbers'])
+    if len(reynolds_numbers) not in (1, 2):
+        raise ValueError('Expected one or two Reynolds numbers, got {}'.format(len(reynolds_numbers)))
+    polars = {name: {} for name in aerofoils}
+    with span('afl.export_all', aerofoils = len(aerofoils), reynolds_numbers = len(reynolds_numbers)):
+        with concurrent.futures.ProcessPoolExecutor(max_workers = config['workers']) as executor:
+            futures = {executor.submit(_sweep, aerofoil, reynolds_number, config): (name, reynolds_number)
+                       for name, aerofoil in aerofoils.items()
+                       for reynolds_number in reynolds_numbers}
+            for future in concurrent.futures.as_completed(futures):
+                name, reynolds_number = futures[future]
+                polars[name][reynolds_number] = future.result()
+        polars = {name: {r: polars[name][r] for r in reynolds_numbers} for name in polars}
+
+        for name in aerofoils:
+            filename = name if os.path.splitext(name)[1] else name + '.afl'
+            with span('afl.write', file = filename):
+                with open(os.path.join(directory, filename), 'w') as fd:
+                    write(fd, [polars[name][r] for r in reynolds_numbers], config, thickness(aerofoils[name]))
+    return polars
+
+
+def write(ostream, polars, config, thickness = np.nan):
+    """
+    Write .afl file, streaming one row at a time.
+    :param ostream: output stream.
+    :param polars: list of aerox.polar.polar.Polar objects, one per Reynolds number, in ascending Reynolds number. A
+                   single polar is written to both the low and high Reynolds number blocks.
+    :param config: config as dict, see default_config() for details.
+    :param thickness: maximum thickness to chord ratio of the section, see thickness().
+    :return: None
+    """
+    if len(polars) == 1:
+        polars = [polars[0], polars[0]]
+    if len(polars) != 2:
+        raise ValueError('Expected one or two polars, got {}'.format(len(polars)))
+    alphas = np.arange(-180.0, 180.0 + 0.5 * config['alpha_step'], config['alpha_step'])
+
+    ostream.write('A\n')
+    ostream.write('{} version\n'.format(VERSION))
+    ostream.write('{}\n'.format(config['description']))
+    for polar in polars:
+        cl, cd, cm = full_range(polar, alphas, config)
+        values = parameters(polar, alphas, (cl, cd, cm), thickness)
+        for key, label in HEADER:
+            ostream.write('{:16.6f}  {}\n'.format(values[key], label))
+        ostream.write('{:16d}  table rows\n'.format(len(alphas)))
+        for i in range(len(alphas)):
+            ostream.write('{:8.2f} {:9.5f} {:9.5f} {:9.5f}\n'.format(alphas[i], cl[i], cd[i], cm[i]))
+
+
+def read(file):
+    """
+    Read .afl file written by write().
+    :param file: file-like object.
+    :return: tuple of (description, list of two blocks). Each block is a dict of its HEADER parameters plus alpha, cl,
+             cd and cm arrays.
+    """
+    lines = iter(file)
+    if next(lines).strip() != 'A' or int(next(lines).split()[0]) != VERSION:
+        raise ValueError('Expected X-Plane airfoil file version {}'.format(VERSION))
+    description = next(lines).rstrip('\n')
+    blocks = []
+    for _ in range(2):
+        block = {key: float(next(lines).split()[0]) for key, _ in HEADER}
+        rows = int(next(lines).split()[0])
+        table = np.array([[float(v) for v in next(lines).split()] for _ in range(rows)]).reshape(rows, 4)
+        for k, name in enumerate(('alpha', 'cl', 'cd', 'cm')):
+            block[name] = table[:, k]
+        blocks.append(block)
+    return description, blocks
+
+
+def parameters(polar, alphas, table, thickness = np.nan):
+    """
+    Header parameters of a Reynolds number block. Lift and drag parameters come from the table within the converged
+    range of polar, or within +-20 degrees if fewer than two points converged, so they are always finite.
+    :param polar: aerox.polar.polar.Polar object.
+    :param alphas: alphas of table, degrees.
+    :param table: tuple of (cl, cd, cm) arrays, see full_range().
+    :param thickness: maximum thickness to chord ratio.
+    :return: dict mapping HEADER keys to values.
+    """
+    p = polar.converged_only()
+    if len(p) >= 2:
+        inside = (alphas >= np.min(p.alpha)) & (alphas <= np.max(p.alpha))
+    else:
+        inside = np.abs(alphas) <= 20.0
+    inside &= np.isfinite(table[0])
+    tabulated = Polar(alphas[inside], table[0][inside], table[1][inside], table[2][inside])
+    cl_max, alpha_cl_max = tabulated.cl_max()
+    i_min = int(np.argmin(tabulated.cl))
+    i_cd = int(np.argmin(tabulated.cd))
+    zero_lift_alpha = tabulated.zero_lift_alpha()
+    if not np.isfinite(zero_lift_alpha):
+        zero_lift_alpha = 0.0
+    lift_slope = tabulated.lift_slope((zero_lift_alpha - 5.0, zero_lift_alpha + 5.0))
+    return {'reynolds_number': float(polar.reynolds_number[0]) if len(polar) > 0 else np.nan,
+            'thickness': float(thickness),
+            'zero_lift_alpha': zero_lift_alpha,
+            'lift_slope': lift_slope if np.isfinite(lift_slope) else 0.0,
+            'cl_max': cl_max,
+            'alpha_cl_max': alpha_cl_max,
+            'cl_min': float(tabulated.cl[i_min]),
+            'alpha_cl_min': float(tabulated.alpha[i_min]),
+            'cd_min': float(tabulated.cd[i_cd]),
+            'cl_cd_min': float(tabulated.cl[i_cd]),
+            'cm_zero_lift': float(np.interp(zero_lift_alpha, alphas, table[2]))}
+
+
+def thickness(aerofoil):
+    """
+    :param aerofoil: aerox.aerofoil.aerofoil.Aerofoil object with its chord along the x axis.
+    :return: maximum thickness to chord ratio.
+    """
+    top = np.array([aerofoil.leading_edge] + list(aerofoil.top), dtype = float)
+    bottom = np.array([aerofoil.leading_edge] + list(aerofoil.bottom), dtype = float)
+    top = top[np.argsort(top[:, 0], kind = 'stable')]
+    bottom = bottom[np.argsort(bottom[:, 0], kind = 'stable')]
+    chord = max(top[-1, 0], bottom[-1, 0]) - top[0, 0]
+    return float(np.max(top[:, 1] - np.interp(top[:, 0], bottom[:, 0], bottom[:, 1])) / chord)
+
+
+def full_range(polar, alphas, config):
+    """
+    Extend polar to arbitrary alphas by blending into a flat plate model outside its converged range.
+    :param polar: aerox.polar.polar.Polar object.
+    :param alphas: alphas to evaluate, degrees, within [-180, 180].
+    :param config: config as dict, see default_config() for details.
+    :return: tuple of (cl, cd, cm) arrays, one entry per alpha.
+    """
+    p = polar.converged_only().sorted()
+    model = _flat_plate(alphas, polar, config)
+    if len(p) < 2:
+        return model
+
+    low, high = p.alpha[0], p.alpha[-1]
+    distance = np.maximum(low - alphas, alphas - high)
+    weight = np.clip(distance / config['post_stall']['blend_width'], 0.0, 1.0)
+    out = []
+    for c, m in zip((p.cl, p.cd, p.cm), model):
+        measured = np.interp(alphas, p.alpha, c)  # held constant beyond converged range
+        out.append((1.0 - weight) * measured + weight * m)
+    return tuple(out)
+
+
+def _flat_plate(alphas, polar, config):
+    """
+    Flat plate model of a fully stalled section.
+    :param alphas: alphas, degrees.
+    :param polar: aerox.polar.polar.Polar object, used for the minimum drag coefficient.
+    :param config: config as dict, see default_config() for details.
+    :return: tuple of (cl, cd, cm) arrays.
+    """
+    cd0 = np.nanmin(polar.cd[polar.converged]) if np.any(polar.converged) else 0.01
+    cd_max = config['post_stall']['cd_max']
+    a = np.radians(alphas)
+    normal = cd_max * np.sin(a)
+    cl = normal * np.cos(a)
+    cd = cd0 + cd_max * np.sin(a) ** 2
+    #  centre of pressure moves from quarter chord towards mid chord as the plate turns broadside, and on towards
+    #  three quarter chord when the trailing edge leads
+    folded = np.abs(a)
+    centre = np.where(folded <= 0.5 * np.pi,
+                      0.25 + 0.25 * folded / (0.5 * np.pi),
+                      0.5 + 0.25 * (folded - 0.5 * np.pi) / (0.5 * np.pi))
+    cm = -normal * (centre - 0.25)
+    return cl, cd, cm
+
+
+def _sweep(aerofoil, reynolds_number, config):
+    """
+    Worker task: run xfoil sweep at one Reynolds number.
+    :param aerofoil: aerox.aerofoil.aerofoil.Aerofoil object.
+    :param reynolds_number: Reynolds number.
+    :param config: config as dict, see default_config() for details.
+    :return: aerox.polar.polar.Polar object.
+    """
+    xfoil_config = xfoil_driver.default_config()
+    xfoil_config['alphas'] = copy.copy(config['alphas'])
+    xfoil_config['xfoil']['reynolds_number'] = reynolds_number
+    xfoil_config['xfoil']['mach'] = config['mach']
+    return xfoil_driver.run(xfoil_config, aerofoil)
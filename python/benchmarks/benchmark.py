@@ -0,0 +1,371 @@
+"""
+Benchmark suite for aerox.
+
+Times and tracks peak Python memory allocation of geometry, meshing, parsing and driver orchestration code paths.
+External solvers are replaced by stub executables so that only aerox's own overhead is measured.
+
+Example:
+>>> python benchmarks/benchmark.py                                   # writes benchmarks/results/<commit>.json
+>>> python benchmarks/benchmark.py --compare benchmarks/results/baseline.json
+>>> python benchmarks/benchmark.py --filter mesh --repeat 10
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from aerox.cfd import mesh  # noqa: E402
+from aerox.drivers.gmsh import driver as gmsh_driver  # noqa: E402
+from aerox.drivers.gmsh.geometry import Line  # noqa: E402
+from aerox.drivers.gmsh.geometry import Point  # noqa: E402
+from aerox.drivers.naca456 import driver as naca456_driver  # noqa: E402
+from aerox.drivers.su2 import driver as su2_driver  # noqa: E402
+
+
+FORMAT_VERSION = 1
+
+
+def default_config():
+    """
+    - repeat: number of timed repetitions of each benchmark
+    - warmup: number of untimed repetitions before timing
+    - densities: number of points per aerofoil surface used for geometry and meshing benchmarks
+    - history_rows: number of rows in synthetic SU2 history files
+    - sweep_alphas: number of alphas in the stubbed SU2 sweep
+    - filter: only run benchmarks whose name contains this string, or None to run all
+    :return: default config as dict
+    """
+    return {'repeat': 5,
+            'warmup': 1,
+            'densities': [50, 100, 200, 400],
+            'history_rows': [10000, 100000],
+            'sweep_alphas': 10,
+            'filter': None}
+
+
+def measure(function, config):
+    """
+    Time a callable and record its peak traced memory allocation.
+    :param function: callable taking no arguments.
+    :param config: config as dict, see default_config() for details.
+    :return: dict containing:
+             - seconds: list of wall times, one per repetition
+             - min: fastest repetition, seconds
+             - median: median repetition, seconds
+             - peak_memory_bytes: peak memory allocated by Python during a single repetition
+    """
+    for _ in range(config['warmup']):
+        function()
+
+    seconds = []
+    for _ in range(config['repeat']):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+
+    #  memory is traced in a separate pass because tracemalloc slows execution considerably
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'seconds': seconds,
+            'min': float(np.min(seconds)),
+            'median': float(np.median(seconds)),
+            'peak_memory_bytes': int(peak)}
+
+
+def benchmarks(config, directory):
+    """
+    Set up benchmarks.
+    :param config: config as dict, see default_config() for details.
+    :param directory: scratch directory for stub executables and driver working files.
+    :return: list of (name, callable) tuples.
+    """
+    out = []
+
+    for density in config['densities']:
+        gnu = _naca_gnu(density)
+        out.append(('aerofoil.load_from_gnu[{}]'.format(density), lambda gnu = gnu: _load(gnu)))
+
+    try:
+        import xfoil  # noqa: F401
+        for density in config['densities']:
+            aerofoil = _load(_naca_gnu(density))
+            out.append(('aerofoil.to_xfoil_airfoil[{}]'.format(density), aerofoil.to_xfoil_airfoil))
+    except ImportError:
+        sys.stderr.write('xfoil is not installed, skipping to_xfoil_airfoil benchmarks\n')
+
+    for density in config['densities']:
+        aerofoil = _load(_naca_gnu(density))
+        out.append(('cfd.mesh.aerofoil_geometry[{}]'.format(density),
+                    lambda aerofoil = aerofoil: mesh.aerofoil_geometry(aerofoil, mesh.default_config())))
+
+    def progression_from_width():
+        for i in range(100):
+            line = Line(Point((0, 0, 0)), Point((5, 0, 0)), transfinite = 50)
+            line.progression_from_width(4.2e-5)
+    out.append(('gmsh.geometry.Line.progression_from_width[x100]', progression_from_width))
+
+    for density in config['densities']:
+        geometry = mesh.aerofoil_geometry(_load(_naca_gnu(density)), mesh.default_config())
+
+        def serialise(geometry = geometry):
+            buffer = io.StringIO()
+            for line in geometry:
+                buffer.write(line + '\n')
+        out.append(('geo.serialise[{}]'.format(density), serialise))
+
+    for rows in config['history_rows']:
+        history = _su2_history(rows)
+        out.append(('su2.driver._load_history[{}]'.format(rows),
+                    lambda history = history: su2_driver._load_history(io.StringIO(history),
+                                                                        {'window_iterations': 100})))
+
+    stubs = _stub_executables(directory)
+
+    def naca456_run():
+        naca456_driver.run('2412', {'path': stubs['naca456']})
+    out.append(('naca456.driver.run[stub]', lambda: _in_directory(directory, naca456_run)))
+
+    geometry = mesh.aerofoil_geometry(_load(_naca_gnu(100)), mesh.default_config())
+
+    def gmsh_run():
+        config = gmsh_driver.default_config()
+        config['path'] = stubs['gmsh']
+        config['working_directory'] = directory
+        gmsh_driver.run(geometry, config)
+    out.append(('gmsh.driver.run[stub]', gmsh_run))
+
+    sweep_alphas = config['sweep_alphas']
+
+    def su2_run():
+        config = su2_driver.default_config()
+        config['path'] = stubs['su2']
+        config['alphas'] = list(range(sweep_alphas))
+        config['steady'] = None
+        su2_driver.run(config)
+    out.append(('su2.driver.run[stub,{}]'.format(sweep_alphas), lambda: _in_directory(directory, su2_run)))
+
+    if config['filter'] is not None:
+        out = [(name, function) for name, function in out if config['filter'] in name]
+    return out
+
+
+def run(config):
+    """
+    Run benchmarks.
+    :param config: config as dict, see default_config() for details.
+    :return: results as dict, suitable for serialisation to JSON.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, function in benchmarks(config, directory):
+            results[name] = measure(function, config)
+            sys.stderr.write('{:<55} median {:>10.6f} s  peak {:>12d} B\n'.format(name,
+                                                                                  results[name]['median'],
+                                                                                  results[name]['peak_memory_bytes']))
+            sys.stderr.flush()
+
+    return {'format_version': FORMAT_VERSION,
+            'commit': _git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'config': config,
+            'results': results}
+
+
+def compare(baseline, current, threshold = 0.1):
+    """
+    Compare two sets of benchmark results.
+    :param baseline: baseline results as dict, see run() for details.
+    :param current: current results as dict, see run() for details.
+    :param threshold: fractional increase in median time or peak memory reported as a regression.
+    :return: list of dicts, one per benchmark present in both results, containing:
+             - name: benchmark name
+             - time_ratio: current median time / baseline median time
+             - memory_ratio: current peak memory / baseline peak memory
+             - regression: True if either ratio exceeds 1 + threshold
+    """
+    out = []
+    for name in current['results']:
+        if name not in baseline['results']:
+            continue
+        b = baseline['results'][name]
+        c = current['results'][name]
+        time_ratio = c['median'] / b['median'] if b['median'] > 0 else float('inf')
+        memory_ratio = c['peak_memory_bytes'] / b['peak_memory_bytes'] if b['peak_memory_bytes'] > 0 else 1.0
+        out.append({'name': name,
+                    'time_ratio': time_ratio,
+                    'memory_ratio': memory_ratio,
+                    'regression': time_ratio > 1.0 + threshold or memory_ratio > 1.0 + threshold})
+    return out
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Run aerox benchmarks.')
+    parser.add_argument('--output', help = 'output JSON path, default benchmarks/results/<commit>.json')
+    parser.add_argument('--compare', help = 'baseline JSON to compare against')
+    parser.add_argument('--threshold', type = float, default = 0.1,
+                        help = 'fractional slowdown or memory growth reported as regression')
+    parser.add_argument('--repeat', type = int)
+    parser.add_argument('--filter')
+    args = parser.parse_args(argv)
+
+    config = default_config()
+    if args.repeat is not None:
+        config['repeat'] = args.repeat
+    config['filter'] = args.filter
+
+    results = run(config)
+
+    output = args.output
+    if output is None:
+        output = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'results',
+                              '{}.json'.format(results['commit'] or 'unknown'))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok = True)
+    with open(output, 'w') as fd:
+        json.dump(results, fd, indent = 2)
+    sys.stderr.write('results written to {}\n'.format(output))
+
+    if args.compare is None:
+        return 0
+
+    with open(args.compare, 'r') as fd:
+        baseline = json.load(fd)
+    regressions = 0
+    for entry in compare(baseline, results, args.threshold):
+        flag = 'REGRESSION' if entry['regression'] else ''
+        sys.stdout.write('{:<55} time x{:.3f}  memory x{:.3f}  {}\n'.format(entry['name'],
+                                                                            entry['time_ratio'],
+                                                                            entry['memory_ratio'],
+                                                                            flag))
+        regressions += entry['regression']
+    return 1 if regressions > 0 else 0
+
+
+def _load(gnu):
+    """
+    :param gnu: gnu format aerofoil as string.
+    :return: Aerofoil object.
+    """
+    from aerox.aerofoil.aerofoil import Aerofoil
+    aerofoil = Aerofoil()
+    aerofoil.load_from_gnu(io.StringIO(gnu))
+    return aerofoil
+
+
+def _naca_gnu(n, thickness = 0.12, camber = 0.02, camber_position = 0.4):
+    """
+    Analytic NACA four digit aerofoil in naca456 gnu output format.
+    :param n: number of points on each surface.
+    :param thickness: maximum thickness as fraction of chord.
+    :param camber: maximum camber as fraction of chord.
+    :param camber_position: position of maximum camber as fraction of chord.
+    :return: gnu file contents as string.
+    """
+    x = 0.5 * (1.0 - np.cos(np.linspace(0.0, np.pi, n)))
+    t = 5.0 * thickness * (0.2969 * np.sqrt(x) - 0.1260 * x - 0.3516 * x ** 2 + 0.2843 * x ** 3 - 0.1015 * x ** 4)
+    yc = np.where(x < camber_position,
+                  camber / camber_position ** 2 * (2 * camber_position * x - x ** 2),
+                  camber / (1 - camber_position) ** 2 * (1 - 2 * camber_position + 2 * camber_position * x - x ** 2))
+    lines = ['   {:.6f}  {:.6f}'.format(a, b) for a, b in zip(x, yc + t)]
+    lines.append('')
+    lines += ['   {:.6f}  {:.6f}'.format(a, b) for a, b in zip(x, yc - t)]
+    return '\n'.join(lines) + '\n'
+
+
+def _su2_history(rows):
+    """
+    Synthetic SU2 history file in TECPLOT format.
+    :param rows: number of data rows.
+    :return: file contents as string.
+    """
+    header = 'TITLE = "SU2 Simulation"\n' \
+             'VARIABLES = "Time_Iter","Outer_Iter","Inner_Iter","CD","CL","CMz","CEff"\n'
+    i = np.arange(rows)
+    cd = 0.01 + 1e-4 * np.sin(i)
+    cl = 0.5 + 1e-3 * np.cos(i)
+    data = np.column_stack([i // 50, np.zeros(rows), i % 50, cd, cl, 0.05 + 1e-4 * np.sin(i), cl / cd])
+    buffer = io.StringIO()
+    np.savetxt(buffer, data, delimiter = ',', fmt = '%.8e')
+    return header + buffer.getvalue()
+
+
+def _stub_executables(directory):
+    """
+    Write stub executables that emulate external solvers' file outputs without doing any work.
+    :param directory: directory to write executables to.
+    :return: dict mapping solver name to executable path.
+    """
+    gnu = _naca_gnu(100)
+    history = _su2_history(200)
+    scripts = {'naca456': 'import sys\n'
+                          'sys.stdin.read()\n'
+                          'open("naca.gnu", "w").write({gnu!r})\n'
+                          'open("naca.dbg", "w").close()\n'
+                          'open("naca.out", "w").close()\n'.format(gnu = gnu),
+               'gmsh': 'import sys\n'
+                       'open(sys.argv[sys.argv.index("-o") + 1], "w").close()\n',
+               'su2': 'open("history.dat", "w").write({history!r})\n'.format(history = history)}
+    paths = {}
+    for name, script in scripts.items():
+        path = os.path.join(directory, 'stub_{}'.format(name))
+        with open(path, 'w') as fd:
+            fd.write('#!{}\n'.format(sys.executable))
+            fd.write(script)
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+        paths[name] = path
+    return paths
+
+
+def _in_directory(directory, function):
+    """
+    Call function with directory as the current working directory.
+    :param directory: working directory.
+    :param function: callable taking no arguments.
+    :return: None
+    """
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        function()
+    finally:
+        os.chdir(cwd)
+
+
+def _git_commit():
+    """
+    :return: current git commit hash, or None if not in a git repository.
+    """
+    try:
+        result = subprocess.run(['git', 'rev-parse', 'HEAD'],
+                                stdout = subprocess.PIPE,
+                                stderr = subprocess.PIPE,
+                                cwd = os.path.dirname(os.path.abspath(__file__)))
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.decode().strip()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,4 +5,5 @@ setuptools.setup(name = 'aerox',
                  description = 'Aerodynamics and aircraft design for X-plane',
                  author = '',
                  author_email = '',
-                 packages = setuptools.find_packages())
+                 packages = setuptools.find_packages(),
+                 entry_points = {'console_scripts': ['aerox = aerox.cli.cli:main']})
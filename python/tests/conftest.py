@@ -0,0 +1,79 @@
+import os
+import stat
+import sys
+
+import pytest
+
+
+SU2_STUB = '''
+import os
+import sys
+
+options = {}
+for line in open(sys.argv[1]):
+    if '=' in line:
+        key, value = line.split('=', 1)
+        options[key.strip()] = value.strip()
+steady = options['TIME_DOMAIN'] == 'NO'
+mode = os.environ.get('SU2_STUB_MODE', 'converge')
+with open(os.environ['SU2_STUB_LOG'], 'a') as fd:
+    fd.write('{} {} {}\\n'.format('steady' if steady else 'unsteady', os.getcwd(), options['INC_VELOCITY_INIT']))
+if steady and mode == 'crash_steady':
+    sys.exit(1)
+if not os.path.exists(options['MESH_FILENAME']):
+    sys.exit(2)
+
+rows = ['TITLE = "SU2"']
+if steady:
+    rows.append('VARIABLES = "Inner_Iter","rms[P]","CD","CL","CMz"')
+    for i in range(0, int(options['ITER']), 50):
+        residual = -1.0 if mode == 'stall' and i > 500 else -0.002 * i
+        rows.append('{},{},0.01,0.5,0.1'.format(i, residual))
+else:
+    rows.append('VARIABLES = "Time_Iter","Outer_Iter","Inner_Iter","CD","CL","CMz"')
+    for i in range(1, 20):
+        rows.append('{},0,49,0.02,0.7,0.1'.format(i))
+with open('history.dat', 'w') as fd:
+    fd.write('\\n'.join(rows) + '\\n')
+with open('restart_flow.dat', 'w') as fd:
+    fd.write('restart\\n')
+if 'SURFACE_CSV' in options['OUTPUT_FILES']:
+    with open('surface_flow.csv', 'w') as fd:
+        fd.write('"PointID","x","y","Pressure_Coefficient"\\n1,0.0,0.0,1.0\\n2,0.5,0.05,-1.0\\n3,0.5,-0.05,0.0\\n')
+'''
+
+
+@pytest.fixture
+def su2_stub(tmp_path, monkeypatch):
+    """
+    Stub SU2_CFD executable writing synthetic histories. Each run appends a line to log: solver, working directory and
+    INC_VELOCITY_INIT. SU2_STUB_MODE selects 'converge', 'stall' or 'crash_steady'.
+    :return: tuple of (path of executable, path of log).
+    """
+    path = tmp_path / 'SU2_CFD'
+    path.write_text('#!{}\n{}'.format(sys.executable, SU2_STUB))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    log = tmp_path / 'su2.log'
+    log.write_text('')
+    monkeypatch.setenv('SU2_STUB_LOG', str(log))
+    return str(path), str(log)
+
+
+def runs(log):
+    """
+    :return: list of (solver, working directory, velocity) tuples, one per stub run.
+    """
+    with open(log, 'r') as fd:
+        return [tuple(line.split(' ', 2)) for line in fd.read().splitlines()]
+
+
+@pytest.fixture
+def case(tmp_path, monkeypatch):
+    """
+    Working directory holding an empty mesh.su2.
+    """
+    directory = tmp_path / 'case'
+    directory.mkdir()
+    (directory / 'mesh.su2').write_text('')
+    monkeypatch.chdir(directory)
+    return str(directory)
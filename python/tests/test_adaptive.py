@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from aerox.polar.polar import Polar
+from aerox.sweep import adaptive
+
+
+def test_curvature_bisects_between_converged_points():
+    alpha = [0.0, 2.0, 4.0, 6.0, 8.0]
+    cl = [0.0, np.nan, 0.4, np.nan, 0.5]
+    config = dict(adaptive.default_config(), curvature_tolerance = 0.01)
+    polar = Polar(alpha, cl, np.full(5, 0.01), np.zeros(5))
+    #  convergence boundaries split every interval; curvature at alpha 4 bisects 0-4 and 4-8
+    assert adaptive.refine(polar, config) == pytest.approx([1.0, 2.0, 3.0, 5.0, 6.0, 7.0])
+
+
+def test_sweep_brackets_clmax():
+    def evaluate(alphas):
+        alphas = np.asarray(alphas)
+        cl = np.where(alphas < 12.0, 0.1 * alphas, np.nan)
+        return Polar(alphas, cl, np.full(len(alphas), 0.01), np.zeros(len(alphas)))
+
+    polar = adaptive.sweep(evaluate, adaptive.default_config())
+    converged = polar.alpha[polar.converged]
+    failed = polar.alpha[~polar.converged]
+    assert failed[failed > converged.max()].min() - converged.max() <= 0.25
@@ -0,0 +1,86 @@
+import io
+import os
+import re
+
+import numpy as np
+import pytest
+
+from aerox.polar.polar import Polar
+from aerox.xplane import afl
+
+
+def _polar(reynolds_number):
+    alpha = np.arange(-10.0, 14.5, 0.5)
+    cl = 0.25 + 0.1 * alpha - 0.002 * np.maximum(alpha - 8.0, 0.0) ** 3
+    cd = 0.008 + 0.0002 * (alpha - 2.0) ** 2
+    cm = np.full(len(alpha), -0.05)
+    return Polar(alpha, cl, cd, cm, reynolds_number = reynolds_number)
+
+
+def _write(polars):
+    buffer = io.StringIO()
+    afl.write(buffer, polars, afl.default_config(), thickness = 0.12)
+    buffer.seek(0)
+    return buffer
+
+
+def test_layout_has_low_and_high_reynolds_number_blocks():
+    buffer = _write([_polar(1e6), _polar(1e7)])
+    lines = buffer.getvalue().splitlines()
+    assert lines[:2] == ['A', '1000 version']
+    rows = 361
+    assert len(lines) == 3 + 2 * (len(afl.HEADER) + 1 + rows)
+
+    description, blocks = afl.read(buffer)
+    assert description == 'Generated by aerox'
+    assert [b['reynolds_number'] for b in blocks] == [1e6, 1e7]
+    for block in blocks:
+        assert block['thickness'] == pytest.approx(0.12)
+        assert block['zero_lift_alpha'] == pytest.approx(-2.5, abs = 1e-3)
+        assert block['lift_slope'] == pytest.approx(0.1, abs = 1e-3)
+        assert block['alpha_cl_max'] > 8.0
+        assert block['cl_cd_min'] == pytest.approx(0.45, abs = 1e-3)
+        assert block['alpha'][0] == -180.0 and block['alpha'][-1] == 180.0
+        assert np.all(np.isfinite(block['cl']))
+
+
+def test_single_polar_fills_both_blocks():
+    _, blocks = afl.read(_write([_polar(1e6)]))
+    assert blocks[0]['reynolds_number'] == blocks[1]['reynolds_number'] == 1e6
+    np.testing.assert_array_equal(blocks[0]['cl'], blocks[1]['cl'])
+
+
+def test_more_than_two_polars_rejected():
+    with pytest.raises(ValueError):
+        _write([_polar(1e5), _polar(1e6), _polar(1e7)])
+
+
+def _structure(lines):
+    """
+    :return: lines with numbers replaced by #, and runs of lines of the same form, e.g. table rows, collapsed to one.
+    """
+    out = []
+    for line in lines:
+        form = re.sub(r'[-+]?[0-9]*\.?[0-9]+([eE][-+]?[0-9]+)?', '#', line).split()
+        if len(out) == 0 or out[-1] != form:
+            out.append(form)
+    return out
+
+
+@pytest.mark.skipif('AEROX_XPLANE_AFL' not in os.environ,
+                    reason = 'set AEROX_XPLANE_AFL to a version 1000 .afl file shipped with X-Plane')
+def test_layout_matches_xplane_reference():
+    with open(os.environ['AEROX_XPLANE_AFL'], 'r', errors = 'replace') as fd:
+        reference = fd.read().splitlines()
+    lines = _write([_polar(1e6), _polar(1e7)]).getvalue().splitlines()
+    assert reference[:2] == lines[:2]
+    #  the description line is free text, and the reference tabulates its own alphas
+    assert _structure(reference[3:]) == _structure(lines[3:])
+
+
+def test_structure_ignores_number_of_rows():
+    lines = _write([_polar(1e6), _polar(1e7)]).getvalue().splitlines()
+    header = len(afl.HEADER) + 1
+    fewer = lines[:3 + header] + lines[3 + header:3 + header + 10] + lines[3 + header + 361:]
+    assert _structure(fewer[3:]) == _structure(lines[3:])
+    assert _structure(lines[3:4] + lines[5:]) != _structure(lines[3:])
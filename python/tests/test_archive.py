@@ -0,0 +1,63 @@
+import io
+import os
+
+import numpy as np
+import pytest
+
+from aerox.results.archive import Archive
+from aerox.results.surface import read_su2_surface
+
+
+def test_write_and_read_cases(tmp_path):
+    path = str(tmp_path / 'results.zip')
+    history = tmp_path / 'history.dat'
+    history.write_text('rows\n')
+    with Archive(path, 'a') as archive:
+        archive.write_case('alpha_0.0', {'cp': np.array([1.0, -0.5])}, {'lift': 0.1}, files = {'history.dat': history})
+        with pytest.raises(ValueError):
+            archive.write_case('alpha_0.0')
+    with Archive(path, 'a') as archive:
+        archive.write_case('alpha_2.0', metadata = {'lift': 0.3})
+        assert archive.cases() == ['alpha_0.0', 'alpha_2.0']
+    with Archive(path) as archive:
+        arrays, metadata = archive.read_case('alpha_0.0')
+        assert list(arrays['cp']) == [1.0, -0.5]
+        assert metadata == {'lift': 0.1}
+        assert archive.open_file('alpha_0.0', 'history.dat').read() == 'rows\n'
+    assert sorted(os.listdir(str(tmp_path))) == ['history.dat', 'results.zip']
+
+
+def test_archive_unchanged_until_closed(tmp_path):
+    path = str(tmp_path / 'results.zip')
+    with Archive(path, 'a') as archive:
+        archive.write_case('alpha_0.0', metadata = {'lift': 0.1})
+    before = open(path, 'rb').read()
+
+    archive = Archive(path, 'a')
+    archive.write_case('alpha_2.0', {'cp': np.zeros(1000)})
+    #  a process killed here leaves the archive as it was
+    assert open(path, 'rb').read() == before
+    with Archive(path) as reader:
+        assert reader.cases() == ['alpha_0.0']
+    archive.close()
+    with Archive(path) as reader:
+        assert reader.cases() == ['alpha_0.0', 'alpha_2.0']
+
+
+def test_failed_write_discarded(tmp_path):
+    path = str(tmp_path / 'results.zip')
+    with Archive(path, 'a') as archive:
+        archive.write_case('alpha_0.0')
+    with pytest.raises(FileNotFoundError):
+        with Archive(path, 'a') as archive:
+            archive.write_case('alpha_2.0', files = {'history.dat': str(tmp_path / 'missing.dat')})
+    with Archive(path) as archive:
+        assert archive.cases() == ['alpha_0.0']
+    assert sorted(os.listdir(str(tmp_path))) == ['results.zip']
+
+
+def test_read_su2_surface_requires_a_known_column():
+    surface = read_su2_surface(io.StringIO('"PointID","x","y"\n1,0.5,0.1\n'), quantities = ('x', 'cp'))
+    assert list(surface.keys()) == ['x']
+    with pytest.raises(ValueError, match = 'cp'):
+        read_su2_surface(io.StringIO('"PointID","Pressure"\n1,0.5\n'), quantities = ('cp',))
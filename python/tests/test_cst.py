@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from aerox.optimisation import cst
+
+
+UPPER = np.array([0.17, 0.16, 0.15, 0.14, 0.13, 0.12])
+LOWER = np.array([-0.15, -0.12, -0.1, -0.08, -0.06, -0.04])
+
+
+def test_unit_weights_reproduce_class_function():
+    config = cst.default_config()
+    x, y_upper, y_lower = cst.surfaces(np.ones(6), -np.ones(6), config)
+    assert y_upper.shape == (1, config['points'])
+    assert y_upper[0] == pytest.approx(np.sqrt(x) * (1.0 - x))
+    assert y_lower[0] == pytest.approx(-np.sqrt(x) * (1.0 - x))
+
+
+def test_trailing_edge_thickness():
+    config = dict(cst.default_config(), trailing_edge_thickness = 0.002)
+    _, y_upper, y_lower = cst.surfaces(UPPER, LOWER, config)
+    assert y_upper[0, -1] - y_lower[0, -1] == pytest.approx(0.002)
+    assert y_upper[0, 0] == y_lower[0, 0] == 0.0
+
+
+def test_check_population():
+    config = cst.default_config()
+    upper = np.stack([UPPER, 0.2 * UPPER, UPPER])
+    lower = np.stack([LOWER, 0.2 * LOWER, 1.1 * UPPER])
+    feasible, thickness = cst.check(upper, lower, config, {'min_thickness': 0.05, 'min_local_thickness': 0.0})
+    assert list(feasible) == [True, False, False]
+    assert thickness[1] == pytest.approx(0.2 * thickness[0])
+
+
+def test_project_sensitivity_of_area():
+    #  the sensitivity of the enclosed area to outward normal displacement is the arc length each node represents
+    config = dict(cst.default_config(), points = 400)
+    x, y_upper, y_lower = cst.surfaces(UPPER, LOWER, config)
+    nodes_x = np.concatenate([x, x[1:]])
+    nodes_y = np.concatenate([y_upper[0], y_lower[0, 1:]])
+    sensitivity = np.concatenate([_arc_length(x, y_upper[0]), _arc_length(x, y_lower[0])[1:]])
+    upper_gradient, lower_gradient = cst.project_sensitivity(UPPER, LOWER, nodes_x, nodes_y, sensitivity, config)
+
+    def area(upper, lower):
+        _, yu, yl = cst.surfaces(upper, lower, config)
+        thickness = yu[0] - yl[0]
+        return np.sum(0.5 * (thickness[1:] + thickness[:-1]) * np.diff(x))
+
+    h = 1e-6
+    for k in range(len(UPPER)):
+        step = h * np.eye(len(UPPER))[k]
+        assert upper_gradient[k] == pytest.approx((area(UPPER + step, LOWER) - area(UPPER - step, LOWER)) / (2 * h),
+                                                  rel = 1e-2)
+        assert lower_gradient[k] == pytest.approx((area(UPPER, LOWER + step) - area(UPPER, LOWER - step)) / (2 * h),
+                                                  rel = 1e-2)
+
+
+def test_project_sensitivity_checks_weights():
+    with pytest.raises(ValueError):
+        cst.project_sensitivity(UPPER[:4], LOWER[:4], [0.5], [0.0], [1.0], cst.default_config())
+
+
+def _arc_length(x, y):
+    segments = np.hypot(np.diff(x), np.diff(y))
+    return 0.5 * (np.concatenate([[0.0], segments]) + np.concatenate([segments, [0.0]]))
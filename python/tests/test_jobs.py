@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+
+from aerox.drivers.su2 import driver
+from aerox.drivers.su2 import strategy
+from aerox.sweep import jobs
+
+from conftest import runs
+
+
+def _config(**kwargs):
+    config = jobs.default_config()
+    config.update(poll_seconds = 0.05, **kwargs)
+    return config
+
+
+def test_put_skips_duplicate_keys(tmp_path):
+    with jobs.JobQueue(str(tmp_path / 'q.db')) as queue:
+        first = jobs.enqueue_alphas(queue, 'xfoil', {'config': {}}, [0, 2], key = 'naca0012')
+        second = jobs.enqueue_alphas(queue, 'xfoil', {'config': {}}, [2, 4], key = 'naca0012')
+        assert len(first) == 2
+        assert len(second) == 1
+        assert queue.put('xfoil', {}) is not None
+        assert queue.put('xfoil', {}) is not None
+        assert queue.counts()[jobs.PENDING] == 5
+
+
+def test_lease_is_exclusive(tmp_path):
+    path = str(tmp_path / 'q.db')
+    with jobs.JobQueue(path) as a, jobs.JobQueue(path) as b:
+        a.put('xfoil', {'alpha': 1.0})
+        job = a.lease('a')
+        assert job['payload'] == {'alpha': 1.0}
+        assert job['attempts'] == 1
+        assert b.lease('b') is None
+        assert not b.complete(job['id'], 'b', 1.0)
+        assert a.complete(job['id'], 'a', 1.0)
+        assert [result for _, result in b.results()] == [1.0]
+
+
+def test_expired_lease_is_requeued_until_out_of_attempts(tmp_path):
+    with jobs.JobQueue(str(tmp_path / 'q.db'), _config(lease_seconds = 0.0, max_attempts = 2)) as queue:
+        queue.put('xfoil', {})
+        first = queue.lease('a')
+        time.sleep(0.01)
+        second = queue.lease('b')
+        assert second['id'] == first['id']
+        assert second['attempts'] == 2
+        assert not queue.heartbeat(first['id'], 'a')
+        time.sleep(0.01)
+        assert queue.lease('c') is None
+        assert queue.counts()[jobs.FAILED] == 1
+        assert queue.failures()[0][1] == 'lease expired'
+
+
+def test_failed_job_is_retried(tmp_path):
+    calls = []
+
+    def handler(payload):
+        calls.append(payload)
+        if len(calls) == 1:
+            raise ValueError('first attempt fails')
+        return len(calls)
+
+    path = str(tmp_path / 'q.db')
+    with jobs.JobQueue(path) as queue:
+        queue.put('test', {})
+    assert jobs.work(path, {'test': handler}, _config()) == 1
+    with jobs.JobQueue(path) as queue:
+        assert [result for _, result in queue.results()] == [2]
+
+
+def test_heartbeat_survives_handler_changing_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'case').mkdir()
+    config = _config(lease_seconds = 0.6, heartbeat_seconds = 0.1)
+    calls = []
+
+    def handler(payload):
+        calls.append(payload)
+        os.chdir('case')
+        time.sleep(1.5)
+        return None
+
+    with jobs.JobQueue('q.db', config) as queue:
+        queue.put('test', {})
+    workers = [threading.Thread(target = jobs.work, args = ('q.db', {'test': handler}, config)) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert len(calls) == 1
+    assert not os.path.exists(tmp_path / 'case' / 'q.db')
+    with jobs.JobQueue(str(tmp_path / 'q.db')) as queue:
+        assert queue.counts()[jobs.DONE] == 1
+
+
+def test_su2_job_runs_in_case_directory(su2_stub, tmp_path, monkeypatch):
+    executable, log = su2_stub
+    directory = tmp_path / 'aerofoil'
+    directory.mkdir()
+    (directory / 'mesh.su2').write_text('')
+    monkeypatch.chdir(tmp_path)
+    config = driver.default_config()
+    config['path'] = executable
+    config['steady'] = dict(strategy.default_config(), iterations = 2000)
+    with jobs.JobQueue('q.db') as queue:
+        jobs.enqueue_alphas(queue, 'su2', {'directory': 'aerofoil', 'config': config}, [2.0])
+    assert jobs.work('q.db', config = _config()) == 1
+    assert os.getcwd() == str(tmp_path)
+    [case] = [name for name in os.listdir(directory) if name.startswith('alpha_2.0_')]
+    assert runs(log)[0][1] == str(directory / case)
+    assert os.path.exists(directory / case / 'history_2.0.dat')
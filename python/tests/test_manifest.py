@@ -0,0 +1,62 @@
+import os
+
+from aerox.drivers.su2 import driver
+from aerox.drivers.su2 import manifest
+from aerox.drivers.su2 import strategy
+from aerox.drivers.su2.config import Config
+
+from conftest import runs
+
+
+def _config(executable, **kwargs):
+    config = driver.default_config()
+    config['path'] = executable
+    config['alphas'] = [0.0, 2.0]
+    config['steady'] = dict(strategy.default_config(), iterations = 2000)
+    config['manifest'] = 'sweep.json'
+    config.update(kwargs)
+    return config
+
+
+def test_record_and_reload(tmp_path):
+    path = str(tmp_path / 'sweep.json')
+    artefact = tmp_path / 'history_0.0.dat'
+    artefact.write_text('')
+    m = manifest.Manifest(path)
+    m.record('key', 0.0, {'lift': 0.5, 'drag': 0.01, 'pitching_moment': 0.1, 'solver': 'steady'}, [str(artefact)])
+    entry = manifest.Manifest(path).completed('key')
+    assert entry['coefficients'] == {'lift': 0.5, 'drag': 0.01, 'pitching_moment': 0.1}
+    assert entry['solver'] == 'steady'
+    assert manifest.Manifest(path).completed('other') is None
+    artefact.unlink()
+    assert manifest.Manifest(path).completed('key') is None
+
+
+def test_case_hash_depends_on_inputs():
+    config = driver.default_config()
+    su2_config = Config()
+    key = manifest.case_hash(su2_config, config, 'mesh')
+    assert manifest.case_hash(su2_config, config, 'mesh') == key
+    assert manifest.case_hash(su2_config, config, 'other mesh') != key
+    assert manifest.case_hash(su2_config, dict(config, window_iterations = 10), 'mesh') != key
+    su2_config['ITER'] = '1'
+    assert manifest.case_hash(su2_config, config, 'mesh') != key
+
+
+def test_sweep_resumes_completed_cases(su2_stub, case):
+    executable, log = su2_stub
+    first = driver.run(_config(executable))
+    assert len(runs(log)) == 2
+    second = driver.run(_config(executable, alphas = [0.0, 2.0, 4.0]))
+    assert len(runs(log)) == 3
+    assert list(second.cl[:2]) == list(first.cl)
+    assert second.resources[0] == first.resources[0]
+
+
+def test_sweep_reruns_cases_after_mesh_changes(su2_stub, case):
+    executable, log = su2_stub
+    driver.run(_config(executable))
+    with open(os.path.join(case, 'mesh.su2'), 'w') as fd:
+        fd.write('NDIME= 2\n')
+    driver.run(_config(executable))
+    assert len(runs(log)) == 4
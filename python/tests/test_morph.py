@@ -0,0 +1,93 @@
+import io
+import os
+
+import numpy as np
+import pytest
+
+from aerox.aerofoil.aerofoil import Aerofoil
+from aerox.cfd import morph
+
+
+#  diamond section in an annulus of two quadrilaterals and four triangles, far field nodes 4 to 7
+MESH = """\
+NDIME= 2
+NELEM= 6
+9 0 1 5 4 0
+9 1 2 6 5 1
+5 2 3 7 2
+5 2 7 6 3
+5 3 0 4 4
+5 3 4 7 5
+NPOIN= 8
+0 0 0
+0.5 0.05 1
+1 0 2
+0.5 -0.05 3
+-2 0 4
+0.5 2 5
+3 0 6
+0.5 -2 7
+NMARK= 2
+MARKER_TAG= aerofoil
+MARKER_ELEMS= 4
+3 0 1
+3 1 2
+3 2 3
+3 3 0
+MARKER_TAG= far_field
+MARKER_ELEMS= 4
+3 4 5
+3 5 6
+3 6 7
+3 7 4
+"""
+
+
+def _diamond(thickness):
+    aerofoil = Aerofoil()
+    aerofoil.load_from_surfaces([(0.0, 0.0), (0.5, 0.5 * thickness), (1.0, 0.0)],
+                                [(0.0, 0.0), (0.5, -0.5 * thickness), (1.0, 0.0)])
+    return aerofoil
+
+
+def test_read_write_round_trip():
+    mesh = morph.read_su2(io.StringIO(MESH))
+    assert mesh['nodes'].shape == (8, 2)
+    assert list(mesh['types']) == [9, 9, 5, 5, 5, 5]
+    assert list(mesh['elements'][2]) == [2, 3, 7, -1]
+    assert mesh['markers']['far_field'].tolist() == [[4, 5], [5, 6], [6, 7], [7, 4]]
+
+    out = io.StringIO()
+    morph.write_su2(mesh, out)
+    again = morph.read_su2(io.StringIO(out.getvalue()))
+    assert np.array_equal(again['nodes'], mesh['nodes'])
+    assert np.array_equal(again['elements'], mesh['elements'])
+    assert again['markers'].keys() == mesh['markers'].keys()
+
+
+def test_read_rejects_3d_mesh():
+    with pytest.raises(ValueError):
+        morph.read_su2(io.StringIO('NDIME= 3\n'))
+
+
+def test_morph_moves_wall_and_holds_far_field():
+    mesh = morph.read_su2(io.StringIO(MESH))
+    morphed, issues = morph.morph(mesh, _diamond(0.1), _diamond(0.2), morph.default_config())
+    assert issues == []
+    assert morphed['nodes'][:4] == pytest.approx(np.array([[0.0, 0.0], [0.5, 0.1], [1.0, 0.0], [0.5, -0.1]]))
+    assert np.array_equal(morphed['nodes'][4:], mesh['nodes'][4:])
+
+
+def test_morph_reports_inverted_elements():
+    mesh = morph.read_su2(io.StringIO(MESH))
+    _, issues = morph.morph(mesh, _diamond(0.1), _diamond(5.0), morph.default_config())
+    assert any('inverted' in issue for issue in issues)
+
+
+def test_run_writes_morphed_mesh(tmp_path):
+    baseline = {'aerofoil': _diamond(0.1), 'mesh': morph.read_su2(io.StringIO(MESH))}
+    config = dict(morph.default_config(), working_directory = str(tmp_path))
+    outcome = morph.run(_diamond(0.12), baseline, config)
+    assert outcome == {'method': 'morphed', 'issues': [], 'resources': None}
+    with open(os.path.join(str(tmp_path), 'mesh.su2'), 'r') as fd:
+        assert morph.read_su2(fd)['nodes'][1].tolist() == pytest.approx([0.5, 0.06])
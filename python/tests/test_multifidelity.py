@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from aerox.aerofoil.aerofoil import Aerofoil
+from aerox.drivers.su2 import driver as su2
+from aerox.drivers.xfoil import driver as xfoil
+from aerox.polar.polar import Polar
+from aerox.sweep import multifidelity
+
+
+def _xfoil_polar(alphas):
+    alphas = np.asarray(alphas, dtype = float)
+    cl = np.where(alphas <= 12.0, 0.1 * alphas, 1.2 - 0.05 * (alphas - 12.0))
+    cl = np.where(alphas == 4.0, np.nan, cl)
+    return Polar(alphas, cl, 0.01 + 0.0 * alphas, -0.05 + 0.0 * alphas, fidelity = 'xfoil')
+
+
+@pytest.fixture
+def solvers(monkeypatch):
+    calls = {'xfoil': [], 'su2': []}
+
+    def run_xfoil(config, aerofoil):
+        calls['xfoil'].append(list(config['alphas']))
+        return _xfoil_polar(config['alphas'])
+
+    def run_su2(config):
+        calls['su2'].append(list(config['alphas']))
+        alphas = np.asarray(config['alphas'], dtype = float)
+        return Polar(alphas, 0.1 * alphas + 0.02, 0.012 + 0.0 * alphas, -0.04 + 0.0 * alphas, fidelity = 'su2')
+
+    monkeypatch.setattr(xfoil, 'run', run_xfoil)
+    monkeypatch.setattr(su2, 'run', run_su2)
+    return calls
+
+
+def test_default_config_defers_to_xfoil_alphas(solvers):
+    config = multifidelity.default_config()
+    config['xfoil']['alphas'] = [0.0, 2.0, 4.0]
+    polar = multifidelity.run(config, aerofoil = Aerofoil())
+    assert solvers['xfoil'] == [[0.0, 2.0, 4.0]]
+    assert len(polar) == 3
+
+
+def test_unconverged_and_stall_points_run_with_su2(solvers):
+    config = multifidelity.default_config()
+    config['alphas'] = list(range(-4, 17, 2))
+    polar = multifidelity.run(config, aerofoil = Aerofoil())
+    assert solvers['su2'] == [[4.0, 10.0, 12.0, 14.0, 16.0]]
+    assert list(polar.fidelity[polar.alpha == 4.0]) == ['su2']
+    assert list(polar.fidelity[polar.alpha == 2.0]) == ['xfoil']
+    assert polar.cl[polar.alpha == 12.0][0] == pytest.approx(1.22)
+
+
+def test_correction_fitted_to_reference_shifts_xfoil_points(solvers):
+    config = multifidelity.default_config()
+    config['alphas'] = [0.0, 2.0, 6.0, 8.0]
+    config['stall_margin'] = 0.0
+    config['correction']['lift_tolerance'] = 0.05
+    reference = Polar([0.0, 2.0, 6.0, 8.0], [0.03, 0.23, 0.63, 0.83], [0.01] * 4, [-0.05] * 4, fidelity = 'su2')
+    polar = multifidelity.run(config, aerofoil = Aerofoil(), reference = reference)
+    assert solvers['su2'] == []
+    assert list(polar.fidelity) == ['xfoil_corrected'] * 4
+    np.testing.assert_allclose(polar.cl, [0.03, 0.23, 0.63, 0.83])
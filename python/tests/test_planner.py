@@ -0,0 +1,104 @@
+import os
+
+import numpy as np
+import pytest
+
+from aerox.aerofoil.aerofoil import Aerofoil
+from aerox.drivers.su2 import driver as su2
+from aerox.drivers.su2 import strategy
+from aerox.polar.polar import Polar
+from aerox.sweep import jobs
+from aerox.sweep import planner
+
+from conftest import runs
+
+
+def _aerofoil(camber = 0.0):
+    x = 0.5 * (1.0 - np.cos(np.linspace(0.0, np.pi, 41)))
+    thickness = 0.6 * (0.2969 * np.sqrt(x) - 0.126 * x - 0.3516 * x ** 2 + 0.2843 * x ** 3 - 0.1036 * x ** 4)
+    aerofoil = Aerofoil()
+    aerofoil.load_from_surfaces(np.column_stack([x, camber * x * (1.0 - x) + thickness]),
+                                np.column_stack([x, camber * x * (1.0 - x) - thickness]))
+    return aerofoil
+
+
+def _solve(group):
+    alphas = np.asarray(group['alphas'], dtype = float)
+    return Polar(alphas, 0.1 * alphas + 0.2, 0.01 + 0.001 * alphas ** 2, -0.05 + 0.0 * alphas, fidelity = 'xfoil')
+
+
+def test_is_symmetric():
+    assert planner.is_symmetric(_aerofoil())
+    assert not planner.is_symmetric(_aerofoil(camber = 0.08))
+
+
+def test_plan_deduplicates_and_mirrors():
+    config = {'airspeed': 50.0}
+    sweeps = [{'kind': 'xfoil', 'aerofoil': _aerofoil(), 'config': dict(config, alphas = [-4, -2, 0, 2, 4])},
+              {'kind': 'xfoil', 'aerofoil': _aerofoil(), 'config': dict(config, alphas = [2, 6], path = 'xfoil')},
+              {'kind': 'xfoil', 'aerofoil': _aerofoil(0.08), 'config': dict(config, alphas = [-2, 2])}]
+    plan = planner.plan(sweeps)
+    assert len(plan['groups']) == 2
+    assert plan['groups'][0]['alphas'] == [0.0, 2.0, 4.0, 6.0]
+    assert plan['groups'][1]['alphas'] == [-2.0, 2.0]
+    assert plan['statistics'] == {'requested': 9, 'solved': 6, 'mirrored': 2}
+
+    symmetric, repeated, cambered = planner.run(plan, _solve)
+    assert list(symmetric.alpha) == [-4.0, -2.0, 0.0, 2.0, 4.0]
+    assert list(symmetric.cl) == pytest.approx([-0.6, -0.4, 0.2, 0.4, 0.6])
+    assert list(symmetric.cd) == pytest.approx([0.026, 0.014, 0.01, 0.014, 0.026])
+    assert list(symmetric.cm) == pytest.approx([0.05, 0.05, -0.05, -0.05, -0.05])
+    assert list(repeated.alpha) == [2.0, 6.0]
+    assert list(cambered.cl) == pytest.approx([0.0, 0.4])
+
+
+def test_expand_marks_missing_cases_unconverged():
+    sweeps = [{'kind': 'xfoil', 'aerofoil': _aerofoil(0.08), 'config': {'alphas': [0, 2]}}]
+    plan = planner.plan(sweeps)
+    [polar] = planner.expand(plan, [Polar([2.0], [0.4], [0.01], [-0.05])])
+    assert np.isnan(polar.cl[0])
+    assert polar.cl[1] == pytest.approx(0.4)
+
+
+def _su2_sweeps(tmp_path, executable, directories, airspeeds):
+    sweeps = []
+    for directory, airspeed in zip(directories, airspeeds):
+        os.makedirs(tmp_path / directory, exist_ok = True)
+        (tmp_path / directory / 'mesh.su2').write_text(directory)
+        config = su2.default_config()
+        config['path'] = executable
+        config['alphas'] = [2.0]
+        config['airspeed'] = airspeed
+        config['steady'] = dict(strategy.default_config(), iterations = 2000)
+        sweeps.append({'kind': 'su2', 'aerofoil': _aerofoil(0.08), 'config': config, 'directory': directory})
+    return sweeps
+
+
+def test_su2_groups_run_in_own_directories(su2_stub, tmp_path, monkeypatch):
+    executable, log = su2_stub
+    monkeypatch.chdir(tmp_path)
+    sweeps = _su2_sweeps(tmp_path, executable, ['a', 'b', 'b'], [50.0, 50.0, 30.0])
+    plan = planner.plan(sweeps)
+    assert len(plan['groups']) == 3
+    polars = planner.run(plan)
+    directories = [run[1] for run in runs(log)]
+    assert len(set(directories)) == 3
+    assert [os.path.dirname(d) for d in directories] == [str(tmp_path / d) for d in ('a', 'b', 'b')]
+    assert [polar.cl[0] for polar in polars] == pytest.approx([0.5, 0.5, 0.5])
+    assert os.getcwd() == str(tmp_path)
+
+
+def test_enqueued_su2_groups_sharing_directory_do_not_collide(su2_stub, tmp_path, monkeypatch):
+    executable, log = su2_stub
+    monkeypatch.chdir(tmp_path)
+    plan = planner.plan(_su2_sweeps(tmp_path, executable, ['b', 'b'], [50.0, 30.0]))
+    with jobs.JobQueue('q.db') as queue:
+        assert len(planner.enqueue(queue, plan)) == 2
+        assert len(planner.enqueue(queue, plan)) == 0
+    config = jobs.default_config()
+    config['poll_seconds'] = 0.05
+    assert jobs.work('q.db', config = config) == 2
+    assert len(set(run[1] for run in runs(log))) == 2
+    with jobs.JobQueue('q.db') as queue:
+        polars = planner.collect(queue, plan)
+    assert [len(polar) for polar in polars] == [1, 1]
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from aerox.polar.polar import Polar
+from aerox.polar.polar import concatenate
+
+
+def _polar(alphas, reynolds_number = 1e6, fidelity = 'xfoil'):
+    alphas = np.asarray(alphas, dtype = float)
+    return Polar(alphas, 0.1 * alphas + 0.2, 0.01 + 0.0 * alphas, -0.05 + 0.0 * alphas,
+                 reynolds_number = reynolds_number,
+                 resources = [{'alpha': a} for a in alphas],
+                 surfaces = [{'x': np.array([a])} for a in alphas],
+                 fidelity = fidelity)
+
+
+def test_unconverged_points():
+    polar = Polar([0.0, 2.0], [0.2, np.nan], [0.01, np.nan], [-0.05, np.nan])
+    assert list(polar.converged) == [True, False]
+    assert polar[1] is None
+    assert polar[0] == {'lift': 0.2, 'drag': 0.01, 'pitching_moment': -0.05}
+    assert len(polar.converged_only()) == 1
+
+
+def test_concatenate_keeps_per_point_columns():
+    polar = concatenate([_polar([4.0, 2.0]), _polar([0.0], reynolds_number = 2e6, fidelity = 'su2')])
+    assert list(polar.alpha) == [4.0, 2.0, 0.0]
+    assert list(polar.reynolds_number) == [1e6, 1e6, 2e6]
+    assert list(polar.fidelity) == ['xfoil', 'xfoil', 'su2']
+    assert [r['alpha'] for r in polar.resources] == [4.0, 2.0, 0.0]
+    assert [s['x'][0] for s in polar.surfaces] == [4.0, 2.0, 0.0]
+    assert len(concatenate([])) == 0
+
+
+def test_take_and_sorted():
+    polar = concatenate([_polar([4.0, 2.0]), _polar([0.0], fidelity = 'su2')])
+    sorted_polar = polar.sorted()
+    assert list(sorted_polar.alpha) == [0.0, 2.0, 4.0]
+    assert list(sorted_polar.fidelity) == ['su2', 'xfoil', 'xfoil']
+    assert [r['alpha'] for r in sorted_polar.resources] == [0.0, 2.0, 4.0]
+    masked = polar.take(polar.alpha > 1.0)
+    assert list(masked.alpha) == [4.0, 2.0]
+    assert list(masked.cl) == pytest.approx([0.6, 0.4])
+
+
+def test_summary_quantities():
+    polar = _polar(np.arange(-6.0, 7.0))
+    assert polar.zero_lift_alpha() == pytest.approx(-2.0)
+    assert polar.lift_slope() == pytest.approx(0.1)
+    assert polar.cl_max() == pytest.approx((0.8, 6.0))
+    assert polar.lift_to_drag()[-1] == pytest.approx(80.0)
+
+
+def test_index_with_slices_and_masks():
+    polar = _polar([0.0, 2.0, 4.0, 6.0])
+    assert polar[np.int64(1)]['lift'] == pytest.approx(0.4)
+    assert list(polar[1:3].alpha) == [2.0, 4.0]
+    assert list(polar[::-1].alpha) == [6.0, 4.0, 2.0, 0.0]
+    assert list(polar[[0, 3]].cl) == pytest.approx([0.2, 0.8])
+    assert list(polar[polar.alpha > 3.0].alpha) == [4.0, 6.0]
+    assert [p['lift'] for p in polar[2:]] == pytest.approx([0.6, 0.8])
@@ -0,0 +1,83 @@
+import os
+
+import numpy as np
+import pytest
+
+from aerox.polar.polar import Polar
+from aerox.polar.polar import concatenate
+from aerox.polar.store import PolarStore
+
+
+def _polar(reynolds_number, scale = 1.0):
+    alphas = np.array([4.0, 0.0, 8.0, 12.0])
+    cl = scale * np.array([0.6, 0.2, 1.0, np.nan])
+    return Polar(alphas, cl, [0.012, 0.01, 0.02, np.nan], [-0.05] * 4, reynolds_number = reynolds_number, mach = 0.1,
+                 fidelity = 'xfoil')
+
+
+def test_append_and_select(tmp_path):
+    path = str(tmp_path / 'study.polars')
+    with PolarStore(path, 'a') as store:
+        assert store.append('a' * 40, concatenate([_polar(1e6), _polar(2e6)])) == [0, 1]
+        assert store.append('b' * 40, _polar(1e6, scale = 1.5)) == [2]
+
+    store = PolarStore(path)
+    assert len(store) == 3
+    assert list(store.select(reynolds_number = 1e6)) == [0, 2]
+    assert list(store.select(digest = 'a' * 40)) == [0, 1]
+    assert list(store.select(cl_max = (1.2, None))) == [2]
+    assert list(store.select(reynolds_number = 2e6, mach = 0.1, cd_min = (None, 0.01))) == [1]
+    assert store.index['cl_max'][0] == pytest.approx(1.0)
+    assert store.index['alpha_cl_max'][0] == 8.0
+
+    polar = store.polar(2)
+    assert list(polar.alpha) == [0.0, 4.0, 8.0, 12.0]
+    assert list(polar.cl[:3]) == pytest.approx([0.3, 0.9, 1.5])
+    assert list(polar.converged) == [True, True, True, False]
+    assert list(polar.fidelity) == ['xfoil'] * 4
+    assert polar.reynolds_number[0] == 1e6
+
+
+def test_uncommitted_points_are_truncated(tmp_path):
+    path = str(tmp_path / 'study.polars')
+    with PolarStore(path, 'a') as store:
+        store.append('a' * 40, _polar(1e6))
+    #  points of an append interrupted before its index record
+    with open(os.path.join(path, 'alpha.bin'), 'ab') as fd:
+        fd.write(np.zeros(3).tobytes())
+    with PolarStore(path, 'a') as store:
+        store.append('b' * 40, _polar(2e6))
+        assert list(store.polar(1).alpha) == [0.0, 4.0, 8.0, 12.0]
+    assert os.path.getsize(os.path.join(path, 'alpha.bin')) == 8 * 8
+
+
+def test_read_only(tmp_path):
+    with pytest.raises(ValueError):
+        PolarStore(str(tmp_path / 'missing'))
+    with PolarStore(str(tmp_path / 'study.polars'), 'a'):
+        pass
+    with pytest.raises(ValueError):
+        PolarStore(str(tmp_path / 'study.polars')).append('a' * 40, _polar(1e6))
+
+
+def test_rejected_append_leaves_no_points(tmp_path):
+    path = str(tmp_path / 'study.polars')
+    with PolarStore(path, 'a') as store:
+        with pytest.raises(ValueError):
+            store.append('a' * 41, _polar(1e6))
+        assert os.path.getsize(os.path.join(path, 'alpha.bin')) == 0
+        store.append('a' * 40, _polar(2e6, scale = 2.0))
+        polar = store.polar(0)
+    assert list(polar.alpha) == [0.0, 4.0, 8.0, 12.0]
+    assert list(polar.cl[:3]) == pytest.approx([0.4, 1.2, 2.0])
+    assert polar.reynolds_number[0] == 2e6
+
+
+def test_append_overwrites_points_left_in_open_store(tmp_path):
+    path = str(tmp_path / 'study.polars')
+    with PolarStore(path, 'a') as store:
+        with open(os.path.join(path, 'cl.bin'), 'ab') as fd:
+            fd.write(np.full(3, 9.0).tobytes())
+        store.append('a' * 40, _polar(1e6))
+        assert list(store.polar(0).cl[:3]) == pytest.approx([0.2, 0.6, 1.0])
+    assert os.path.getsize(os.path.join(path, 'cl.bin')) == 4 * 8
@@ -0,0 +1,29 @@
+import numpy as np
+
+from aerox.drivers.su2 import strategy
+
+
+def _history(residual, lift):
+    history = np.zeros(len(lift), dtype = [('Inner_Iter', int), ('rms[P]', float), ('CL', float)])
+    history['Inner_Iter'] = np.arange(len(lift))
+    history['rms[P]'] = residual
+    history['CL'] = lift
+    return history
+
+
+def test_converged_solution_with_creeping_lift_is_accepted():
+    iterations = np.arange(2000)
+    history = _history(-4.0 * iterations / 2000, 0.5 + 1e-4 * iterations / 500)
+    assert strategy.assess(history, strategy.default_config()) is None
+
+
+def test_creeping_lift_is_not_oscillating():
+    iterations = np.arange(2000)
+    history = _history(-1.0 * iterations / 2000, 0.5 + 1e-3 * iterations / 500)
+    assert strategy.assess(history, strategy.default_config()) == 'not_converged'
+
+
+def test_oscillating_lift():
+    iterations = np.arange(2000)
+    history = _history(-1.0 * iterations / 2000, 0.5 + 0.01 * np.sin(iterations / 20.0))
+    assert strategy.assess(history, strategy.default_config()) == 'oscillating'
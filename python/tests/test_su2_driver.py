@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from aerox.drivers.su2 import driver
+from aerox.drivers.su2 import strategy
+from aerox.results.archive import Archive
+
+from conftest import runs
+
+
+def _config(executable, **kwargs):
+    config = driver.default_config()
+    config['path'] = executable
+    config['alphas'] = [0.0, 2.0]
+    config['steady'] = dict(strategy.default_config(), iterations = 2000)
+    config.update(kwargs)
+    return config
+
+
+def test_archive_reused_after_inputs_change(su2_stub, case):
+    executable, log = su2_stub
+    driver.run(_config(executable, archive = 'results.zip'))
+    polar = driver.run(_config(executable, archive = 'results.zip', airspeed = 30.0))
+    assert len(polar) == 2
+    with Archive('results.zip') as archive:
+        assert len(archive.cases()) == 4
+    assert len(runs(log)) == 4
+
+
+def test_archive_resumes_without_manifest(su2_stub, case):
+    executable, log = su2_stub
+    first = driver.run(_config(executable, archive = 'results.zip', surface = True))
+    second = driver.run(_config(executable, archive = 'results.zip', surface = True, manifest = 'sweep.json'))
+    assert len(runs(log)) == 2
+    assert list(second.cl) == list(first.cl)
+    assert list(second.surfaces[1]['cp']) == [1.0, -1.0, 0.0]
+    assert os.path.exists('sweep.json')
+    driver.run(_config(executable, archive = 'results.zip', manifest = 'sweep.json', surface = True))
+    assert len(runs(log)) == 2
+
+
+def test_steady_failure_escalates_to_unsteady(su2_stub, case, monkeypatch):
+    executable, log = su2_stub
+    monkeypatch.setenv('SU2_STUB_MODE', 'crash_steady')
+    polar = driver.run(_config(executable, alphas = [4.0]))
+    assert [run[0] for run in runs(log)] == ['steady', 'unsteady']
+    assert polar.cl[0] == pytest.approx(0.7)
+    assert polar.resources[0]['attempts'][0]['exit_status'] == 1
+
+
+def test_steady_solution_accepted(su2_stub, case):
+    executable, log = su2_stub
+    polar = driver.run(_config(executable, alphas = [4.0]))
+    assert [run[0] for run in runs(log)] == ['steady']
+    assert polar.cl[0] == pytest.approx(0.5)
+
+
+def test_stalled_steady_solve_escalates(su2_stub, case, monkeypatch):
+    executable, log = su2_stub
+    monkeypatch.setenv('SU2_STUB_MODE', 'stall')
+    driver.run(_config(executable, alphas = [4.0], manifest = 'sweep.json'))
+    assert [run[0] for run in runs(log)] == ['steady', 'unsteady']
+
+
+def test_runs_in_working_directory(su2_stub, case, tmp_path, monkeypatch):
+    executable, log = su2_stub
+    monkeypatch.chdir(tmp_path)
+    polar = driver.run(_config(executable, working_directory = case, surface = True, archive = 'results.zip'))
+    assert [run[1] for run in runs(log)] == [case, case]
+    assert list(polar.surfaces[0]['cp']) == [1.0, -1.0, 0.0]
+    assert os.path.exists(tmp_path / 'results.zip')
+    assert sorted(os.listdir(case)) == ['config.cfg', 'mesh.su2']
+
+
+def test_scratch_artefacts_retrieved_to_working_directory(su2_stub, case, tmp_path):
+    executable, log = su2_stub
+    config = _config(executable, alphas = [4.0], surface = True)
+    config['storage'] = dict(config['storage'], scratch = str(tmp_path / 'scratch'), compress = True)
+    polar = driver.run(config)
+    assert runs(log)[0][1].startswith(str(tmp_path / 'scratch'))
+    assert sorted(os.listdir(case)) == ['history_4.0.dat.gz', 'mesh.su2', 'surface_flow_4.0.csv.gz']
+    assert os.listdir(tmp_path / 'scratch') == []
+    assert list(polar.surfaces[0]['cp']) == [1.0, -1.0, 0.0]
+
+
+def test_steady_first_is_opt_in(su2_stub, case):
+    executable, log = su2_stub
+    config = _config(executable, alphas = [4.0])
+    config['steady'] = driver.default_config()['steady']
+    driver.run(config)
+    assert [run[0] for run in runs(log)] == ['unsteady']
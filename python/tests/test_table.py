@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from aerox.polar import table
+from aerox.polar.polar import Polar
+
+
+def _polar(reynolds_number, mach):
+    alphas = np.arange(-4.0, 9.0)
+    cl = 0.1 * alphas + 0.1 * np.log10(reynolds_number) + mach
+    return Polar(alphas, cl, 0.01 + 0.0 * alphas, -0.05 + 0.0 * alphas, reynolds_number = reynolds_number, mach = mach)
+
+
+def _config(**kwargs):
+    config = table.default_config()
+    config.update(alphas = list(np.arange(-4.0, 9.0)), dtype = 'float64', **kwargs)
+    return config
+
+
+def test_query_interpolates_linearly_in_log_reynolds():
+    t = table.build([_polar(1e5, 0.0), _polar(1e7, 0.0), _polar(1e5, 0.2), _polar(1e7, 0.2)], _config())
+    cl, cd, cm = t.query([1.5, 1.5], [1e6, 1e6], [0.1, 0.1])
+    assert list(cl) == pytest.approx([0.15 + 0.6 + 0.1] * 2)
+    assert list(cd) == pytest.approx([0.01, 0.01])
+    assert list(cm) == pytest.approx([-0.05, -0.05])
+
+
+def test_query_broadcasts_and_clamps():
+    t = table.build([_polar(1e5, 0.0), _polar(1e7, 0.0)], _config(chunk_size = 3))
+    cl, _, _ = t.query(np.array([[-10.0], [2.0]]), [1e4, 1e8], 0.3)
+    assert cl.shape == (2, 2)
+    assert cl == pytest.approx(np.array([[-0.4 + 0.5, -0.4 + 0.7], [0.2 + 0.5, 0.2 + 0.7]]))
+
+
+def test_missing_nodes_are_filled_across_reynolds_number():
+    t = table.build([_polar(1e5, 0.0), _polar(1e7, 0.0), _polar(1e7, 0.2)], _config())
+    assert not np.any(np.isnan(t.coefficients))
+    #  only Re 1e7 has data at Mach 0.2, so it is held constant down to Re 1e5
+    cl, _, _ = t.query(0.0, 1e5, 0.2)
+    assert cl == pytest.approx(0.7 + 0.2)
+
+
+def test_resample_and_save(tmp_path):
+    t = table.build([_polar(1e5, 0.0), _polar(1e7, 0.0)], _config(reynolds_numbers = [1e5, 1e6, 1e7]))
+    assert list(t.reynolds_numbers) == [1e5, 1e6, 1e7]
+    t.save(str(tmp_path / 'table.npz'))
+    loaded = table.LookupTable.load(str(tmp_path / 'table.npz'))
+    assert loaded.query(2.0, 1e6, 0.0)[0] == pytest.approx(0.2 + 0.6)
+
+
+def test_build_rejects_polars_without_flow_conditions():
+    with pytest.raises(ValueError):
+        table.build([Polar([0.0], [0.1], [0.01], [0.0])], _config())
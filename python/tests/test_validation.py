@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from aerox.aerofoil.aerofoil import Aerofoil
+from aerox.cfd import mesh
+from aerox.cfd import validation
+from aerox.drivers.gmsh.geometry import Line
+from aerox.drivers.gmsh.geometry import Loop
+from aerox.drivers.gmsh.geometry import Point
+
+
+def _naca(notch = None):
+    x = 0.5 * (1.0 - np.cos(np.linspace(0.0, np.pi, 61)))
+    thickness = 0.6 * (0.2969 * np.sqrt(x) - 0.126 * x - 0.3516 * x ** 2 + 0.2843 * x ** 3 - 0.1036 * x ** 4)
+    top = thickness.copy()
+    if notch is not None:
+        top[notch] = -2.0 * thickness[notch]  # upper surface dips through the lower surface
+    aerofoil = Aerofoil()
+    aerofoil.load_from_surfaces(np.column_stack([x, top]), np.column_stack([x, -thickness]))
+    return aerofoil
+
+
+def _blocks(aerofoil):
+    """
+    :return: blocks of the C-grid of aerofoil, as validated by aerox.cfd.mesh.aerofoil_geometry().
+    """
+    blocks = {}
+    config = mesh.default_config()
+    original = validation.validate
+    validation.validate = lambda b, c = None: blocks.update(b)
+    try:
+        mesh.aerofoil_geometry(aerofoil, config)
+    finally:
+        validation.validate = original
+    return blocks
+
+
+def _quad(corners, order = (0, 1, 2, 3)):
+    points = [Point([x, y, 0.0]) for x, y in corners]
+    lines = [Line(points[i], points[(i + 1) % 4]) for i in range(4)]
+    return {'points': {'all': points}, 'curves': {'all': lines}, 'loops': {'all': [Loop([lines[i].id for i in order])]}}
+
+
+def test_naca_section_is_valid():
+    assert validation.check(_blocks(_naca())) == []
+    assert len(mesh.aerofoil_geometry(_naca(), mesh.default_config())) > 0
+
+
+def test_self_intersecting_section_is_rejected():
+    issues = validation.check(_blocks(_naca(notch = 30)))
+    assert any('crosses' in issue for issue in issues)
+    with pytest.raises(ValueError, match = 'Mesh geometry is invalid'):
+        mesh.aerofoil_geometry(_naca(notch = 30), mesh.default_config())
+
+
+def test_loops_checked_against_own_orientation():
+    clockwise = _quad([(0.0, 0.0), (0.0, 1.0), (1.0, 1.0), (1.0, 0.0)])
+    anticlockwise = _quad([(2.0, 0.0), (3.0, 0.0), (3.0, 1.0), (2.0, 1.0)], order = (2, 0, 3, 1))
+    assert validation.check({'a': clockwise, 'b': anticlockwise}) == []
+
+
+def test_defective_loops_are_reported():
+    bowtie = _quad([(0.0, 0.0), (1.0, 1.0), (1.0, 0.0), (0.0, 1.0)])
+    issues = validation.check({'bowtie': bowtie})
+    assert any('degenerate' in issue for issue in issues)
+    assert any('crosses' in issue for issue in issues)
+
+    dart = _quad([(0.0, 0.0), (2.0, 0.0), (0.5, 0.5), (0.0, 2.0)])
+    assert validation.check({'dart': dart}) == ['loop {} (dart/all[0]) has an inverted corner at (0.5, 0.5)'.format(
+        dart['loops']['all'][0].id)]
+
+    open_loop = _quad([(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)])
+    open_loop['loops']['all'] = [Loop([line.id for line in open_loop['curves']['all'][:3]])]
+    assert 'is not closed' in validation.check({'open': open_loop})[0]